@@ -0,0 +1,35 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+"""
+Helpers shared by the KNX/EIB protocol decoders.
+
+Nothing in here depends on libsigrokdecode, so the same code can be used by
+the offline tools in sigrok/knxoffline.
+"""
+
+from .timing import TIMINGS, BitTimings
+from .records import ACK_KINDS, Byte, Frame, Metrics, Telegram, TimingError
+from .core import StateMachine
+from .apci import APCI, GROUP_ADDRESSES, INDIVIDUAL_ADDRESSES, TPCI, TPCI_GROUP
+from .telegram import telegram_frame, telegram_message
+from .echo import EchoCheck
+from .metrics import BusMetrics
+from .filters import RecordFilter, TelegramFilter
+from .framestream import (FLAG_ACK, FLAG_CHECKSUM_OK, FLAG_PARITY_OK, FLAG_TX, FRAME_HEADER, pack_ack,
+                          pack_telegram, read_frames)
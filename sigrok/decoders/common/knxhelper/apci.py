@@ -0,0 +1,169 @@
+#
+# Copyright (C) 2013 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# KNX/EIB lookup tables for the transport and application control fields
+#
+# The tables are computed once when the module is loaded, so that a telegram
+# is described with a few index operations instead of a chain of comparisons.
+
+# The address strings of all 16 bit addresses, e.g. "1.1.100" and "1/0/0"
+INDIVIDUAL_ADDRESSES = tuple('{0}.{1}.{2}'.format(a >> 12, (a >> 8) & 15, a & 255) for a in range(65536))
+GROUP_ADDRESSES = tuple('{0}/{1}/{2}'.format(a >> 12, (a >> 8) & 15, a & 255) for a in range(65536))
+
+# The kinds of data that follow the APCI
+DATA_NONE = 0     # The bytes after the APCI, if any
+DATA_VALUE = 1    # The 6 bit value of a group value write/response
+DATA_6BIT = 2     # The 6 bit data in the APCI byte, followed by the bytes after it
+
+
+class Tpci:
+    """
+    Description of the transport control field of a telegram.
+
+    name is the text that is shown before the service, use_seq tells if the
+    sequence number is shown and use_apci if the telegram contains an APCI.
+    """
+
+    def __init__(self, name, use_seq, use_apci):
+        self.name = name
+        self.use_seq = use_seq
+        self.use_apci = use_apci
+
+
+class Apci:
+    """Description of an application control field (10 bits): service name and kind of data."""
+
+    def __init__(self, name, data=DATA_NONE):
+        self.name = name
+        self.data = data
+
+
+# The TPCI of telegrams to a group address
+TPCI_GROUP = Tpci('Group', False, True)
+
+
+def _tpci(tpcf):
+    """The Tpci of the transport control field tpcf (the first byte of the TPDU) of an individual telegram."""
+    tpcf &= 0xc3
+    if tpcf == 0x80:
+        return Tpci('T_Connect', False, False)
+    if tpcf == 0x81:
+        return Tpci('T_Disconnect', False, False)
+    if tpcf == 0xc2:
+        return Tpci('T_ACK', True, False)
+    if tpcf == 0xc3:
+        return Tpci('T_NAK', True, False)
+    if tpcf & 0xc0 == 0x40:     # A connected data transfer
+        return Tpci('', True, True)
+    if tpcf & 0xc0 == 0:        # An individual data transfer
+        return Tpci('Individual', False, True)
+    return Tpci('', False, False)
+
+
+# The TPCI of individual telegrams, indexed by the first byte of the TPDU
+TPCI = tuple(_tpci(tpcf) for tpcf in range(256))
+
+# Services that use the upper 4 bits of the APCI
+_APCI_GROUPS = {
+    0x1: Apci('Value_Response', DATA_VALUE),
+    0x2: Apci('Value_Write', DATA_VALUE),
+    0x3: Apci('Individual_Addr_Write'),
+    0x4: Apci('Individual_Addr_Read'),
+    0x5: Apci('Individual_Addr_Response'),
+    0x6: Apci('ADC_Read', DATA_6BIT),
+    0x7: Apci('ADC_Response', DATA_6BIT),
+    0x8: Apci('Mem_Read'),
+    0x9: Apci('Mem_Response'),
+    0xa: Apci('Mem_Write'),
+    0xc: Apci('DeviceDescriptor_Read'),
+    0xd: Apci('DeviceDescriptor_Response'),
+    0xe: Apci('Restart'),
+}
+
+# Services of APCI group 0xb, by the lower 6 bits
+_APCI_USER = {
+    0x00: 'UserMem_Read',
+    0x01: 'UserMem_Response',
+    0x02: 'UserMem_Write',
+    0x04: 'UserMemBit_Write',
+    0x05: 'UserManufacturerInfo_Read',
+    0x06: 'UserManufacturerInfo_Response',
+    0x07: 'FunctionProperty_Command',
+    0x08: 'FunctionPropertyState_Read',
+    0x09: 'FunctionPropertyState_Response',
+    0x3f: 'Reserved_0x3f',
+}
+
+# Services of APCI group 0xf, by the lower 6 bits
+_APCI_SYSTEM = {
+    0x10: 'MemoryBit_Write',
+    0x11: 'Authorize_Request',
+    0x12: 'Authorize_Response',
+    0x13: 'Key_Write',
+    0x14: 'Key_Response',
+    0x15: 'PropertyValue_Read',
+    0x16: 'PropertyValue_Response',
+    0x17: 'PropertyValue_Write',
+    0x18: 'PropertyDescr_Read',
+    0x19: 'PropertyDescr_Response',
+    0x1a: 'NetworkParam_Read',
+    0x1b: 'NetworkParam_Response',
+    0x1c: 'IndividualAddrSerialNumber_Read',
+    0x1d: 'IndividualAddrSerialNumber_Response',
+    0x1e: 'IndividualAddrSerialNumber_Write',
+    0x20: 'DomainAddr_Write',
+    0x21: 'DomainAddr_Read',
+    0x22: 'DomainAddr_Response',
+    0x23: 'DomainAddrSelective_Read',
+    0x24: 'NetworkParam_Write',
+    0x25: 'Link_Read',
+    0x26: 'Link_Response',
+    0x27: 'Link_Write',
+    0x28: 'GroupPropValue_Read',
+    0x29: 'GroupPropValue_Response',
+    0x2a: 'GroupPropValue_Write',
+    0x2b: 'GroupPropValue_InfoReport',
+    0x2c: 'DomainAddrSerialNumber_Read',
+    0x2d: 'DomainAddrSerialNumber_Response',
+    0x2e: 'DomainAddrSerialNumber_Write',
+}
+
+
+def _apci(apcf):
+    """The Apci of the application control field apcf (10 bits)."""
+    apcf_group = apcf >> 6
+    apcf_type = apcf & 0x3f
+
+    if apcf == 0:
+        return Apci('Value_Read')
+    if apcf_group in _APCI_GROUPS:
+        return _APCI_GROUPS[apcf_group]
+    if apcf_group == 0xb:
+        if 0xa <= apcf_type < 0x38:
+            return Apci('USERMSG')
+        if 0x38 <= apcf_type < 0x3f:
+            return Apci('Manufacturer specific USERMSG')
+        return Apci(_APCI_USER.get(apcf_type, ''))
+    # Group 0xf, and group 0 with data bits set
+    if apcf_type <= 0x0f:
+        return Apci('Coupler specific')
+    return Apci(_APCI_SYSTEM.get(apcf_type, 'ACPF_{0:x}'.format(apcf)))
+
+
+# The APCI of all 1024 application control fields
+APCI = tuple(_apci(apcf) for apcf in range(1024))
@@ -0,0 +1,139 @@
+#
+# Copyright (C) 2013 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# KNX/EIB byte and telegram state machine
+
+from .records import ACK_KINDS, Byte, Telegram
+
+
+class StateMachine:
+    """
+    The byte and telegram state machine of the KNX/EIB decoders.
+
+    The state machine is driven by events: call event() for the first falling
+    edge of the bus between next_min and next_max, or with falling_edge=False
+    when next_max is reached without one. Samples before next_min are spikes
+    between the expected signal parts and must be ignored, next_max == 0 means
+    that there is no timeout. The driver keeps last_bus up to date, it is the
+    bus level at the last sample that was looked at.
+
+    The decoded Byte and Telegram records are passed to put().
+    """
+
+    def __init__(self, timings, put):
+        self.timings = timings
+        self.put = put
+        self.state = 'IDLE'    # The state of the decoder
+        self.start_sample = 0  # The samplenum of the start sample
+        self.end_sample = 0
+        self.next_min = 0
+        self.next_max = 0
+        self.last_bus = 1
+        self.byte_end_sample = -1
+        self.checksum = 0xff
+        self.telegram = []
+        self.telegram_valid = False
+        self.byte0_start_sample = -1
+        self.byte = 0
+        self.mask = 0
+        self.parity = False
+
+    def bit_offset(self, samplenum):
+        """The offset of samplenum from the nominal start of the current data bit, None outside of a byte."""
+        if self.state != 'BYTE':
+            return None
+        return samplenum - (self.next_min - self.timings.bit_offs_min)
+
+    def event(self, samplenum, falling_edge):
+        t = self.timings
+
+        if self.state == 'BYTE_END':
+            # print("  samplenum={0}, falling_edge={1:1}, parity={2:1}".format(samplenum,
+            #                                                                  falling_edge, self.parity))
+            self.byte &= 0xff
+            self.checksum ^= self.byte
+            self.telegram.append(self.byte)
+
+            if falling_edge:  # Not a timeout => another byte follows
+                self.byte_end_sample = samplenum
+                kind = 'data'
+            else:  # Timeout => end of transmission
+                self.byte_end_sample = self.start_sample + t.byte_samples
+                if len(self.telegram) <= 1:
+                    kind = ACK_KINDS.get(self.byte, 'random')
+                elif self.checksum != 0:
+                    kind = 'bad-checksum'
+                else:
+                    kind = 'checksum'
+
+            if not self.parity:
+                self.telegram_valid = False
+
+            self.put(Byte(self.start_sample, self.byte_end_sample, self.byte, kind, self.parity))
+
+            if not falling_edge:  # Timeout => end of transmission
+                # The times between the frames are checked by BusMetrics
+                if len(self.telegram) >= 8:
+                    self.put(Telegram(self.byte0_start_sample, self.byte_end_sample, bytes(self.telegram),
+                                      self.checksum == 0, self.telegram_valid))
+
+                self.next_min = 0
+                self.next_max = 0
+                self.state = 'IDLE'
+                self.end_sample = self.byte_end_sample
+                # print("  ** end of transmission")
+                return
+
+            self.state = 'START_BIT'
+
+        if self.state == 'IDLE':
+            self.state = 'START_BIT'
+            self.checksum = 0xff
+            self.telegram = []
+            self.telegram_valid = True
+            self.byte0_start_sample = samplenum
+
+        if self.state == 'START_BIT' and falling_edge:
+            self.byte = 0
+            self.mask = 1
+            self.parity = True
+            self.state = 'BYTE'
+            self.start_sample = samplenum
+            self.next_min = self.start_sample + t.bit_samples + t.bit_offs_min
+            self.next_max = self.start_sample + t.bit_samples + t.bit_offs_max
+            # print("Start bit at {0}us".format(int(self.start_sample / t.samples_per_usec)))
+            return
+
+        if self.state == 'BYTE':
+            if not falling_edge:
+                self.byte |= self.mask
+                self.parity = not self.parity
+
+            # print("  at +{0}us, falling_edge={1:1}, parity={2:1}, mask=0x{3:x},"
+            #    .format(int((samplenum - self.start_sample) / t.samples_per_usec),
+            #     falling_edge, self.parity, self.mask))
+
+            if self.mask < 0x100:
+                self.mask <<= 1
+                self.next_min += t.bit_samples
+                self.next_max += t.bit_samples
+            else:
+                self.state = 'BYTE_END'
+                self.next_min = self.start_sample + t.byte_samples_min
+                self.next_max = self.start_sample + t.byte_samples_max
+            return
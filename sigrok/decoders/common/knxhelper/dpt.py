@@ -0,0 +1,237 @@
+#
+# Copyright (C) 2013 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# Datapoint types of the group addresses of an ETS project
+#
+# The index is built with the test-case-generator (STG) from a .knxproj file
+# and cached on disk as JSON, so that neither lxml nor STG is needed once the
+# cache is up to date. Unlike pickle, loading a JSON file that somebody else
+# put next to the project cannot run any code.
+
+import json
+import os
+import struct
+import sys
+
+# Increase if the format of the cache changes
+CACHE_VERSION = 3
+
+# The raw value "invalid data" of a 2 byte float (DPT 9)
+FLOAT16_INVALID = 0x7fff
+
+# The test-case-generator in this repository
+STG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', '..', 'test-case-generator')
+
+
+class DatapointInfo:
+    """
+    The datapoint type of a group address, reduced to what is needed to show values.
+
+    formats is a tuple of (kind, shift, width, coefficient, unit, extra) with kind
+    'bit', 'UI', 'SI', 'F', 'string' or 'enum'. shift is the bit position of the
+    field counted from the least significant bit of the value, extra are the
+    (off, on) texts of a bit, the {value: text} dictionary of an enumeration or
+    the encoding of a string.
+    """
+
+    def __init__(self, id, name, size, formats):
+        self.id = id
+        self.name = name
+        self.size = size
+        self.formats = formats
+
+    def value(self, frame):
+        """The value of a group value write/response Frame as integer."""
+        if self.size <= 6:
+            return frame.apci & 0x3f
+        return int.from_bytes(frame.payload, 'big')
+
+    def format(self, frame):
+        """The value of a group value write/response Frame as text, e.g. "21.5 °C"."""
+        if self.size > 6 and len(frame.payload) * 8 < self.size:
+            return None
+        value = self.value(frame)
+        return ', '.join(_format_field(value, *fmt) for fmt in self.formats)
+
+
+def _format_field(value, kind, shift, width, coefficient, unit, extra):
+    """A field of a datapoint value as text."""
+    raw = (value >> shift) & ((1 << width) - 1)
+    if kind == 'bit':
+        return extra[raw] or str(raw)
+    if kind == 'enum':
+        return extra.get(raw, str(raw))
+    if kind == 'string':
+        text = raw.to_bytes(width // 8, 'big').rstrip(b'\0')
+        return text.decode(extra or 'latin-1', 'replace')
+    if kind == 'F':
+        if width == 16:
+            if raw == FLOAT16_INVALID:
+                return 'invalid'
+            # KNX 2 byte float: sign, 4 bit exponent, 11 bit mantissa (two's complement)
+            mantissa = raw & 0x7ff
+            if raw & 0x8000:
+                mantissa -= 0x800
+            number = round(0.01 * mantissa * (1 << ((raw >> 11) & 15)), 2)
+        else:
+            number = struct.unpack('>f', raw.to_bytes(4, 'big'))[0]
+    elif kind == 'SI' and raw & (1 << (width - 1)):
+        number = raw - (1 << width)
+    else:
+        number = raw
+    if coefficient != 1:
+        number *= coefficient
+    text = '{0:g}'.format(number)
+    if unit:
+        text += ' ' + unit
+    return text
+
+
+def _datapoint_info(datapoint):
+    """The arguments of the DatapointInfo of a STG.Datapoint (plain data)."""
+    from STG.Datapoint import Bit, Enumeration, String, _Number_
+
+    formats = []
+    for fmt in datapoint.formats:
+        if fmt is None:
+            continue
+        width = getattr(fmt, 'size', 1)
+        # The formats are numbered in the order of the master file, which starts with the most significant bits
+        shift = datapoint.size - fmt.bit_start - width
+        if isinstance(fmt, Bit):
+            formats.append(('bit', shift, 1, 1, None, (fmt.off, fmt.on)))
+        elif isinstance(fmt, Enumeration):
+            formats.append(('enum', shift, width, 1, None, dict((int(v), t) for v, t in fmt.enums)))
+        elif isinstance(fmt, String):
+            formats.append(('string', shift, width, 1, None, fmt.encoding))
+        elif isinstance(fmt, _Number_):
+            formats.append((fmt.Kind, shift, width, fmt.scale, fmt.unit, None))
+    return (datapoint.id, datapoint.text, datapoint.size, tuple(formats))
+
+
+def _group_address_datapoint(ga):
+    """The datapoint type of a STG.Group_Address, or of the first com object connected to it."""
+    if ga.datapoint is not None:
+        return ga.datapoint
+    for com_objects in ga.com_objects.values():
+        for co in com_objects:
+            datapoint = getattr(co.com_object_ref, 'datapoint', None)
+            if datapoint:
+                return datapoint
+    return None
+
+
+def _build_data(knxproj):
+    """
+    Read the group addresses and their datapoint types from an ETS project.
+
+    Returns a dictionary {group address: (name, datapoint id)} and a dictionary
+    {datapoint id: arguments of the DatapointInfo}, both contain only plain
+    Python data.
+    """
+    if STG_PATH not in sys.path:
+        sys.path.append(STG_PATH)
+    from STG.KNX_Project import KNX_Project
+
+    knx = KNX_Project(knxproj, None)
+    infos = {}
+    addresses = {}
+    for project in knx.projects:
+        for ga in project.group_addresses.values():
+            datapoint = _group_address_datapoint(ga)
+            if datapoint is None:
+                continue
+            if datapoint.id not in infos:
+                infos[datapoint.id] = _datapoint_info(datapoint)
+            addresses[ga.value] = (ga.desc, datapoint.id)
+    return addresses, infos
+
+
+def _index(addresses, infos):
+    """The index of the data of _build_data(), one DatapointInfo per datapoint type."""
+    infos = dict((id, DatapointInfo(*args)) for id, args in infos.items())
+    return dict((ga, (name, infos[id])) for ga, (name, id) in addresses.items())
+
+
+def build_index(knxproj):
+    """
+    Read the group addresses and their datapoint types from an ETS project.
+
+    Returns a dictionary {group address: (name, DatapointInfo)} with the group
+    address as 16 bit number.
+    """
+    return _index(*_build_data(knxproj))
+
+
+def _dump_data(addresses, infos):
+    """The data of _build_data() as JSON data: lists instead of tuples and of dictionaries with number keys."""
+    def dump_format(kind, shift, width, coefficient, unit, extra):
+        if kind == 'enum':
+            extra = sorted(extra.items())
+        return [kind, shift, width, coefficient, unit, extra]
+
+    return {
+        'addresses': [[ga, name, id] for ga, (name, id) in sorted(addresses.items())],
+        'infos': [[id, name, size, [dump_format(*fmt) for fmt in formats]]
+                  for id, name, size, formats in infos.values()],
+    }
+
+
+def _load_data(data):
+    """The data of _build_data() from the JSON data of _dump_data()."""
+    def load_format(kind, shift, width, coefficient, unit, extra):
+        if kind == 'enum':
+            extra = dict((int(value), text) for value, text in extra)
+        elif kind == 'bit':
+            extra = tuple(extra)
+        return (kind, int(shift), int(width), coefficient, unit, extra)
+
+    addresses = dict((int(ga), (name, id)) for ga, name, id in data['addresses'])
+    infos = dict((id, (id, name, int(size), tuple(load_format(*fmt) for fmt in formats)))
+                 for id, name, size, formats in data['infos'])
+    return addresses, infos
+
+
+def load_index(knxproj, cache=None):
+    """
+    The index of build_index(), read from the cache file if it is up to date.
+
+    The cache is rebuilt when the project file is changed. Without cache file
+    name, the cache is stored next to the project file.
+    """
+    cache = cache or knxproj + '.dpt-index'
+    stat = os.stat(knxproj)
+    key = [CACHE_VERSION, stat.st_size, stat.st_mtime]
+    try:
+        with open(cache, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['key'] == key:
+            return _index(*_load_data(cached))
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+        pass
+
+    data = _build_data(knxproj)
+    try:
+        cached = _dump_data(*data)
+        cached['key'] = key
+        with open(cache, 'w', encoding='utf-8') as f:
+            json.dump(cached, f)
+    except OSError:
+        # Not cached, e.g. the directory of the project is read only
+        pass
+    return _index(*data)
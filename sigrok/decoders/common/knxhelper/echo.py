@@ -0,0 +1,83 @@
+#
+# Copyright (C) 2013 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# Correlation of the bytes sent by a transceiver with their echo on the bus
+
+import collections
+
+
+class EchoCheck:
+    """
+    Compare the bytes of the TX line of a transceiver with their echo on the bus (RX line).
+
+    A byte on the bus is the echo of a sent byte if both start within tolerance
+    samples. The bus is a wired AND, a 0 bit always wins: an echo that only has
+    additional 0 bits is a 'collision' with another sender, any other
+    difference is a 'mismatch'. Sent bytes without an echo are reported as
+    'no-echo' once the bus is horizon samples ahead of them.
+
+    The problems are passed to put(kind, tx_byte, rx_byte), rx_byte is None
+    for 'no-echo'.
+    """
+
+    def __init__(self, tolerance, horizon, put):
+        self.tolerance = tolerance
+        self.horizon = horizon
+        self.put = put
+        self.rx_bytes = collections.deque()  # Bytes on the bus that wait for a sent byte
+        self.tx_bytes = collections.deque()  # Sent bytes that wait for their echo
+
+    def rx(self, byte):
+        """Add a Byte record of the bus."""
+        self.expire(byte.ss)
+        tx = self.pop_partner(self.tx_bytes, byte)
+        if tx is None:
+            self.rx_bytes.append(byte)
+        else:
+            self.compare(tx, byte)
+
+    def tx(self, byte):
+        """Add a Byte record of the TX line."""
+        self.expire(byte.ss)
+        rx = self.pop_partner(self.rx_bytes, byte)
+        if rx is None:
+            self.tx_bytes.append(byte)
+        else:
+            self.compare(byte, rx)
+
+    def expire(self, samplenum):
+        # The records of both lines are ready about the same time, older bytes will not get a partner anymore
+        while self.rx_bytes and self.rx_bytes[0].ss < samplenum - self.horizon:
+            self.rx_bytes.popleft()
+        while self.tx_bytes and self.tx_bytes[0].ss < samplenum - self.horizon:
+            self.put('no-echo', self.tx_bytes.popleft(), None)
+
+    def pop_partner(self, pending, byte):
+        for i, other in enumerate(pending):
+            if abs(other.ss - byte.ss) <= self.tolerance:
+                del pending[i]
+                return other
+        return None
+
+    def compare(self, tx, rx):
+        if tx.value == rx.value:
+            return
+        if rx.value & ~tx.value == 0:
+            self.put('collision', tx, rx)
+        else:
+            self.put('mismatch', tx, rx)
@@ -0,0 +1,141 @@
+#
+# Copyright (C) 2013 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# Filtering of the telegrams by source, destination and service
+
+from .apci import APCI, TPCI, TPCI_GROUP
+from .records import Telegram
+
+
+def parse_address(text, separator):
+    """The 16 bit value of an address like '1.1.5' (separator '.') or '1/2/3' (separator '/')."""
+    parts = text.strip().split(separator)
+    if len(parts) != 3 or not all(p.strip().isdigit() for p in parts):
+        raise ValueError('Invalid address: {0}'.format(text))
+    main, middle, sub = (int(p) for p in parts)
+    if main > 15 or middle > 15 or sub > 255:
+        raise ValueError('Invalid address: {0}'.format(text))
+    return (main << 12) | (middle << 8) | sub
+
+
+def address_table(text, separator):
+    """
+    The lookup table (65536 bytes, 1 = selected) of a comma separated list
+    of addresses and address ranges like '1.1.5, 1.1.10-1.1.20'.
+    """
+    table = bytearray(65536)
+    for item in text.split(','):
+        first, _, last = item.partition('-')
+        first = parse_address(first, separator)
+        last = parse_address(last, separator) if last else first
+        table[first:last + 1] = b'\x01' * (last + 1 - first)
+    return bytes(table)
+
+
+class TelegramFilter:
+    """
+    Select telegrams by source address, destination address and service.
+
+    sources is a list of individual addresses or ranges, e.g. '1.1.5,1.1.10-1.1.20',
+    destinations a list of group addresses and/or individual addresses or
+    ranges, e.g. '1/2/0-1/2/255,1.1.5', services a list of service names as
+    shown in the telegram annotation, e.g. 'Value_Write,T_Connect'. Empty
+    lists select all telegrams. The lists are compiled into lookup tables
+    once, match() only needs a few index operations.
+    """
+
+    def __init__(self, sources='', destinations='', services=''):
+        self.sources = address_table(sources, '.') if sources.strip() else None
+
+        self.groups = self.individuals = None
+        if destinations.strip():
+            items = destinations.split(',')
+            groups = ','.join(d for d in items if '/' in d)
+            individuals = ','.join(d for d in items if '/' not in d)
+            self.groups = address_table(groups, '/') if groups else bytes(65536)
+            self.individuals = address_table(individuals, '.') if individuals else bytes(65536)
+
+        self.apcis = self.tpcis = None
+        if services.strip():
+            names = set(s.strip().lower() for s in services.split(',')) - set([''])
+            known = set(a.name.lower() for a in APCI) | set(t.name.lower() for t in TPCI)
+            unknown = names - known
+            if unknown:
+                raise ValueError('Unknown service: {0}'.format(', '.join(sorted(unknown))))
+            self.apcis = bytes(a.name.lower() in names for a in APCI)
+            # Telegrams without APCI are selected by the name of their TPCI
+            self.tpcis = bytes(t.name.lower() in names for t in TPCI)
+
+    def match(self, data):
+        """Whether the telegram (raw bytes) is selected."""
+        if self.sources is not None and not self.sources[(data[1] << 8) | data[2]]:
+            return False
+        group = data[5] & 128
+        if self.groups is not None:
+            table = self.groups if group else self.individuals
+            if not table[(data[3] << 8) | data[4]]:
+                return False
+        if self.apcis is not None:
+            tpci = TPCI_GROUP if group else TPCI[data[6]]
+            if tpci.use_apci:
+                return bool(self.apcis[((data[6] & 3) << 8) | data[7]])
+            return bool(self.tpcis[data[6]])
+        return True
+
+
+class RecordFilter:
+    """
+    Pass the Byte and Telegram records of the selected telegrams to put().
+
+    The bytes of a frame are held back until its Telegram record decides if
+    it is selected. An acknowledge is passed if the telegram before it was
+    selected, other short frames are dropped.
+    """
+
+    def __init__(self, telegram_filter, put):
+        self.match = telegram_filter.match
+        self.put = put
+        self.frame = []         # The Byte records of the current frame
+        self.complete = False   # The last byte of the frame was received
+        self.selected = False   # The last telegram was selected
+
+    def record(self, record):
+        if isinstance(record, Telegram):
+            self.selected = self.match(record.data)
+            if self.selected:
+                for byte in self.frame:
+                    self.put(byte)
+                self.put(record)
+            self.frame = []
+            self.complete = False
+            return
+
+        if self.complete:
+            # The last frame had no Telegram record
+            self.frame = []
+            self.complete = False
+
+        if record.kind == 'data':
+            self.frame.append(record)
+        elif not self.frame and record.kind != 'random':
+            # A single byte frame: ACK, NAK or BUSY
+            if self.selected:
+                self.put(record)
+        else:
+            self.frame.append(record)
+            self.complete = True
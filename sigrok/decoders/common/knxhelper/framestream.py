@@ -0,0 +1,70 @@
+#
+# Copyright (C) 2013 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# Binary stream of the decoded frames
+#
+# The knx decoder writes its frames to OUTPUT_BINARY ('frames', e.g.
+# sigrok-cli -B knx=frames) in this format, so that other tools can read them
+# without parsing the text annotations. Every frame is a record of
+#
+#   uint16  number of frame bytes
+#   uint8   flags (FLAG_*)
+#   uint64  start sample of the frame
+#   uint64  end sample of the frame
+#   bytes   the frame bytes (telegram including the checksum, or the ACK byte)
+#
+# All numbers are little endian. The samplerate is not part of the stream.
+
+import collections
+import struct
+
+# The header of a frame record
+FRAME_HEADER = struct.Struct('<HBQQ')
+
+FLAG_CHECKSUM_OK = 0x01    # The checksum of the telegram is ok (always set for single byte frames)
+FLAG_PARITY_OK = 0x02      # All bytes have a valid parity bit
+FLAG_TX = 0x04             # The frame was sent on the TX line, not received on the bus
+FLAG_ACK = 0x08            # A single byte frame: ACK, NAK, BUSY or BUSY_NAK
+
+# A frame read from the stream
+StreamFrame = collections.namedtuple('StreamFrame', 'ss es flags data')
+
+
+def pack_telegram(telegram, flags=0):
+    """The record of a Telegram record."""
+    flags |= (FLAG_CHECKSUM_OK if telegram.checksum_ok else 0) | (FLAG_PARITY_OK if telegram.parity_ok else 0)
+    return FRAME_HEADER.pack(len(telegram.data), flags, telegram.ss, telegram.es) + telegram.data
+
+
+def pack_ack(byte, flags=0):
+    """The record of a single byte frame (a Byte record)."""
+    flags |= FLAG_ACK | FLAG_CHECKSUM_OK | (FLAG_PARITY_OK if byte.parity_ok else 0)
+    return FRAME_HEADER.pack(1, flags, byte.ss, byte.es) + bytes((byte.value, ))
+
+
+def read_frames(f):
+    """Generate the StreamFrame records of a binary file object, e.g. sys.stdin.buffer."""
+    while True:
+        header = f.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            return
+        length, flags, ss, es = FRAME_HEADER.unpack(header)
+        data = f.read(length)
+        if len(data) < length:
+            return
+        yield StreamFrame(ss, es, flags, data)
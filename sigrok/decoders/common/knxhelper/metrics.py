@@ -0,0 +1,133 @@
+#
+# Copyright (C) 2013 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# Bus load and timing metrics of the KNX/EIB bus
+
+import collections
+
+from .records import ACK_KINDS, Byte, Metrics, Telegram, TimingError
+
+ACKS = frozenset(ACK_KINDS.values())
+
+
+class BusMetrics:
+    """
+    Collect bus load, telegram and ACK rates, bit jitter and gap violations.
+
+    Feed it the records of the state machine with record() and the offsets of
+    the falling edges of the data bits with bit_edge(). A Metrics record is
+    passed to put() for every period (default: one second) and a TimingError
+    record for every frame that starts too early or, for an acknowledge, too
+    late after the previous frame. The work per byte is a few additions, so
+    the metrics can stay enabled for long captures.
+
+    Periods without bytes are output too. A decoder calls advance() when it
+    is idle (e.g. at the end of each period, see next_period) and flush() at
+    the end of the capture for the last, partial period.
+    """
+
+    def __init__(self, timings, samplerate, put, period=None):
+        self.timings = timings
+        self.put = put
+        self.period = int(period or samplerate)
+        self.period_start = 0
+        self.busy = 0                # Busy samples of the current period
+        self.carry = 0               # Busy samples of the bytes that reach into the next periods
+        self.telegrams = 0
+        self.acks = 0
+        self.gap_errors = 0
+        self.jitter = collections.Counter()
+        self.frame_start = None      # Start sample of the current frame
+        self.frame_bytes = 0
+        self.last_frame_end = 0      # End of the last byte of the last frame, with the exact bit time
+
+    def bit_edge(self, offset):
+        """Count the offset (in samples) of a falling edge from the nominal start of its bit."""
+        self.jitter[int(round(offset / self.timings.samples_per_usec))] += 1
+
+    def record(self, record):
+        """Count a Byte or Telegram record."""
+        if isinstance(record, Telegram):
+            self.telegrams += 1
+            return
+        if not isinstance(record, Byte):
+            return
+
+        self.advance(record.ss)
+        period_end = self.period_start + self.period
+        self.busy += min(record.es, period_end) - record.ss
+        if record.es > period_end:
+            self.carry += record.es - period_end
+        if record.kind in ACKS:
+            self.acks += 1
+
+        if self.frame_start is None:
+            self.frame_start = record.ss
+        self.frame_bytes += 1
+        if record.kind != 'data':
+            # The byte end of the state machine uses the rounded bit time, it is up to 1% too early
+            self.frame_end(record.ss + 13 * self.timings.bit_time)
+
+    def frame_end(self, end_sample):
+        # See KNX docu 3/2/2 p. 32+ for timings
+        t = self.timings
+        if self.last_frame_end > 0:
+            wait = self.frame_start - self.last_frame_end
+            deviation = 0
+            if self.frame_bytes == 1:
+                if wait < t.ack_wait_samples_min:
+                    deviation = wait - t.ack_wait_samples_min
+                elif wait > t.ack_wait_samples_max:
+                    deviation = wait - t.ack_wait_samples_max
+            elif wait < t.tel_wait_samples_min:
+                deviation = wait - t.tel_wait_samples_min
+            if deviation:
+                self.gap_errors += 1
+                self.put(TimingError(int(self.last_frame_end), self.frame_start, deviation))
+
+        self.last_frame_end = end_sample
+        self.frame_start = None
+        self.frame_bytes = 0
+
+    @property
+    def next_period(self):
+        """The first sample of the next period."""
+        return self.period_start + self.period
+
+    def advance(self, samplenum):
+        """Output the metrics of the periods that end before samplenum, also of periods without bytes."""
+        while samplenum >= self.period_start + self.period:
+            self.put_period(self.period_start + self.period)
+
+    def flush(self, end_sample):
+        """Output the metrics up to the end of the capture, the last period ends at end_sample."""
+        self.advance(end_sample)
+        if end_sample > self.period_start:
+            self.put_period(end_sample)
+
+    def put_period(self, end):
+        """Output the metrics of the period that ends at end and start the next one."""
+        self.put(Metrics(self.period_start, end, 100.0 * self.busy / (end - self.period_start),
+                         self.telegrams, self.acks, self.gap_errors, dict(self.jitter)))
+        self.period_start = end
+        self.busy = min(self.carry, self.period)
+        self.carry -= self.busy
+        self.telegrams = 0
+        self.acks = 0
+        self.gap_errors = 0
+        self.jitter.clear()
@@ -0,0 +1,56 @@
+#
+# Copyright (C) 2013 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# Decoded KNX/EIB bus data
+
+import collections
+
+# The kind of a frame with a single byte
+ACK_KINDS = {0xcc: 'ack', 0x0c: 'nak', 0xc0: 'busy', 0x00: 'busy-nak'}
+
+Byte = collections.namedtuple('Byte', 'ss es value kind parity_ok')
+Byte.__doc__ = """A byte on the bus.
+
+kind is one of 'data', 'checksum', 'bad-checksum' (the last byte of a frame),
+'ack', 'nak', 'busy', 'busy-nak' or 'random' (a single byte frame).
+"""
+
+Telegram = collections.namedtuple('Telegram', 'ss es data checksum_ok parity_ok')
+Telegram.__doc__ = """A telegram with at least 8 bytes, data includes the checksum byte."""
+
+Frame = collections.namedtuple('Frame', 'ss es data src dst group tpci apci payload checksum_ok parity_ok')
+Frame.__doc__ = """The fields of a telegram.
+
+data is the raw telegram including the checksum byte, src and dst are the 16 bit
+source and destination addresses and group tells if dst is a group address.
+tpci is the transport control field (the first byte of the TPDU without the
+APCI bits), apci the application control field (10 bits, including 6 bit
+data) or None for the transport layer control telegrams. payload are the
+bytes after the APCI without the checksum byte.
+"""
+
+Metrics = collections.namedtuple('Metrics', 'ss es load telegrams acks gap_errors jitter')
+Metrics.__doc__ = """Bus metrics of a period (one second) of the capture.
+
+load is the bus load in percent, telegrams, acks and gap_errors are counts and
+jitter is a histogram {offset in usec: count} of the falling edges of the 0
+bits relative to their nominal position.
+"""
+
+TimingError = collections.namedtuple('TimingError', 'ss es deviation')
+TimingError.__doc__ = """The time between two frames (from ss to es) violates the bus timings by deviation samples."""
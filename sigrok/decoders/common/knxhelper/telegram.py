@@ -0,0 +1,76 @@
+#
+# Copyright (C) 2013 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# KNX/EIB telegram formatting
+
+from .apci import APCI, DATA_6BIT, DATA_VALUE, GROUP_ADDRESSES, INDIVIDUAL_ADDRESSES, TPCI, TPCI_GROUP
+from .records import Frame
+
+
+def telegram_frame(telegram):
+    """The Frame of a Telegram record."""
+    data = telegram.data
+    group = data[5] & 128 != 0
+    tpci = TPCI_GROUP if group else TPCI[data[6]]
+    apci = ((data[6] & 3) << 8) | data[7] if tpci.use_apci else None
+    return Frame(telegram.ss, telegram.es, data, (data[1] << 8) | data[2], (data[3] << 8) | data[4], group,
+                 data[6] & 0xfc, apci, data[8:-1], telegram.checksum_ok, telegram.parity_ok)
+
+
+def telegram_message(telegram):
+    """Human readable description of a telegram, e.g. "1.1.100 to 1/0/0: Group Value_Write: 1"."""
+    from_addr = INDIVIDUAL_ADDRESSES[(telegram[1] << 8) | telegram[2]]
+
+    if telegram[5] & 128 == 0:
+        dest_addr = INDIVIDUAL_ADDRESSES[(telegram[3] << 8) | telegram[4]]
+        tpci = TPCI[telegram[6]]
+    else:
+        dest_addr = GROUP_ADDRESSES[(telegram[3] << 8) | telegram[4]]
+        tpci = TPCI_GROUP
+
+    details = tpci.name
+    data = ''
+    data_kind = None
+
+    if tpci.use_apci:
+        apci = APCI[((telegram[6] & 3) << 8) | telegram[7]]
+        details = (details + ' ' + apci.name).strip()
+        data_kind = apci.data
+        if data_kind == DATA_VALUE:
+            data = group_value_data(telegram)
+
+    if tpci.use_seq:  # Add the transport sequence
+        details += ' (S={0})'.format((telegram[6] >> 2) & 15)
+
+    if data == '':
+        if data_kind == DATA_6BIT:
+            data = '%02x: ' % (telegram[7] & 0x3f)
+        if len(telegram) > 8:
+            data += ''.join(' %02x' % x for x in telegram[8:-1])
+
+    if data != '':
+        details += ': ' + data.strip()
+
+    return '{0} to {1}: {2}'.format(from_addr, dest_addr, details)
+
+
+def group_value_data(telegram):
+    """Get the data of a group value write/response as hex string."""
+    if len(telegram) > 8:
+        return '%x' % (telegram[7] & 0x3f)
+    return '%x' % (telegram[7] & 0x3f) + ''.join(' %02x' % x for x in telegram[8:-1])
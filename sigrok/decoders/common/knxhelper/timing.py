@@ -0,0 +1,66 @@
+#
+# Copyright (C) 2013 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# KNX/EIB bit timings
+
+TIMINGS = ('strict', 'default', 'relaxed')
+
+
+class BitTimings:
+    """
+    The bit timings of the KNX bus in samples for a given samplerate.
+
+    `timings` is the value of the decoder option of the same name:
+    'strict', 'default' or 'relaxed'.
+    """
+
+    def __init__(self, samplerate, timings='default', bitrate=9600):
+        self.samples_per_usec = float(samplerate / 1000000.0)
+        self.bit_samples = int(samplerate / bitrate)  # 104 usec (for standard 9600 baud)
+        self.stop_samples = int(self.bit_samples * 3)
+        self.byte_samples = self.bit_samples * 13
+        self.bit_time = samplerate / bitrate  # The exact bit time, bit_samples is rounded down
+
+        if timings == 'strict':
+            self.bit_samples_min = self.bit_samples - 2 * self.samples_per_usec - 1
+            self.bit_samples_max = self.bit_samples + 2 * self.samples_per_usec + 1
+            self.byte_samples_min = self.byte_samples - 30 * self.samples_per_usec - 1
+            self.byte_samples_max = self.byte_samples + 30 * self.samples_per_usec + 1
+            self.bit_offs_min = int(-7 * self.samples_per_usec) - 1
+            self.bit_offs_max = int(33 * self.samples_per_usec) + 1
+        elif timings == 'relaxed':
+            self.bit_samples_min = self.bit_samples - 20 * self.samples_per_usec
+            self.bit_samples_max = self.bit_samples + 20 * self.samples_per_usec
+            self.byte_samples_min = self.byte_samples - 40 * self.samples_per_usec
+            self.byte_samples_max = self.byte_samples + 60 * self.samples_per_usec
+            self.bit_offs_min = int(-9 * self.samples_per_usec)
+            self.bit_offs_max = int(40 * self.samples_per_usec)
+        else:  # 'default' timings
+            self.bit_samples_min = self.bit_samples - 2 * self.samples_per_usec - 1
+            self.bit_samples_max = self.bit_samples + 2 * self.samples_per_usec + 1
+            self.byte_samples_min = self.byte_samples - 30 * self.samples_per_usec - 3
+            self.byte_samples_max = self.byte_samples + 30 * self.samples_per_usec + 5
+            self.bit_offs_min = int(-9 * self.samples_per_usec) - 1
+            self.bit_offs_max = int(40 * self.samples_per_usec) + 2
+
+        # See KNX docu 3/2/2 p. 32+ for timings
+        # The end of byte is 2 bit-times too late in the algorythm. Therefore the lower values below.
+        # The exact bit time is used here, the rounding error of bit_samples adds up over the gap.
+        self.ack_wait_samples_min = self.bit_time * 13 - 50 * self.samples_per_usec
+        self.ack_wait_samples_max = self.bit_time * 13 + 50 * self.samples_per_usec
+        self.tel_wait_samples_min = self.bit_time * 38
@@ -18,7 +18,36 @@
 
 # KNX/EIB protocol decoder
 
+import math
 import sigrokdecode as srd
+from common.knxhelper import (FLAG_TX, BitTimings, BusMetrics, EchoCheck, RecordFilter, StateMachine, Telegram,
+                              TelegramFilter, TimingError, pack_ack, pack_telegram, telegram_frame, telegram_message)
+
+'''
+OUTPUT_PYTHON format:
+
+Packet:
+[<ptype>, <pdata>]
+
+<ptype>:
+ - 'TELEGRAM': <pdata> is a common.knxhelper.Frame with the start and end
+   sample, the raw bytes, source and destination address, group flag, TPCI,
+   APCI, payload and the checksum and parity state of the telegram.
+ - 'ACK': <pdata> is a common.knxhelper.Byte of a single byte frame, its kind
+   is 'ack', 'nak', 'busy' or 'busy-nak'.
+ - 'TX-TELEGRAM', 'TX-ACK': the same for the TX line, if both RX and TX are
+   connected.
+ - 'METRICS': <pdata> is a common.knxhelper.Metrics with the bus load, the
+   telegram and ACK counts, the gap violations and the bit jitter histogram
+   of one second (option metrics).
+ - 'TIMING-ERROR': <pdata> is a common.knxhelper.TimingError, a gap between
+   two frames that violates the bus timings (option metrics).
+
+OUTPUT_BINARY format:
+
+'frames': a record with the length, flags, start and end sample and the
+bytes of every telegram and ACK, see common/knxhelper/framestream.py.
+'''
 
 # Used for differentiating between the two data directions.
 KNX_RX = 0
@@ -48,6 +77,12 @@ class Decoder(srd.Decoder):
         {'id': 'timings', 'desc': 'Bit timings',
                           'default': 'default', 'values': ('strict', 'default', 'relaxed')},
         {'id': 'inverted_signal', 'desc': 'Inverted signal', 'default': 'no', 'values': ('yes', 'no')},
+        {'id': 'metrics', 'desc': 'Bus load and timing metrics', 'default': 'no', 'values': ('yes', 'no')},
+        {'id': 'verbosity', 'desc': 'Annotations', 'default': 'full',
+                            'values': ('full', 'telegram-only', 'errors-only')},
+        {'id': 'source', 'desc': 'Only telegrams from (e.g. 1.1.5,1.1.10-1.1.20)', 'default': ''},
+        {'id': 'destination', 'desc': 'Only telegrams to (e.g. 1/2/0-1/2/255,1.1.5)', 'default': ''},
+        {'id': 'service', 'desc': 'Only services (e.g. Value_Write,Mem_Read)', 'default': ''},
     )
 
     annotations = (
@@ -64,6 +99,11 @@ class Decoder(srd.Decoder):
         ('bytes', 'Bytes on the KNX bus'),                      # 10
         ('acknowledge-frame', 'Short acknowledge frame'),       # 11
         ('acknowledge-busy-nack', 'BUSY-NAK collision'),        # 12
+        ('tx-telegram', 'Telegram sent on TX'),                 # 13
+        ('tx-bytes', 'Bytes sent on TX'),                       # 14
+        ('echo-mismatch', 'Sent byte not echoed on the bus'),   # 15
+        ('collision', 'Sent byte overwritten by another sender'),  # 16
+        ('metrics', 'Bus load, rates and bit jitter per second'),  # 17
     )
 
     # these must match order of above annotations
@@ -80,49 +120,43 @@ class Decoder(srd.Decoder):
     rowid_label = 10
     rowid_label_ack = 11
     rowid_busy_nack = 12
+    rowid_tx_label = 13
+    rowid_tx_byte = 14
+    rowid_echo_mismatch = 15
+    rowid_collision = 16
+    rowid_metrics = 17
 
     annotation_rows = (
          ('id-telegram', 'Telegram', (rowid_label, rowid_label_ack)),
          ('id-bytes', 'Bytes', (rowid_databyte, rowid_checksum, rowid_ack, rowid_nack, rowid_busy, rowid_busy_nack)),
+         ('id-tx-telegram', 'TX Telegram', (rowid_tx_label,)),
+         ('id-tx-bytes', 'TX Bytes', (rowid_tx_byte,)),
          ('id-warnings', 'Warnings', (rowid_error, rowid_byte_parity_error, rowid_checksum_error,
-                                      rowid_random_byte, rowid_error_timing)),
+                                      rowid_random_byte, rowid_error_timing, rowid_echo_mismatch, rowid_collision)),
+         ('id-metrics', 'Metrics', (rowid_metrics,)),
     )
 
+    binary = (
+        ('frames', 'Telegrams and ACKs as length prefixed records with sample numbers'),
+    )
+
+    # Labels and byte rows of the single byte frames
+    ack_labels = {
+        'ack': ('ACK', rowid_ack),
+        'nak': ('NAK', rowid_nack),
+        'busy': ('BUSY', rowid_busy),
+        'busy-nak': ('BUSY_NAK', rowid_busy_nack),
+    }
+
     def __init__(self, **kwargs):
         # Constructor
         self.data = 0
         self.ss = 0
         self.samplerate = None
         self.bitrate = 9600
-        self.state = 'IDLE'    # The state of the decoder
-        self.start_sample = 0  # The samplenum of the start sample
-        self.end_sample = 0
-        self.next_min = 0
-        self.next_max = 0
-        self.last_bus = 1
         self.samples_per_usec = -1
         self.inverted_signal = False
-        self.bit_samples = -1
-        self.stop_samples = -1
-        self.byte_samples = -1
-        self.bit_samples_min = -1
-        self.bit_samples_max = -1
-        self.byte_samples_min = -1
-        self.byte_samples_max = -1
-        self.bit_offs_min = -1
-        self.bit_offs_max = -1
-        self.ack_wait_samples_min = -1
-        self.ack_wait_samples_max = -1
-        self.tel_wait_samples_min = -1
-        self.byte_end_sample = -1
-        self.checksum = 0xff
-        self.telegram = []
-        self.telegram_bytes = -1
-        self.telegram_valid = False
-        self.byte0_start_sample = -1
-        self.byte = 0
-        self.mask = 0
-        self.parity = False
+        self.timings = None
         self.reset()
 
     def metadata(self, key, value):
@@ -139,55 +173,37 @@ class Decoder(srd.Decoder):
         self.ss = 0
         self.samplerate = None
         self.bitrate = 9600
-        self.state = 'IDLE'    # The state of the decoder
-        self.start_sample = 0  # The samplenum of the start sample
-        self.end_sample = 0
-        self.next_min = 0
-        self.next_max = 0
-        self.last_bus = 1
+        self.channels = []
+        self.state_machines = []
+        self.echo_check = None
+        self.metrics = None
 
     def start(self):
         # Start decoding
         self.out_python = self.register(srd.OUTPUT_PYTHON)
+        self.out_binary = self.register(srd.OUTPUT_BINARY)
         self.out_ann = self.register(srd.OUTPUT_ANN)
 
         self.inverted_signal = (self.options['inverted_signal'] == 'yes')
-        self.bit_samples = int(self.samplerate / self.bitrate)  # 104 usec (for standard 9600 baud)
-        self.stop_samples = int(self.bit_samples * 3)
-        self.byte_samples = self.bit_samples * 13
-
-        if self.options['timings'] == 'strict':
-            self.bit_samples_min = self.bit_samples - 2 * self.samples_per_usec - 1
-            self.bit_samples_max = self.bit_samples + 2 * self.samples_per_usec + 1
-            self.byte_samples_min = self.byte_samples - 30 * self.samples_per_usec - 1
-            self.byte_samples_max = self.byte_samples + 30 * self.samples_per_usec + 1
-            self.bit_offs_min = int(-7 * self.samples_per_usec) - 1
-            self.bit_offs_max = int(33 * self.samples_per_usec) + 1
-        elif self.options['timings'] == 'relaxed':
-            self.bit_samples_min = self.bit_samples - 20 * self.samples_per_usec
-            self.bit_samples_max = self.bit_samples + 20 * self.samples_per_usec
-            self.byte_samples_min = self.byte_samples - 40 * self.samples_per_usec
-            self.byte_samples_max = self.byte_samples + 60 * self.samples_per_usec
-            self.bit_offs_min = int(-9 * self.samples_per_usec)
-            self.bit_offs_max = int(40 * self.samples_per_usec)
-        else:  # 'default' timings
-            self.bit_samples_min = self.bit_samples - 2 * self.samples_per_usec - 1
-            self.bit_samples_max = self.bit_samples + 2 * self.samples_per_usec + 1
-            self.byte_samples_min = self.byte_samples - 30 * self.samples_per_usec - 3
-            self.byte_samples_max = self.byte_samples + 30 * self.samples_per_usec + 5
-            self.bit_offs_min = int(-9 * self.samples_per_usec) - 1
-            self.bit_offs_max = int(40 * self.samples_per_usec) + 2
-
-        # See KNX docu 3/2/2 p. 32+ for timings
-        # The end of byte is 2 bit-times too late in the algorythm. Therefore the lower values below.
-        self.ack_wait_samples_min = self.bit_samples * 13 - 50 * self.samples_per_usec
-        self.ack_wait_samples_max = self.bit_samples * 13 + 50 * self.samples_per_usec
-        self.tel_wait_samples_min = self.bit_samples * 38
-
-        if self.inverted_signal:
-            self.last_bus = 0
-        else:
-            self.last_bus = 1
+        self.timings = BitTimings(self.samplerate, self.options['timings'], self.bitrate)
+        if self.options['metrics'] == 'yes':
+            self.metrics = BusMetrics(self.timings, self.samplerate, self.put_metrics)
+
+        # telegram-only: one annotation per telegram or ACK, errors-only: only warnings.
+        # The Python output and the metrics row are not affected.
+        verbosity = self.options['verbosity']
+        self.show_frames = verbosity != 'errors-only'
+        self.show_bytes = verbosity == 'full'
+        self.show_errors = verbosity != 'telegram-only'
+
+        # Only the selected telegrams are output, the metrics and the echo check still get all records
+        self.output_rx = self.output_record
+        self.output_tx = self.output_tx_record
+        source, destination, service = (self.options[o].strip() for o in ('source', 'destination', 'service'))
+        if source or destination or service:
+            telegram_filter = TelegramFilter(source, destination, service)
+            self.output_rx = RecordFilter(telegram_filter, self.output_record).record
+            self.output_tx = RecordFilter(telegram_filter, self.output_tx_record).record
 
     def decode(self):
         if not self.samplerate:
@@ -197,139 +213,73 @@ class Decoder(srd.Decoder):
         if not True in has_pin:
             raise ChannelError('Need at least one of KNX TX or RX pins.')
 
-        while True:
-            # wait_conditions = []
-            # if has_pin[KNX_RX]:
-            #    pass
-
-            # if has_pin[KNX_TX]:
-            #    pass
-
-            # (rx, tx) = self.wait(wait_conditions)
-            (bus, tx) = self.wait()
+        # A falling edge of the (non inverted) bus is a rising edge on an inverted line
+        self.edge = 'r' if self.inverted_signal else 'f'
+
+        # Both lines are decoded in the same pass, each with its own state machine
+        self.channels = [ch for ch in (KNX_RX, KNX_TX) if has_pin[ch]]
+        self.state_machines = [StateMachine(self.timings, self.put_record)]
+        if len(self.channels) == 2:
+            self.state_machines.append(StateMachine(self.timings, self.put_tx_record))
+            t = self.timings
+            self.echo_check = EchoCheck(t.bit_samples / 2, t.byte_samples_max, self.put_echo_error)
+
+        try:
+            while True:
+                self.wait_bus_events()
+        except EOFError:
+            # End of the capture: the metrics of the last period up to the last sample seen
+            if self.metrics:
+                self.metrics.flush(self.samplenum + 1)
+            raise
 
+    #
+    # Wait for the next sample that matters for one of the state machines.
+    #
+    # Samples before next_min are skipped (spikes between the expected signal
+    # parts), then we wait for a falling edge of the line or until next_max is
+    # reached. The state machines of both lines share the same wait: it ends
+    # at the first falling edge of any line or the first next_min/next_max of
+    # any state machine.
+    #
+    def wait_bus_events(self):
+        conditions = [{channel: self.edge} for channel in self.channels]
+        deadlines = []
+        for sm in self.state_machines:
+            next_min = int(math.ceil(sm.next_min))
+            if self.samplenum < next_min:
+                deadlines.append(next_min)
+            elif sm.next_max != 0:
+                deadlines.append(int(math.ceil(sm.next_max)))
+        idle = not deadlines
+        if idle and self.metrics:
+            # Wake up at the end of the metrics period, also if the bus stays quiet
+            deadlines.append(max(self.metrics.next_period, self.samplenum + 1))
+        if deadlines:
+            conditions.append({'skip': min(deadlines) - self.samplenum})
+        pins = self.wait(conditions)
+        if idle and self.metrics:
+            self.metrics.advance(self.samplenum)
+
+        for i, sm in enumerate(self.state_machines):
+            next_min = int(math.ceil(sm.next_min))
+            if self.samplenum < next_min:
+                continue
+            bus = pins[self.channels[i]]
             if self.inverted_signal:
                 bus = 1 - bus
-
-            # Ignore spikes between expected signal parts
-            if self.samplenum < self.next_min:
-                continue
-
-            falling_edge = (self.last_bus == 1 and bus == 0)
-            self.last_bus = bus
-
-            # Wait until the next falling edge occurs
-            if not falling_edge and (self.next_max == 0 or self.samplenum < self.next_max):
-                continue
-
-            if self.state == 'BYTE_END':
-                # print("  samplenum={0}, falling_edge={1:1}, parity={2:1}".format(self.samplenum,
-                #                                                                  falling_edge, self.parity))
-                self.byte &= 0xff
-                self.checksum ^= self.byte
-                self.telegram.append(self.byte)
-                self.telegram_bytes += 1
-                out = None
-
-                if falling_edge:
-                    self.byte_end_sample = self.samplenum
-                else:
-                    self.byte_end_sample = self.start_sample + self.byte_samples
-
-                if not falling_edge:  # Timeout => end of transmission
-                    if self.telegram_bytes <= 1:
-                        if self.byte == 0xcc:
-                            self.putx(self.start_sample, self.byte_end_sample, self.rowid_label_ack, 'ACK')
-                            out = self.rowid_ack
-                        elif self.byte == 0x0c:
-                            self.putx(self.start_sample, self.byte_end_sample, self.rowid_label_ack, 'NAK')
-                            out = self.rowid_nack
-                        elif self.byte == 0xc0:
-                            self.putx(self.start_sample, self.byte_end_sample, self.rowid_label_ack, 'BUSY')
-                            out = self.rowid_busy
-                        elif self.byte == 0x00:
-                            self.putx(self.start_sample, self.byte_end_sample, self.rowid_label_ack, 'BUSY_NAK')
-                            out = self.rowid_busy_nack
-                        else:
-                            self.putx(self.start_sample, self.byte_end_sample, self.rowid_random_byte, 'Ignored')
-                            out = self.rowid_databyte
-                    else:
-                        if self.checksum != 0:
-                            self.putx(self.start_sample, self.byte_end_sample, self.rowid_checksum_error,
-                                      'Checksum Err')
-                        out = self.rowid_checksum
-
-                else:  # Not a timeout => another bit arrived
-                    out = self.rowid_databyte
-
-                if not self.parity:
-                    self.putx(self.start_sample, self.byte_end_sample, self.rowid_error, 'Parity Err')
-                    self.telegram_valid = False
-                    out = self.rowid_databyte
-
-                if out is not None:
-                    self.putx(self.start_sample, self.byte_end_sample, out, '{0:02x}'.format(self.byte))
-
-                if not falling_edge:  # Timeout => end of transmission
-                    # if self.end_sample > 0:
-                    #     wait = self.byte0_start_sample - self.end_sample
-                    #     if self.telegram_bytes == 1:
-                    #         if wait < self.ack_wait_samples_min:
-                    #             self.put_err_timing(wait - self.ack_wait_samples_min)
-                    #         elif wait > self.ack_wait_samples_max:
-                    #             self.put_err_timing(wait - self.ack_wait_samples_max)
-                    #     elif wait < self.tel_wait_samples_min:
-                    #         self.put_err_timing(wait - self.tel_wait_samples_min)
-
-                    if self.telegram_bytes >= 8:
-                        self.put_telegram(self.byte0_start_sample, self.byte_end_sample, self.telegram)
-
-                    self.next_min = 0
-                    self.next_max = 0
-                    self.state = 'IDLE'
-                    self.end_sample = self.byte_end_sample
-                    # print("  ** end of transmission")
-                    continue
-
-                self.state = 'START_BIT'
-
-            if self.state == 'IDLE':
-                self.state = 'START_BIT'
-                self.checksum = 0xff
-                self.telegram = []
-                self.telegram_bytes = 0
-                self.telegram_valid = True
-                self.byte0_start_sample = self.samplenum
-
-            if self.state == 'START_BIT' and falling_edge:
-                self.byte = 0
-                self.mask = 1
-                self.parity = True
-                self.state = 'BYTE'
-                self.start_sample = self.samplenum
-                self.next_min = self.start_sample + self.bit_samples + self.bit_offs_min
-                self.next_max = self.start_sample + self.bit_samples + self.bit_offs_max
-                # print("Start bit at {0}us".format(int(self.start_sample / self.samples_per_usec)))
-                continue
-
-            if self.state == 'BYTE':
-                if not falling_edge:
-                    self.byte |= self.mask
-                    self.parity = not self.parity
-
-                # print("  at +{0}us, falling_edge={1:1}, parity={2:1}, mask=0x{3:x},"
-                #    .format(int((self.samplenum - self.start_sample) / self.samples_per_usec),
-                #     falling_edge, self.parity, self.mask))
-
-                if self.mask < 0x100:
-                    self.mask <<= 1
-                    self.next_min += self.bit_samples
-                    self.next_max += self.bit_samples
-                else:
-                    self.state = 'BYTE_END'
-                    self.next_min = self.start_sample + self.byte_samples_min
-                    self.next_max = self.start_sample + self.byte_samples_max
-                continue
+            if self.samplenum == next_min:
+                # Compare against the last bus level seen before the skipped samples
+                falling_edge = (sm.last_bus == 1 and bus == 0)
+            else:
+                falling_edge = self.matched[i]
+            sm.last_bus = bus
+            if falling_edge or (sm.next_max != 0 and self.samplenum >= sm.next_max):
+                if falling_edge and i == 0 and self.metrics:
+                    offset = sm.bit_offset(self.samplenum)
+                    if offset is not None:
+                        self.metrics.bit_edge(offset)
+                sm.event(self.samplenum, falling_edge)
 
     #
     # Output an annotation
@@ -338,216 +288,125 @@ class Decoder(srd.Decoder):
         self.put(ss, es, self.out_ann, [rowid, [msg]])
 
     #
-    # Output the telegram
+    # Output a byte or telegram of the state machine
     #
-    def put_telegram(self, ss, es, telegram):
+    def put_record(self, record):
+        if self.metrics:
+            self.metrics.record(record)
+        self.output_rx(record)
+        if self.echo_check and not isinstance(record, Telegram):
+            self.echo_check.rx(record)
 
-        from_addr = str(telegram[1] >> 4) + "." + str(telegram[1] & 15) + "." + str(telegram[2])
-        details = ''
-
-        if telegram[5] & 128 == 0:
-            dest_addr = str(telegram[3] >> 4) + "." + str(telegram[3] & 15) + "." + str(telegram[4])
-            dest_is_group_addr = False
+    #
+    # Output the annotations and Python output of a byte or telegram
+    #
+    def output_record(self, record):
+        if isinstance(record, Telegram):
+            if self.show_frames:
+                self.put_telegram(record.ss, record.es, record.data)
+            self.put(record.ss, record.es, self.out_python, ['TELEGRAM', telegram_frame(record)])
+            self.put(record.ss, record.es, self.out_binary, [0, pack_telegram(record)])
         else:
-            dest_addr = str(telegram[3] >> 4) + "/" + str(telegram[3] & 15) + "/" + str(telegram[4])
-            dest_is_group_addr = True
+            self.put_byte(record)
+            if record.kind in self.ack_labels:
+                self.put(record.ss, record.es, self.out_python, ['ACK', record])
+                self.put(record.ss, record.es, self.out_binary, [0, pack_ack(record)])
+
+    #
+    # Output a byte or telegram of the TX line
+    #
+    def put_tx_record(self, record):
+        self.output_tx(record)
+        if not isinstance(record, Telegram):
+            self.echo_check.tx(record)
 
-        use_apcf = False
-        use_seq = False
-        use_6bit_data = False
+    #
+    # Output the annotations and Python output of a byte or telegram of the TX line
+    #
+    def output_tx_record(self, record):
+        ss, es = record.ss, record.es
+        if isinstance(record, Telegram):
+            if self.show_frames:
+                self.putx(ss, es, self.rowid_tx_label, telegram_message(record.data))
+            self.put(ss, es, self.out_python, ['TX-TELEGRAM', telegram_frame(record)])
+            self.put(ss, es, self.out_binary, [0, pack_telegram(record, FLAG_TX)])
+            return
+
+        if record.kind in self.ack_labels:
+            if self.show_frames:
+                self.putx(ss, es, self.rowid_tx_label, self.ack_labels[record.kind][0])
+            self.put(ss, es, self.out_python, ['TX-ACK', record])
+            self.put(ss, es, self.out_binary, [0, pack_ack(record, FLAG_TX)])
+        if not record.parity_ok and self.show_errors:
+            self.putx(ss, es, self.rowid_error, 'TX Parity Err')
+        if self.show_bytes:
+            self.putx(ss, es, self.rowid_tx_byte, '{0:02x}'.format(record.value))
+
+    #
+    # Output the metrics of a second or a timing error
+    #
+    def put_metrics(self, record):
+        if isinstance(record, TimingError):
+            if self.show_errors:
+                usec = record.deviation / self.timings.samples_per_usec
+                self.putx(record.ss, record.es, self.rowid_error_timing, 'Gap {0:+.0f}us'.format(usec))
+            self.put(record.ss, record.es, self.out_python, ['TIMING-ERROR', record])
+            return
+
+        load = 'Load {0:.1f}%'.format(record.load)
+        jitter = ' '.join('{0:+d}:{1}'.format(usec, count) for usec, count in sorted(record.jitter.items()))
+        texts = ['{0}, {1} telegrams/s, {2} ACKs/s, {3} gap errors, jitter [us] {4}'
+                 .format(load, record.telegrams, record.acks, record.gap_errors, jitter or '-'),
+                 '{0}, {1} telegrams/s'.format(load, record.telegrams), load]
+        self.put(record.ss, record.es, self.out_ann, [self.rowid_metrics, texts])
+        self.put(record.ss, record.es, self.out_python, ['METRICS', record])
 
-        if dest_is_group_addr:
-            details = 'Group'
-            use_apcf = True
+    #
+    # Output a difference between a sent byte and its echo on the bus
+    #
+    def put_echo_error(self, kind, tx, rx):
+        if not self.show_errors:
+            return
+        if kind == 'no-echo':
+            self.putx(tx.ss, tx.es, self.rowid_echo_mismatch, 'No echo of {0:02x}'.format(tx.value))
+        elif kind == 'collision':
+            self.putx(tx.ss, tx.es, self.rowid_collision,
+                      'Collision: sent {0:02x}, bus {1:02x}'.format(tx.value, rx.value))
         else:
-            tpcf = telegram[6] & 0xc3   # The transport control field
-
-            if tpcf == 0x80:            # T_Connect
-                details = 'T_Connect'
-            elif tpcf == 0x81:          # T_Disconnect
-                details = 'T_Disconnect'
-            elif tpcf == 0xc2:          # T_ACK
-                details = 'T_ACK'
-                use_seq = True
-            elif tpcf == 0xc3:          # T_NAK
-                details = 'T_NAK'
-                use_seq = True
-            elif tpcf & 0xc0 == 0x40:   # A connected data transfer
-                details = ''
-                use_seq = True
-                use_apcf = True
-            elif tpcf & 0xc0 == 0:      # An individual data transfer
-                details = 'Individual'
-                use_apcf = True
-
-        details += ' '
-        data = ''
-
-        if use_apcf:
-            apcf = ((telegram[6] & 3) << 8) | telegram[7]  # The application control field (10 bits)
-            apcf_group = apcf >> 6
-            apcf_type = apcf & 0x3f
-
-            if apcf == 0:
-                details += 'Value_Read'
-            elif apcf_group == 0x1:
-                details += 'Value_Response'
-                data = self.telegram_group_value_data(telegram)
-            elif apcf_group == 0x2:
-                details += 'Value_Write'
-                data = self.telegram_group_value_data(telegram)
-
-            elif apcf_group == 0x3:
-                details += 'Individual_Addr_Write'
-            elif apcf_group == 0x4:
-                details += 'Individual_Addr_Read'
-            elif apcf_group == 0x5:
-                details += 'Individual_Addr_Response'
-
-            elif apcf_group == 0x6:
-                details += 'ADC_Read'
-                use_6bit_data = True
-            elif apcf_group == 0x7:
-                details += 'ADC_Response'
-                use_6bit_data = True
-
-            elif apcf_group == 0x8:
-                details += 'Mem_Read'
-            elif apcf_group == 0x9:
-                details += 'Mem_Response'
-            elif apcf_group == 0xa:
-                details += 'Mem_Write'
-
-            elif apcf_group == 0xb:
-                if apcf_type == 0:
-                    details += 'UserMem_Read'
-                elif apcf_type == 1:
-                    details += 'UserMem_Response'
-                elif apcf_type == 2:
-                    details += 'UserMem_Write'
-                elif apcf_type == 4:
-                    details += 'UserMemBit_Write'
-                elif apcf_type == 5:
-                    details += 'UserManufacturerInfo_Read'
-                elif apcf_type == 6:
-                    details += 'UserManufacturerInfo_Response'
-                elif apcf_type == 7:
-                    details += 'FunctionProperty_Command'
-                elif apcf_type == 8:
-                    details += 'FunctionPropertyState_Read'
-                elif apcf_type == 9:
-                    details += 'FunctionPropertyState_Response'
-                elif 0xa <= apcf_type < 0x38:
-                    details += 'USERMSG'
-                elif 0x38 <= apcf_type < 0x3f:
-                    details += 'Manufacturer specific USERMSG'
-                elif apcf_type == 0x3f:
-                    details += 'Reserved_0x3f'
-
-            elif apcf_group == 0xc:
-                details += 'DeviceDescriptor_Read'
-            elif apcf_group == 0xd:
-                details += 'DeviceDescriptor_Response'
-            elif apcf_group == 0xe:
-                details += 'Restart'
+            self.putx(tx.ss, tx.es, self.rowid_echo_mismatch,
+                      'Echo mismatch: sent {0:02x}, bus {1:02x}'.format(tx.value, rx.value))
 
-            else:
-                if apcf_type <= 0x0f:
-                    details += 'Coupler specific'
-                elif apcf_type == 0x10:
-                    details += 'MemoryBit_Write'
-
-                elif apcf_type == 0x11:
-                    details += 'Authorize_Request'
-                elif apcf_type == 0x12:
-                    details += 'Authorize_Response'
-                elif apcf_type == 0x13:
-                    details += 'Key_Write'
-                elif apcf_type == 0x14:
-                    details += 'Key_Response'
-
-                elif apcf_type == 0x15:
-                    details += 'PropertyValue_Read'
-                elif apcf_type == 0x16:
-                    details += 'PropertyValue_Response'
-                elif apcf_type == 0x17:
-                    details += 'PropertyValue_Write'
-                elif apcf_type == 0x18:
-                    details += 'PropertyDescr_Read'
-                elif apcf_type == 0x19:
-                    details += 'PropertyDescr_Response'
-
-                elif apcf_type == 0x1a:
-                    details += 'NetworkParam_Read'
-                elif apcf_type == 0x1b:
-                    details += 'NetworkParam_Response'
-
-                elif apcf_type == 0x1c:
-                    details += 'IndividualAddrSerialNumber_Read'
-                elif apcf_type == 0x1d:
-                    details += 'IndividualAddrSerialNumber_Response'
-                elif apcf_type == 0x1e:
-                    details += 'IndividualAddrSerialNumber_Write'
-
-                elif apcf_type == 0x20:
-                    details += 'DomainAddr_Write'
-                elif apcf_type == 0x21:
-                    details += 'DomainAddr_Read'
-                elif apcf_type == 0x22:
-                    details += 'DomainAddr_Response'
-                elif apcf_type == 0x23:
-                    details += 'DomainAddrSelective_Read'
-
-                elif apcf_type == 0x24:
-                    details += 'NetworkParam_Write'
-
-                elif apcf_type == 0x25:
-                    details += 'Link_Read'
-                elif apcf_type == 0x26:
-                    details += 'Link_Response'
-                elif apcf_type == 0x27:
-                    details += 'Link_Write'
-
-                elif apcf_type == 0x28:
-                    details += 'GroupPropValue_Read'
-                elif apcf_type == 0x29:
-                    details += 'GroupPropValue_Response'
-                elif apcf_type == 0x2a:
-                    details += 'GroupPropValue_Write'
-                elif apcf_type == 0x2b:
-                    details += 'GroupPropValue_InfoReport'
-
-                elif apcf_type == 0x2c:
-                    details += 'DomainAddrSerialNumber_Read'
-                elif apcf_type == 0x2d:
-                    details += 'DomainAddrSerialNumber_Response'
-                elif apcf_type == 0x2e:
-                    details += 'DomainAddrSerialNumber_Write'
-
-                else:
-                    details += 'ACPF_{0:x}'.format(apcf)
-
-        details = details.strip()
-
-        if use_seq:  # Add the transport sequence
-            details += ' (S={0})'.format((telegram[6] >> 2) & 15)
-
-        if data == '':
-            if use_6bit_data:
-                data = '%02x: ' % (telegram[7] & 0x3f)
-            if len(telegram) > 8:
-                data += ''.join(' %02x' % x for x in telegram[8:-1])
-
-        if data != '':
-            details += ': ' + data.strip()
-
-        msg = '{0} to {1}: {2}'.format(from_addr, dest_addr, details)
-        self.put(ss, es, self.out_ann, [self.rowid_label, [msg]])
+    #
+    # Output a byte
+    #
+    def put_byte(self, byte):
+        ss, es = byte.ss, byte.es
+
+        if byte.kind in self.ack_labels:
+            label, out = self.ack_labels[byte.kind]
+            if self.show_frames:
+                self.putx(ss, es, self.rowid_label_ack, label)
+        elif byte.kind == 'random':
+            if self.show_errors:
+                self.putx(ss, es, self.rowid_random_byte, 'Ignored')
+            out = self.rowid_databyte
+        elif byte.kind == 'data':
+            out = self.rowid_databyte
+        else:
+            if byte.kind == 'bad-checksum' and self.show_errors:
+                self.putx(ss, es, self.rowid_checksum_error, 'Checksum Err')
+            out = self.rowid_checksum
+
+        if not byte.parity_ok:
+            if self.show_errors:
+                self.putx(ss, es, self.rowid_error, 'Parity Err')
+            out = self.rowid_databyte
+
+        if self.show_bytes:
+            self.putx(ss, es, out, '{0:02x}'.format(byte.value))
 
     #
-    # Get the data of a group value write/response as hex string
+    # Output the telegram
     #
-    def telegram_group_value_data(self, telegram):
-        if len(telegram) > 8:
-            return '%x' % (telegram[7] & 0x3f)
-        return '%x' % (telegram[7] & 0x3f) + ''.join(' %02x' % x for x in telegram[8:-1])
+    def put_telegram(self, ss, es, telegram):
+        self.put(ss, es, self.out_ann, [self.rowid_label, [telegram_message(telegram)]])
@@ -0,0 +1,29 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+"""
+This decoder stacks on top of the 'knx' PD and shows the values of group
+telegrams according to the datapoint types of an ETS project (.knxproj).
+
+The group addresses and their datapoint types are read from the project once
+and cached on disk (by default next to the project file), so later runs start
+quickly. Building the cache needs lxml and the test-case-generator of this
+repository.
+"""
+
+from .pd import Decoder
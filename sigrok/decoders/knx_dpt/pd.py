@@ -0,0 +1,82 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+import sigrokdecode as srd
+from common.knxhelper import GROUP_ADDRESSES
+from common.knxhelper.dpt import load_index
+
+
+class Decoder(srd.Decoder):
+    api_version = 3
+    id = 'knx_dpt'
+    name = 'KNX DPT'
+    longname = 'KNX datapoint types'
+    desc = 'KNX group values decoded by the datapoint types of an ETS project.'
+    license = 'gplv2+'
+    inputs = ['knx']
+    outputs = []
+    tags = ['Automation']
+    options = (
+        {'id': 'knxproj', 'desc': 'ETS project file (.knxproj)', 'default': ''},
+        {'id': 'cache', 'desc': 'Cache file of the datapoint types (default: next to the project)',
+                        'default': ''},
+    )
+
+    annotations = (
+        ('value', 'Group value'),                                  # 0
+        ('unknown', 'Group value without datapoint type'),         # 1
+    )
+
+    # these must match order of above annotations
+    rowid_value = 0
+    rowid_unknown = 1
+
+    annotation_rows = (
+         ('id-values', 'Values', (rowid_value, rowid_unknown)),
+    )
+
+    def __init__(self, **kwargs):
+        # Constructor
+        self.index = None
+
+    def start(self):
+        self.out_ann = self.register(srd.OUTPUT_ANN)
+        if not self.options['knxproj']:
+            raise Exception("Cannot decode without ETS project file (option knxproj).")
+        self.index = load_index(self.options['knxproj'], self.options['cache'])
+
+    #
+    # Decode a telegram of the knx decoder
+    #
+    def decode(self, ss, es, data):
+        ptype, frame = data
+        # Only group value responses (APCI 0x040) and writes (APCI 0x080)
+        if ptype != 'TELEGRAM' or not frame.group or frame.apci is None or frame.apci >> 6 not in (1, 2):
+            return
+
+        address = GROUP_ADDRESSES[frame.dst]
+        entry = self.index.get(frame.dst)
+        text = entry and entry[1].format(frame)
+        if text is None:
+            raw = frame.payload.hex() if frame.payload else '{0:x}'.format(frame.apci & 0x3f)
+            self.put(ss, es, self.out_ann, [self.rowid_unknown, [address + ': ' + raw]])
+            return
+
+        name, info = entry
+        self.put(ss, es, self.out_ann, [self.rowid_value, ['{0} {1}: {2}'.format(address, name, text),
+                                                         '{0}: {1}'.format(address, text), text]])
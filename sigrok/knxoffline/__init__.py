@@ -0,0 +1,31 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+"""
+Offline decoding of KNX/EIB logic captures without libsigrokdecode.
+
+The bit timings and the telegram formatting are shared with the protocol
+decoders, they are imported from decoders/common/knxhelper.
+"""
+
+import os
+import sys
+
+_decoders_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'decoders')
+if _decoders_dir not in sys.path:
+    sys.path.append(_decoders_dir)
@@ -0,0 +1,232 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# Throughput benchmarks of the protocol decoders
+#
+# Runs the knx and eib decoders with the libsigrokdecode stand-in
+# (harness.py) on synthetic captures (synth.py) of a busy and a mostly idle
+# bus at several samplerates and reports the samples and telegrams decoded
+# per second and the peak memory. The speed is compared with a stored
+# baseline, the benchmark fails if a decoder got slower than the baseline by
+# more than the tolerance. The speed of a (virtual) machine can change by tens
+# of percent for minutes, so the decoding time is compared relative to a fixed
+# calibration loop that runs before every run.
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from . import harness
+from .engine import parse_samplerate
+from .synth import random_telegrams, synthesize
+
+DECODERS = ('knx', 'eib')
+
+SAMPLERATES = (1000000, 4000000, 16000000, 100000000)
+
+# The corpora: number of telegrams and options of the synthesizer. The decoding
+# time depends on the number of telegrams, not on the samplerate; the corpora
+# are large enough that one run takes more than 400 msec, so that the timing
+# noise stays small compared to the tolerance. At 100 MHz the idle corpus
+# takes 1.3 GB of memory.
+PROFILES = {
+    # Back to back telegrams, each with ACK, about 8.6 sec
+    'busy': (400, dict(gap_bits=50)),
+    # Long random gaps between the telegrams, about 12.9 sec
+    'idle': (200, dict(gap_bits=(150, 750))),
+}
+
+# Seed of the random telegrams and gaps, the corpora are the same on every run
+SEED = 1
+
+# The benchmarks are repeated until they ran at least MIN_RUNS times and
+# MIN_SECONDS in total, the best run counts
+MIN_SECONDS = 5.0
+MIN_RUNS = 5
+
+# A benchmark that is slower than the baseline is repeated up to this many times
+RECHECKS = 3
+
+# Iterations of the calibration loop, about 20 msec
+CALIBRATION_LOOPS = 200000
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+
+def corpus(profile, samplerate):
+    """The samples and the number of telegrams of a profile."""
+    count, options = PROFILES[profile]
+    return synthesize(random_telegrams(count, SEED), samplerate, seed=SEED, **options), count
+
+
+def session(decoder_class, samples, samplerate):
+    """A new harness session with the samples on the first channel of the decoder."""
+    channels = [samples] + [None] * (len(decoder_class.channels) + len(decoder_class.optional_channels) - 1)
+    return harness.Session(decoder_class, channels, samplerate)
+
+
+def calibrate():
+    """The seconds of a fixed pure Python loop, a measure of the current speed of the machine."""
+    start = time.perf_counter()
+    total = 0
+    for i in range(CALIBRATION_LOOPS):
+        total += i & 0xff
+    return time.perf_counter() - start
+
+
+def run_once(decoder_class, samples, samplerate):
+    """Decode the samples once, returns the seconds."""
+    s = session(decoder_class, samples, samplerate)
+    start = time.perf_counter()
+    s.run()
+    return time.perf_counter() - start
+
+
+def peak_memory(decoder_class, samples, samplerate):
+    """The peak memory in bytes that is allocated by the decoder while decoding the samples."""
+    s = session(decoder_class, samples, samplerate)
+    tracemalloc.start()
+    try:
+        s.run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(decoder, profile, samplerate, memory=True, target=None):
+    """
+    The result of one benchmark as dict.
+
+    The best run counts, relative_time is its time in units of the best
+    calibration loop. If the relative time is above target, the runs are
+    repeated (RECHECKS).
+    """
+    decoder_class = harness.load_decoder(decoder)
+    samples, telegrams = corpus(profile, samplerate)
+    times = []
+    units = []
+    for _ in range(1 + RECHECKS):
+        runs = []
+        while len(runs) < MIN_RUNS or sum(runs) < MIN_SECONDS:
+            units.append(calibrate())
+            runs.append(run_once(decoder_class, samples, samplerate))
+        times.extend(runs)
+        if target is None or min(times) / min(units) <= target:
+            break
+    seconds = min(times)
+    return {
+        'samples': len(samples),
+        'telegrams': telegrams,
+        'seconds': seconds,
+        'relative_time': seconds / min(units),
+        'samples_per_second': len(samples) / seconds,
+        'telegrams_per_second': telegrams / seconds,
+        'peak_memory': peak_memory(decoder_class, samples, samplerate) if memory else None,
+    }
+
+
+def baseline_problem(stored, result):
+    """Why a stored baseline cannot be compared with the result of a benchmark, None if it can."""
+    if stored is None:
+        return 'missing'
+    # Baselines without the relative time (before the calibration) are not comparable
+    if 'relative_time' not in stored:
+        return 'no relative_time'
+    # The corpus was changed (PROFILES or the synthesizer)
+    if (stored.get('samples'), stored.get('telegrams')) != (result['samples'], result['telegrams']):
+        return 'corpus of {0} samples and {1} telegrams, now {2} and {3}'.format(
+            stored.get('samples'), stored.get('telegrams'), result['samples'], result['telegrams'])
+    return None
+
+
+def case_name(decoder, profile, samplerate):
+    return '{0}/{1}/{2:g}MHz'.format(decoder, profile, samplerate / 1000000.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the throughput of the KNX protocol decoders.')
+    parser.add_argument('-d', '--decoders', nargs='+', choices=DECODERS, default=DECODERS, help='decoders')
+    parser.add_argument('-p', '--profiles', nargs='+', choices=sorted(PROFILES), default=sorted(PROFILES),
+                        help='bus profiles')
+    parser.add_argument('-r', '--samplerates', nargs='+', type=parse_samplerate, default=SAMPLERATES,
+                        help='samplerates, e.g. 1M 100M')
+    parser.add_argument('-b', '--baseline', default=BASELINE, help='baseline file (JSON)')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.3,
+                        help='allowed loss of speed against the baseline, 0.3 = 30%%')
+    parser.add_argument('-s', '--save-baseline', action='store_true', help='store the results as new baseline')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory measurement')
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print('{0:24} {1:>10} {2:>6} {3:>13} {4:>12} {5:>9} {6:>9}'.format(
+        'benchmark', 'samples', 'tel.', 'Msamples/s', 'telegrams/s', 'peak KiB', 'baseline'))
+    results = {}
+    regressions = []
+    unusable = []
+    for decoder in args.decoders:
+        for profile in args.profiles:
+            for samplerate in args.samplerates:
+                name = case_name(decoder, profile, samplerate)
+                stored = baseline.get(name, {})
+                target = None
+                if 'relative_time' in stored and not args.save_baseline:
+                    target = stored['relative_time'] / (1 - args.tolerance)
+                result = results[name] = benchmark(decoder, profile, samplerate, not args.no_memory, target)
+                problem = baseline_problem(baseline.get(name), result)
+                if problem is None:
+                    factor = stored['relative_time'] / result['relative_time']
+                    ratio = '{0:.0%}'.format(factor)
+                    if factor < 1 - args.tolerance:
+                        regressions.append(name)
+                        ratio += ' !'
+                else:
+                    ratio = 'none'
+                    unusable.append('{0} ({1})'.format(name, problem))
+                memory = result['peak_memory']
+                print('{0:24} {1:10d} {2:6d} {3:13.2f} {4:12.1f} {5:>9} {6:>9}'.format(
+                    name, result['samples'], result['telegrams'], result['samples_per_second'] / 1e6,
+                    result['telegrams_per_second'], '-' if memory is None else '{0:.0f}'.format(memory / 1024.0),
+                    ratio))
+                sys.stdout.flush()
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        return
+    # A benchmark without comparable baseline fails, otherwise an outdated baseline would disable the gate
+    if unusable:
+        print('No usable baseline in {0}, store one with --save-baseline:'.format(args.baseline))
+        for problem in unusable:
+            print('  ' + problem)
+    if regressions:
+        print('Slower than the baseline: ' + ', '.join(regressions))
+    if unusable or regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# KNX/EIB offline decoding engine based on NumPy
+#
+# The engine produces the same bytes, acknowledges and telegrams as the knx
+# protocol decoder (decoders/knx/pd.py) with the same bit timings, but it works
+# on the falling edges of the whole capture instead of sample by sample:
+#
+# - the falling edges are found with vectorized NumPy operations, block by
+#   block, so that a memory-mapped capture is never loaded into RAM at once
+# - the 9 bit windows (8 data bits + parity) of a byte only depend on the
+#   sample of its start bit, so they are sampled for a whole batch of start
+#   bit candidates at once
+# - only the byte and telegram framing runs in plain Python
+
+import argparse
+import math
+import os
+import re
+
+import numpy as np
+
+from common.knxhelper import ACK_KINDS, TIMINGS, BitTimings, Byte, Telegram, telegram_message
+
+# Number of samples that are scanned for falling edges at once
+BLOCK_SAMPLES = 1 << 24
+
+# Number of start bit candidates that are sampled at once
+BATCH_BYTES = 1 << 14
+
+def parse_samplerate(value):
+    """
+    Convert a samplerate like '200 kHz' (sigrok metadata), '1M' or '1000000' into Hz.
+    """
+    match = re.match(r'^\s*([0-9.]+)\s*([kMG]?)(Hz)?\s*$', str(value))
+    if not match:
+        raise ValueError('Invalid samplerate: {0}'.format(value))
+    factor = {'': 1, 'k': 1000, 'M': 1000000, 'G': 1000000000}[match.group(2)]
+    return int(float(match.group(1)) * factor)
+
+
+class Engine:
+    """
+    Decode the KNX bus line of a logic capture.
+
+    samples is a numpy array (or np.memmap) of raw sigrok logic data, either
+    one dimensional with one byte per sample or with shape (samples, unitsize).
+    channel is the number of the logic channel of the bus line.
+    """
+
+    def __init__(self, samples, samplerate, channel=0, timings='default', inverted_signal=False):
+        if samples.ndim == 1:
+            samples = samples.reshape(-1, 1)
+        self.samples = samples[:, channel // 8]
+        self.bit = channel % 8
+        self.inverted_signal = 1 if inverted_signal else 0
+        self.num_samples = len(self.samples)
+        self.timings = BitTimings(samplerate, timings)
+        self.edges = self.falling_edges()
+        # The edges with a sentinel, to look up the edge after the last one
+        self.edges_padded = np.append(self.edges, np.iinfo(np.int64).max)
+        self.batch_first = 0
+        self.batch_end = 0
+        self.batch = None
+
+    def level(self, samplenum):
+        """The (not inverted) bus level at the given sample number(s)."""
+        samplenum = np.minimum(samplenum, self.num_samples - 1)
+        return ((self.samples[samplenum] >> self.bit) & 1) ^ self.inverted_signal
+
+    def falling_edges(self):
+        """The sample numbers of all falling edges of the bus."""
+        edges = []
+        for start in range(0, self.num_samples, BLOCK_SAMPLES):
+            first = max(start - 1, 0)
+            bus = ((self.samples[first:start + BLOCK_SAMPLES] >> self.bit) & 1) ^ self.inverted_signal
+            edges.append(np.flatnonzero(bus[:-1] > bus[1:]) + first + 1)
+        if not edges:
+            return np.zeros(0, np.int64)
+        return np.concatenate(edges).astype(np.int64)
+
+    def sample_bytes(self, starts):
+        """
+        Sample the data and parity bits of the bytes with the given start bit samples.
+
+        Returns the byte values, whether the parity is ok and the bus level
+        after the parity bit, the same way the protocol decoder samples them:
+        a bit is 0 if there is a falling edge between next_min and next_max
+        of its bit window, otherwise it is 1.
+        """
+        t = self.timings
+        offsets = np.arange(1, 10) * t.bit_samples
+        next_min = starts[:, None] + offsets + t.bit_offs_min
+        next_max = starts[:, None] + offsets + t.bit_offs_max
+        # First falling edge after the first sample of each window
+        edge = self.edges_padded[np.searchsorted(self.edges, next_min, side='right')]
+        has_edge = edge <= next_max
+        level_min = self.level(next_min)
+        level_max = self.level(next_max)
+
+        # The bus is low at the start bit
+        last_bus = np.zeros(len(starts), np.uint8)
+        ones = np.zeros((len(starts), 9), bool)
+        for i in range(9):
+            # The first sample of a window is compared with the last sample
+            # that was looked at, the samples in between are skipped
+            falling_edge = ((last_bus == 1) & (level_min[:, i] == 0)) | has_edge[:, i]
+            ones[:, i] = ~falling_edge
+            last_bus = np.where(falling_edge, 0, level_max[:, i])
+
+        values = (ones[:, :8] * (1 << np.arange(8))).sum(axis=1)
+        parity_ok = ones.sum(axis=1) % 2 == 0
+        return values, parity_ok, last_bus
+
+    def byte(self, start):
+        """The value, parity state and last bus level of the byte starting at the given sample."""
+        i = int(np.searchsorted(self.edges, start))
+        if i < len(self.edges) and self.edges[i] == start:
+            if not self.batch_first <= i < self.batch_end:
+                self.batch_first = i
+                self.batch_end = min(i + BATCH_BYTES, len(self.edges))
+                self.batch = self.sample_bytes(self.edges[self.batch_first:self.batch_end])
+            i -= self.batch_first
+            values, parity_ok, last_bus = self.batch
+        else:
+            # The start bit was detected at the begin of a window, not at an edge
+            values, parity_ok, last_bus = self.sample_bytes(np.array([start], np.int64))
+            i = 0
+        return int(values[i]), bool(parity_ok[i]), int(last_bus[i])
+
+    def next_edge(self, samplenum):
+        """The first falling edge after the given sample number."""
+        return int(self.edges_padded[np.searchsorted(self.edges, samplenum, side='right')])
+
+    def decode(self):
+        """Generate the Byte and Telegram records of the capture in sample order."""
+        t = self.timings
+        start = self.next_edge(-1)
+        while start < self.num_samples:
+            # A new transmission starts with this start bit
+            byte0_start_sample = start
+            telegram = []
+            checksum = 0xff
+            parity_ok = True
+
+            while True:
+                byte, byte_parity_ok, last_bus = self.byte(start)
+
+                # Wait for the start bit of the next byte
+                next_min = int(math.ceil(start + t.byte_samples_min))
+                next_max = int(math.ceil(start + t.byte_samples_max))
+                if next_min >= self.num_samples:
+                    return
+                edge = self.next_edge(next_min)
+                if last_bus == 1 and self.level(next_min) == 0:
+                    falling_edge, end = True, next_min
+                elif edge <= next_max:
+                    falling_edge, end = True, edge
+                elif next_max >= self.num_samples:
+                    return
+                else:
+                    falling_edge, end = False, next_max
+
+                checksum ^= byte
+                telegram.append(byte)
+                parity_ok = parity_ok and byte_parity_ok
+
+                if falling_edge:
+                    yield Byte(start, end, byte, 'data', byte_parity_ok)
+                    start = end
+                    continue
+
+                # Timeout => end of transmission
+                byte_end_sample = start + t.byte_samples
+                if len(telegram) <= 1:
+                    kind = ACK_KINDS.get(byte, 'random')
+                elif checksum == 0:
+                    kind = 'checksum'
+                else:
+                    kind = 'bad-checksum'
+                yield Byte(start, byte_end_sample, byte, kind, byte_parity_ok)
+
+                if len(telegram) >= 8:
+                    yield Telegram(byte0_start_sample, byte_end_sample, bytes(telegram), checksum == 0, parity_ok)
+                start = self.next_edge(end)
+                break
+
+
+def open_dump(file_name, unitsize=1):
+    """Memory-map a raw logic dump (e.g. written by sigrok-cli -O binary) as array of shape (samples, unitsize)."""
+    # An empty file cannot be memory-mapped
+    if os.path.getsize(file_name) == 0:
+        return np.zeros((0, unitsize), np.uint8)
+    samples = np.memmap(file_name, dtype=np.uint8, mode='r')
+    return samples[:len(samples) - len(samples) % unitsize].reshape(-1, unitsize)
+
+
+def decode_file(file_name, samplerate, unitsize=1, channel=0, timings='default', inverted_signal=False):
+    """
+    Decode a raw logic dump.
+
+    The file is memory-mapped, so captures larger than the RAM can be decoded.
+    """
+    return Engine(open_dump(file_name, unitsize), samplerate, channel, timings, inverted_signal).decode()
+
+
+def format_record(record, samplerate):
+    """A line of text for a Byte or Telegram record."""
+    if isinstance(record, Telegram):
+        text = telegram_message(record.data)
+        if not record.checksum_ok:
+            text += ' (checksum error)'
+    else:
+        text = '{0:02x} {1}'.format(record.value, record.kind)
+    if not record.parity_ok:
+        text += ' (parity error)'
+    return '{0:12.6f} {1}'.format(record.ss / samplerate, text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Decode the KNX telegrams of a raw logic dump.')
+    parser.add_argument('file', help='raw logic data, e.g. from sigrok-cli -O binary')
+    parser.add_argument('-r', '--samplerate', required=True, type=parse_samplerate,
+                        help='samplerate of the capture, e.g. 1M or "200 kHz"')
+    parser.add_argument('-u', '--unitsize', type=int, default=1, help='bytes per sample')
+    parser.add_argument('-c', '--channel', type=int, default=0, help='logic channel of the bus line')
+    parser.add_argument('-t', '--timings', choices=TIMINGS, default='default', help='bit timings')
+    parser.add_argument('-i', '--inverted', action='store_true', help='inverted signal')
+    parser.add_argument('-b', '--bytes', action='store_true', help='show the bytes of the telegrams too')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of processes, 0: one per CPU core (split at idle gaps of the bus)')
+    args = parser.parse_args()
+
+    if args.jobs == 1:
+        records = decode_file(args.file, args.samplerate, args.unitsize, args.channel, args.timings, args.inverted)
+    else:
+        from .parallel import decode_parallel
+        records = decode_parallel(args.file, args.samplerate, args.unitsize, args.channel, args.timings,
+                                  args.inverted, args.jobs or None)
+
+    for record in records:
+        if args.bytes or isinstance(record, Telegram) or record.kind in ACK_KINDS.values():
+            print(format_record(record, args.samplerate))
+
+
+if __name__ == '__main__':
+    main()
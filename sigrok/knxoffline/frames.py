@@ -0,0 +1,62 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# Reader of the binary frame stream of the knx decoder
+#
+# sigrok-cli -i mycapture.sr -P knx:rx=RX -B knx=frames | python3 -m knxoffline.frames -r 1M
+#
+# The format is described in decoders/common/knxhelper/framestream.py.
+
+import argparse
+import sys
+
+from common.knxhelper import (ACK_KINDS, FLAG_ACK, FLAG_CHECKSUM_OK, FLAG_PARITY_OK, FLAG_TX, read_frames,
+                              telegram_message)
+from .engine import parse_samplerate
+
+
+def format_frame(frame, samplerate):
+    """A line of text for a StreamFrame."""
+    if frame.flags & FLAG_ACK:
+        text = '{0:02x} {1}'.format(frame.data[0], ACK_KINDS.get(frame.data[0], 'random'))
+    else:
+        text = telegram_message(frame.data)
+        if not frame.flags & FLAG_CHECKSUM_OK:
+            text += ' (checksum error)'
+    if not frame.flags & FLAG_PARITY_OK:
+        text += ' (parity error)'
+    if frame.flags & FLAG_TX:
+        text = 'TX ' + text
+    return '{0:12.6f} {1}'.format(frame.ss / samplerate, text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the frames of the binary output of the knx decoder.')
+    parser.add_argument('file', nargs='?', help='binary frame stream (default: stdin)')
+    parser.add_argument('-r', '--samplerate', required=True, type=parse_samplerate,
+                        help='samplerate of the capture, e.g. 1M or "200 kHz"')
+    args = parser.parse_args()
+
+    f = open(args.file, 'rb') if args.file else sys.stdin.buffer
+    with f:
+        for frame in read_frames(f):
+            print(format_frame(frame, args.samplerate))
+
+
+if __name__ == '__main__':
+    main()
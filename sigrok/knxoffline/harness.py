@@ -0,0 +1,186 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# Stand-in for the Python API of libsigrokdecode
+#
+# Runs the protocol decoders of this repository (decoders/*/pd.py) in plain
+# Python without libsigrokdecode, e.g. for the benchmarks (bench.py). The
+# decoders import this module as sigrokdecode after install(). Both decoder
+# API versions are supported: version 2 decoders get the samples in chunks
+# of (samplenum, pins) tuples, the wait() of version 3 decoders searches the
+# precomputed edges of the channels with NumPy. Only what the decoders of
+# this repository use is implemented.
+
+import importlib
+import sys
+
+import numpy as np
+
+OUTPUT_ANN = 0
+OUTPUT_PYTHON = 1
+OUTPUT_BINARY = 2
+OUTPUT_META = 3
+
+SRD_CONF_SAMPLERATE = 1
+
+# Number of samples that are passed to decode() of API version 2 decoders at once
+CHUNK_SAMPLES = 1 << 16
+
+
+def install():
+    """Make this module importable as sigrokdecode."""
+    sys.modules['sigrokdecode'] = sys.modules[__name__]
+
+
+def load_decoder(name):
+    """The Decoder class of the protocol decoder with the given id (directory name)."""
+    install()
+    return importlib.import_module(name).Decoder
+
+
+class Decoder:
+    """Base class of the protocol decoders, the calls are forwarded to the Session."""
+
+    api_version = 2
+    options = ()
+    channels = ()
+    optional_channels = ()
+
+    def register(self, output_type, **kwargs):
+        return output_type
+
+    def put(self, ss, es, output_id, data):
+        self.session.put(ss, es, output_id, data)
+
+    def has_channel(self, index):
+        return self.session.channels[index] is not None
+
+    def wait(self, conds=None):
+        return self.session.wait(conds)
+
+
+class Session:
+    """
+    Run a decoder on logic samples.
+
+    channels is a list with an array of 0/1 samples for every channel of the
+    decoder (channels and optional_channels) or None for channels that are
+    not connected. If put is given, it is called with (ss, es, output_id,
+    data) for every output of the decoder, otherwise the outputs are counted
+    per output type.
+    """
+
+    def __init__(self, decoder_class, channels, samplerate, options=None, put=None):
+        self.channels = list(channels)
+        self.num_samples = min(len(c) for c in self.channels if c is not None)
+        self.counts = {}
+        if put is not None:
+            self.put = put
+
+        self.edges = {}
+        for index, samples in enumerate(self.channels):
+            if samples is None:
+                continue
+            step = np.diff(samples.astype(np.int8))
+            self.edges[index, 'r'] = np.flatnonzero(step > 0) + 1
+            self.edges[index, 'f'] = np.flatnonzero(step < 0) + 1
+            self.edges[index, 'e'] = np.flatnonzero(step) + 1
+
+        self.decoder = decoder_class()
+        self.decoder.session = self
+        self.decoder.options = dict((o['id'], o['default']) for o in decoder_class.options)
+        self.decoder.options.update(options or {})
+        self.decoder.samplenum = 0
+        self.decoder.matched = None
+        self.first_wait = True
+        self.decoder.metadata(SRD_CONF_SAMPLERATE, samplerate)
+
+    def put(self, ss, es, output_id, data):
+        self.counts[output_id] = self.counts.get(output_id, 0) + 1
+
+    def run(self):
+        """Decode all samples."""
+        decoder = self.decoder
+        decoder.start()
+        if decoder.api_version == 2:
+            for ss in range(0, self.num_samples, CHUNK_SAMPLES):
+                es = min(ss + CHUNK_SAMPLES, self.num_samples)
+                pins = [self.channels[i][ss:es].tolist() if self.channels[i] is not None else [0xff] * (es - ss)
+                        for i in range(len(self.channels))]
+                decoder.decode(ss, es, zip(range(ss, es), zip(*pins)))
+        else:
+            try:
+                decoder.decode()
+            except EOFError:
+                pass
+
+    def level(self, channel, samplenum):
+        return int(self.channels[channel][samplenum])
+
+    def first_match(self, channel, kind, samplenum):
+        """The first sample from samplenum on where the channel condition is true, or None."""
+        if kind in 'lh':
+            level = 1 if kind == 'h' else 0
+            if samplenum < self.num_samples and self.level(channel, samplenum) == level:
+                return samplenum
+            kind = 'r' if level else 'f'
+        edges = self.edges[channel, kind]
+        i = np.searchsorted(edges, samplenum)
+        return int(edges[i]) if i < len(edges) else None
+
+    def matches(self, channel, kind, samplenum):
+        """Whether the channel condition is true at samplenum (samplenum > 0)."""
+        level = self.level(channel, samplenum)
+        if kind in 'lh':
+            return level == (1 if kind == 'h' else 0)
+        last = self.level(channel, samplenum - 1)
+        return last != level and (kind == 'e' or level == (1 if kind == 'r' else 0))
+
+    def first_sample(self, cond, samplenum):
+        """The first sample from samplenum on where all terms of the condition are true, or None."""
+        if 'skip' in cond:
+            return samplenum + cond['skip'] - 1
+        terms = list(cond.items())
+        while samplenum is not None and samplenum < self.num_samples:
+            samplenum = self.first_match(terms[0][0], terms[0][1], samplenum)
+            if samplenum is None or all(self.matches(ch, kind, samplenum) for ch, kind in terms[1:]):
+                return samplenum
+            samplenum += 1
+        return None
+
+    def wait(self, conds=None):
+        """Wait for the first of the conditions, like srd.Decoder.wait()."""
+        if not conds:
+            conds = [{'skip': 1}]
+        elif isinstance(conds, dict):
+            conds = [conds]
+        decoder = self.decoder
+        # Edges can only be found from the second sample on, a skip counts from the current sample
+        first = 0 if self.first_wait else decoder.samplenum + 1
+        self.first_wait = False
+
+        samples = [self.first_sample(cond, first if 'skip' not in cond else decoder.samplenum + 1) for cond in conds]
+        found = [s for s in samples if s is not None and s < self.num_samples]
+        if not found:
+            # End of the data, like libsigrokdecode the sample number is the last sample
+            decoder.samplenum = self.num_samples - 1
+            raise EOFError
+        samplenum = min(found)
+        decoder.samplenum = samplenum
+        decoder.matched = tuple(s == samplenum for s in samples)
+        return tuple(self.level(i, samplenum) if c is not None else 0xff for i, c in enumerate(self.channels))
@@ -0,0 +1,116 @@
+#
+# Copyright (C) 2013 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# Parallel KNX/EIB decoding of raw logic dumps
+#
+# The state machine of the decoder is idle again at the latest
+# byte_samples_max after the last falling edge of a transmission. A capture
+# can therefore be split wherever the bus is idle for longer than the minimum
+# gap between two telegrams (tel_wait_samples_min = 38 bit times): the parts
+# decode independently to the same bytes and telegrams as the whole capture.
+#
+# The capture is decoded in two passes, both spread over the worker
+# processes: the first one searches the idle gaps in equally sized slices of
+# the capture, the second one decodes the segments between the chosen gaps.
+
+import multiprocessing
+
+import numpy as np
+
+from common.knxhelper import BitTimings
+from .engine import Engine, open_dump
+
+# Number of segments per worker process, more segments balance the load better
+SEGMENTS_PER_PROCESS = 4
+
+
+def _scan_slice(args):
+    """The first and last falling edge of a slice and the edges after an idle gap."""
+    file_name, unitsize, channel, samplerate, timings, inverted_signal, first, end = args
+    # Start one sample early, so that a falling edge on the first sample of the slice is found
+    start = max(first - 1, 0)
+    samples = open_dump(file_name, unitsize)[start:end]
+    engine = Engine(samples, samplerate, channel, timings, inverted_signal)
+    edges = engine.edges + start
+    if not len(edges):
+        return None
+    gap = engine.timings.tel_wait_samples_min
+    return edges[0], edges[-1], edges[1:][np.diff(edges) > gap]
+
+
+def _decode_segment(args):
+    """The Byte and Telegram records of a segment with absolute sample numbers."""
+    file_name, unitsize, channel, samplerate, timings, inverted_signal, first, end = args
+    samples = open_dump(file_name, unitsize)[first:end]
+    engine = Engine(samples, samplerate, channel, timings, inverted_signal)
+    return [record._replace(ss=record.ss + first, es=record.es + first) for record in engine.decode()]
+
+
+def split_points(pool, file_name, unitsize, channel, samplerate, timings, inverted_signal, processes):
+    """The sample numbers at which the capture is split into segments."""
+    num_samples = len(open_dump(file_name, unitsize))
+    if num_samples == 0:
+        return []
+    size = -(-num_samples // processes)
+    slices = [(file_name, unitsize, channel, samplerate, timings, inverted_signal, first, first + size)
+              for first in range(0, num_samples, size)]
+
+    # The falling edges that follow an idle gap, including the gaps between the slices
+    gap = BitTimings(samplerate, timings).tel_wait_samples_min
+    candidates = []
+    last_edge = None
+    for result in pool.map(_scan_slice, slices):
+        if result is None:
+            continue
+        first_edge, end_edge, edges = result
+        if last_edge is not None and first_edge - last_edge > gap:
+            candidates.append([first_edge])
+        candidates.append(edges)
+        last_edge = end_edge
+    if not candidates:
+        return []
+    # Split one sample before the falling edge, so that the edge is seen by the segment
+    candidates = np.concatenate(candidates) - 1
+
+    # Pick the candidates that are closest to equally sized segments
+    count = processes * SEGMENTS_PER_PROCESS
+    targets = np.arange(1, count) * (num_samples / count)
+    index = np.clip(np.searchsorted(candidates, targets), 0, len(candidates) - 1)
+    return sorted(set(int(p) for p in candidates[index]))
+
+
+def decode_parallel(file_name, samplerate, unitsize=1, channel=0, timings='default', inverted_signal=False,
+                    processes=None):
+    """
+    Decode a raw logic dump with several processes.
+
+    Generates the same Byte and Telegram records in the same order as
+    engine.decode_file().
+    """
+    processes = processes or multiprocessing.cpu_count()
+    num_samples = len(open_dump(file_name, unitsize))
+    with multiprocessing.Pool(processes) as pool:
+        points = split_points(pool, file_name, unitsize, channel, samplerate, timings, inverted_signal,
+                              processes)
+        bounds = [0] + points + [num_samples]
+        segments = [(file_name, unitsize, channel, samplerate, timings, inverted_signal, first, end)
+                    for first, end in zip(bounds, bounds[1:]) if first < end]
+        # imap keeps the order of the segments and therefore the sample order of the records
+        for records in pool.imap(_decode_segment, segments):
+            for record in records:
+                yield record
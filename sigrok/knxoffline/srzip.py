@@ -0,0 +1,191 @@
+#
+# Copyright (C) 2013 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# Streaming KNX/EIB decoding of sigrok session files (.sr)
+#
+# A .sr file is a zip archive with a 'metadata' file and the logic data split
+# into the chunks logic-1-1, logic-1-2, ... The chunks are read block by block
+# and fed into the state machine of the knx protocol decoder, which keeps its
+# state from one block to the next. Memory usage therefore does not depend on
+# the size of the capture.
+
+import argparse
+import configparser
+import math
+import re
+import zipfile
+
+import numpy as np
+
+from common.knxhelper import ACK_KINDS, TIMINGS, BitTimings, StateMachine, Telegram
+from .engine import format_record, parse_samplerate
+
+# Number of samples that are read from the archive at once
+BLOCK_SAMPLES = 1 << 22
+
+# Channel names that are used for the bus line if no channel is given
+BUS_CHANNEL_NAMES = ('rx', 'bus', 'knx', 'eib')
+
+
+class SrSession:
+    """A sigrok session file."""
+
+    def __init__(self, file_name):
+        self.zip = zipfile.ZipFile(file_name)
+        metadata = configparser.ConfigParser(interpolation=None)
+        metadata.read_string(self.zip.read('metadata').decode('utf-8'))
+        device = metadata['device 1']
+        self.samplerate = parse_samplerate(device['samplerate'])
+        self.unitsize = int(device.get('unitsize', '1'))
+        capturefile = device.get('capturefile', 'logic-1')
+
+        # The probes are numbered from 1, probe N is bit N-1 of a sample
+        self.channels = {}
+        for key, name in device.items():
+            match = re.match(r'^probe(\d+)$', key)
+            if match:
+                self.channels[name] = int(match.group(1)) - 1
+
+        # Old files have a single capture file, newer ones chunks capturefile-1, capturefile-2, ...
+        def chunk_number(name):
+            return int(name[len(capturefile) + 1:] or '0')
+        self.logic_files = sorted((n for n in self.zip.namelist()
+                                   if n == capturefile or re.match(re.escape(capturefile) + r'-\d+$', n)),
+                                  key=chunk_number)
+
+    def channel(self, channel=None):
+        """The number of a channel given by name or number, default: the first bus like channel."""
+        if channel is None:
+            for name, number in sorted(self.channels.items(), key=lambda item: item[1]):
+                if name.lower() in BUS_CHANNEL_NAMES:
+                    return number
+            return min(self.channels.values(), default=0)
+        if str(channel).isdigit():
+            return int(channel)
+        if channel not in self.channels:
+            raise KeyError('Channel {0} not found in {1}'.format(channel, ', '.join(self.channels)))
+        return self.channels[channel]
+
+    def blocks(self, block_samples=BLOCK_SAMPLES):
+        """Generate the logic data as arrays of shape (samples, unitsize), one block at a time."""
+        rest = b''
+        for name in self.logic_files:
+            with self.zip.open(name) as logic:
+                while True:
+                    data = logic.read(block_samples * self.unitsize)
+                    if not data:
+                        break
+                    # Chunks are not guaranteed to end at a sample boundary
+                    data = rest + data
+                    size = len(data) - len(data) % self.unitsize
+                    rest = data[size:]
+                    if size:
+                        yield np.frombuffer(data[:size], np.uint8).reshape(-1, self.unitsize)
+
+
+class StreamDecoder:
+    """
+    Feed blocks of logic data into the KNX state machine.
+
+    This does the same as the wait() loop of the knx protocol decoder: the
+    samples before next_min are skipped, then the first falling edge or the
+    timeout at next_max is passed to the state machine. When a block ends
+    while waiting, the wait is continued with the next block.
+    """
+
+    def __init__(self, samplerate, channel=0, timings='default', inverted_signal=False):
+        self.byte_index = channel // 8
+        self.bit = channel % 8
+        self.inverted_signal = 1 if inverted_signal else 0
+        self.records = []
+        self.state_machine = StateMachine(BitTimings(samplerate, timings), self.records.append)
+        self.samplenum = -1     # The last sample that was passed to the state machine
+        self.first_sample = 0   # The number of the first sample of the next block
+        self.last_level = None  # The bus level at the end of the previous block
+
+    def feed(self, block):
+        """Decode a block of samples and return the Byte and Telegram records that were completed."""
+        sm = self.state_machine
+        bus = ((block[:, self.byte_index] >> self.bit) & 1) ^ self.inverted_signal
+        first = self.first_sample
+        end = first + len(bus)
+        previous = np.empty_like(bus)
+        previous[0] = bus[0] if self.last_level is None else self.last_level
+        previous[1:] = bus[:-1]
+        edges = np.flatnonzero(previous > bus) + first
+
+        while True:
+            next_min = int(math.ceil(sm.next_min))
+            if self.samplenum < next_min:
+                if next_min >= end:
+                    break
+                # Compare against the last bus level seen before the skipped samples
+                level = int(bus[next_min - first])
+                falling_edge = (sm.last_bus == 1 and level == 0)
+                sm.last_bus = level
+                self.samplenum = next_min
+                if falling_edge or (sm.next_max != 0 and next_min >= sm.next_max):
+                    sm.event(next_min, falling_edge)
+                    continue
+
+            i = np.searchsorted(edges, self.samplenum, side='right')
+            next_max = int(math.ceil(sm.next_max))
+            if i < len(edges) and (sm.next_max == 0 or edges[i] <= next_max):
+                self.samplenum = int(edges[i])
+                sm.last_bus = 0
+                sm.event(self.samplenum, True)
+            elif sm.next_max != 0 and next_max < end:
+                self.samplenum = next_max
+                sm.last_bus = int(bus[next_max - first])
+                sm.event(self.samplenum, False)
+            else:
+                break
+
+        self.first_sample = end
+        self.last_level = bus[-1]
+        records = self.records[:]
+        del self.records[:]
+        return records
+
+
+def decode_sr(file_name, channel=None, timings='default', inverted_signal=False):
+    """Generate the Byte and Telegram records of a sigrok session file."""
+    session = SrSession(file_name)
+    decoder = StreamDecoder(session.samplerate, session.channel(channel), timings, inverted_signal)
+    for block in session.blocks():
+        for record in decoder.feed(block):
+            yield record
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Decode the KNX telegrams of a sigrok session file.')
+    parser.add_argument('file', help='sigrok session file (.sr)')
+    parser.add_argument('-c', '--channel', help='name or number of the bus channel, default: Rx/BUS/first')
+    parser.add_argument('-t', '--timings', choices=TIMINGS, default='default', help='bit timings')
+    parser.add_argument('-i', '--inverted', action='store_true', help='inverted signal')
+    parser.add_argument('-b', '--bytes', action='store_true', help='show the bytes of the telegrams too')
+    args = parser.parse_args()
+
+    samplerate = SrSession(args.file).samplerate
+    for record in decode_sr(args.file, args.channel, args.timings, args.inverted):
+        if args.bytes or isinstance(record, Telegram) or record.kind in ACK_KINDS.values():
+            print(format_record(record, samplerate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# Synthetic KNX/EIB bus signals
+#
+# Generates the logic samples of the bus line for a sequence of telegrams,
+# e.g. STG.Telegram objects of the test-case-generator, to test and benchmark
+# the decoders with reproducible input of any size. The telegrams are
+# rendered a chunk at a time: the bit times of all 0 bits of a chunk are
+# computed with NumPy and the pulses are drawn with a cumulative sum, so
+# there is no Python code per sample or per bit.
+
+import argparse
+import itertools
+import os
+import sys
+import zipfile
+
+import numpy as np
+
+from common.knxhelper.dpt import STG_PATH
+from .engine import parse_samplerate
+
+# Number of telegrams that are rendered at once
+CHUNK_TELEGRAMS = 1 << 12
+
+# Idle bit times before the first telegram
+LEAD_BITS = 50
+
+
+def telegram_bytes(telegram):
+    """The bytes of a telegram, an STG.Telegram object (with .bytes) or the raw bytes."""
+    return bytes(getattr(telegram, 'bytes', telegram))
+
+
+class Synthesizer:
+    """
+    Render telegrams as logic samples of the bus line (1 = idle, 0 = pulse of a 0 bit).
+
+    gap_bits is the idle time after a telegram or ACK in bit times (after the
+    stop bit of the last byte), either a number or a (min, max) range for
+    random gaps. If ack is set, every telegram is followed by this
+    acknowledge byte after ack_gap_bits. Every falling edge is shifted by a
+    random time of up to +/- jitter_us, and spike_rate random spikes of
+    spike_us per second invert the line. The time line continues from one
+    call of render() to the next.
+    """
+
+    def __init__(self, samplerate, bitrate=9600, gap_bits=50, ack=0xcc, ack_gap_bits=15, jitter_us=0.0,
+                 pulse_us=35.0, spike_rate=0.0, spike_us=2.0, inverted_signal=False, seed=None):
+        self.samplerate = samplerate
+        self.bit_samples = samplerate / bitrate
+        self.samples_per_usec = samplerate / 1000000.0
+        self.gap_bits = gap_bits
+        self.ack = ack
+        self.ack_gap_bits = ack_gap_bits
+        self.jitter = jitter_us * self.samples_per_usec
+        self.pulse_samples = max(1, int(round(pulse_us * self.samples_per_usec)))
+        self.spike_rate = spike_rate
+        self.spike_samples = max(1, int(round(spike_us * self.samples_per_usec)))
+        self.inverted_signal = 1 if inverted_signal else 0
+        self.rng = np.random.default_rng(seed)
+        self.bit_time = LEAD_BITS  # The bit time of the next frame, from the begin of the signal
+        self.samplenum = 0         # The number of the first sample of the next chunk
+
+    def gaps(self, count):
+        """The idle bit times after count telegrams."""
+        if isinstance(self.gap_bits, (tuple, list)):
+            return self.rng.integers(self.gap_bits[0], self.gap_bits[1] + 1, count)
+        return np.full(count, self.gap_bits, np.int64)
+
+    @staticmethod
+    def coverage(starts, ends, size, unique=False):
+        """
+        The number of the intervals [start, end) that contain each of size samples (mod 256).
+
+        With unique=True no two intervals may start (or end) at the same
+        sample, which is true for the pulses of the bits, and the much faster
+        indexed assignment is used instead of np.add.at.
+        """
+        steps = np.zeros(size + 1, np.int8)
+        if unique:
+            steps[starts] += 1
+            steps[ends] -= 1
+        else:
+            np.add.at(steps, starts, 1)
+            np.add.at(steps, ends, -1)
+        return np.cumsum(steps, dtype=np.int8)[:size]
+
+    def render(self, telegrams):
+        """The samples of the telegrams as uint8 array, including the idle time after the last one."""
+        frames = [telegram_bytes(t) for t in telegrams]
+        gaps = self.gaps(len(frames))
+        if self.ack is not None:
+            ack = bytes((self.ack, ))
+            frames = [f for frame in frames for f in (frame, ack)]
+            gaps = np.column_stack((np.full(len(gaps), self.ack_gap_bits), gaps)).ravel()
+        data = np.frombuffer(b''.join(frames), np.uint8)
+        lengths = np.fromiter((len(f) for f in frames), np.int64, len(frames))
+
+        # The start of every frame and every byte in bit times, the bytes of a frame are 13 bit times apart
+        frame_bits = 13 * (lengths - 1) + 11 + gaps
+        frame_start = self.bit_time + np.concatenate(([0], np.cumsum(frame_bits)[:-1]))
+        first_byte = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        byte_index = np.arange(len(data)) - np.repeat(first_byte, lengths)
+        byte_start = np.repeat(frame_start, lengths) + 13 * byte_index
+        self.bit_time = frame_start[-1] + frame_bits[-1]
+
+        # Start bit, 8 data bits (LSB first) and even parity; the 0 bits are pulses on the bus
+        bits = np.zeros((len(data), 10), np.uint8)
+        bits[:, 1:9] = np.unpackbits(data[:, None], axis=1, bitorder='little')
+        bits[:, 9] = bits[:, 1:9].sum(axis=1) & 1
+        byte, bit = np.nonzero(bits == 0)
+        starts = (byte_start[byte] + bit) * self.bit_samples
+        if self.jitter:
+            starts += self.rng.uniform(-self.jitter, self.jitter, len(starts))
+
+        first = self.samplenum
+        end = int(round(self.bit_time * self.bit_samples))
+        size = end - first
+        starts = np.clip(np.round(starts).astype(np.int64) - first, 0, size)
+        ends = np.minimum(starts + self.pulse_samples, size)
+
+        # Count the pulses that cover a sample: +1 at the start, -1 at the end of every pulse
+        samples = (self.coverage(starts, ends, size, unique=True) == 0).view(np.uint8)
+
+        if self.spike_rate:
+            count = self.rng.poisson(self.spike_rate * size / self.samplerate)
+            spikes = self.rng.integers(0, size, count)
+            samples ^= (self.coverage(spikes, np.minimum(spikes + self.spike_samples, size), size) & 1).view(np.uint8)
+
+        self.samplenum = end
+        return samples ^ self.inverted_signal
+
+    def blocks(self, telegrams, chunk_telegrams=CHUNK_TELEGRAMS):
+        """Render an iterable of telegrams (of any length) a chunk at a time."""
+        telegrams = iter(telegrams)
+        while True:
+            chunk = list(itertools.islice(telegrams, chunk_telegrams))
+            if not chunk:
+                return
+            yield self.render(chunk)
+
+
+def synthesize(telegrams, samplerate, **kw):
+    """The samples of the telegrams as one uint8 array, see Synthesizer for the options."""
+    blocks = list(Synthesizer(samplerate, **kw).blocks(telegrams))
+    if not blocks:
+        return np.ones(0, np.uint8)
+    return np.concatenate(blocks)
+
+
+def samplerate_string(samplerate):
+    """The samplerate as sigrok writes it into the metadata, e.g. '200 kHz'."""
+    for factor, unit in ((1000000000, 'GHz'), (1000000, 'MHz'), (1000, 'kHz')):
+        if samplerate % factor == 0:
+            return '{0} {1}'.format(samplerate // factor, unit)
+    return '{0} Hz'.format(samplerate)
+
+
+def write_sr(file_name, samplerate, blocks, channel_name='bus'):
+    """Write blocks of samples of a single channel as a sigrok session file."""
+    with zipfile.ZipFile(file_name, 'w', zipfile.ZIP_DEFLATED) as sr:
+        sr.writestr('version', '2')
+        sr.writestr('metadata', '[global]\nsigrok version=0.5.0\n\n'
+                                '[device 1]\ncapturefile=logic-1\ntotal probes=1\nsamplerate={0}\n'
+                                'total analog=0\nprobe1={1}\nunitsize=1\n'
+                                .format(samplerate_string(samplerate), channel_name))
+        for number, block in enumerate(blocks, 1):
+            sr.writestr('logic-1-{0}'.format(number), block.tobytes())
+
+
+def write_raw(file_name, blocks):
+    """Write blocks of samples as raw logic dump, one byte per sample (like sigrok-cli -O binary)."""
+    with open(file_name, 'wb') as f:
+        for block in blocks:
+            f.write(block.tobytes())
+
+
+def random_telegrams(count, seed=None, pool=1024):
+    """
+    Generate count random group value writes.
+
+    A pool of STG.Telegram.Send_Value objects with random addresses, value
+    lengths and values is created first, the telegrams are drawn from it.
+    """
+    if STG_PATH not in sys.path:
+        sys.path.append(STG_PATH)
+    from STG.Telegram import Send_Value
+
+    rng = np.random.default_rng(seed)
+    templates = []
+    for i in range(min(pool, count)):
+        length = int(rng.choice((1, 2, 4, 8, 16, 32)))
+        templates.append(Send_Value(src=int(rng.integers(0x1000, 0x10000)), dst=int(rng.integers(1, 0x8000)),
+                                    length=length, value=int(rng.integers(0, 1 << length))).bytes)
+    for start in range(0, count, CHUNK_TELEGRAMS):
+        for i in rng.integers(0, len(templates), min(CHUNK_TELEGRAMS, count - start)):
+            yield templates[i]
+
+
+def parse_gap(value):
+    """A gap like '50' or a range like '40-60' in bit times."""
+    if '-' in value:
+        low, high = value.split('-', 1)
+        return int(low), int(high)
+    return int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic KNX capture with random telegrams.')
+    parser.add_argument('file', help='output file, a sigrok session (.sr) or a raw logic dump')
+    parser.add_argument('-r', '--samplerate', type=parse_samplerate, default=1000000,
+                        help='samplerate, e.g. 1M or "200 kHz"')
+    parser.add_argument('-n', '--count', type=int, default=1000, help='number of telegrams')
+    parser.add_argument('-g', '--gap', type=parse_gap, default=50,
+                        help='idle bit times after a telegram or ACK, e.g. 50 or 40-60')
+    parser.add_argument('-a', '--ack', type=lambda v: int(v, 16), default=0xcc,
+                        help='acknowledge byte after every telegram (hex)')
+    parser.add_argument('--no-ack', action='store_true', help='no acknowledge after the telegrams')
+    parser.add_argument('-j', '--jitter', type=float, default=0.0, help='bit jitter in usec')
+    parser.add_argument('-s', '--spikes', type=float, default=0.0, help='spikes per second')
+    parser.add_argument('-i', '--inverted', action='store_true', help='inverted signal')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the random numbers')
+    args = parser.parse_args()
+
+    synthesizer = Synthesizer(args.samplerate, gap_bits=args.gap, ack=None if args.no_ack else args.ack,
+                              jitter_us=args.jitter, spike_rate=args.spikes, inverted_signal=args.inverted,
+                              seed=args.seed)
+    blocks = synthesizer.blocks(random_telegrams(args.count, args.seed))
+    if os.path.splitext(args.file)[1] == '.sr':
+        write_sr(args.file, args.samplerate, blocks)
+    else:
+        write_raw(args.file, blocks)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# Run with: cd sigrok && python3 -m pytest knxoffline/tests
+
+import os
+import sys
+
+_sigrok_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if _sigrok_dir not in sys.path:
+    sys.path.insert(0, _sigrok_dir)
+
+import knxoffline  # noqa: E402  (adds decoders/ to sys.path)
+from common.knxhelper import dpt  # noqa: E402
+
+# The test-case-generator (STG) for the telegrams of the synthetic captures
+if dpt.STG_PATH not in sys.path:
+    sys.path.append(dpt.STG_PATH)
+
+import pytest  # noqa: E402
+
+SAMPLERATE = 1000000
+
+# Number of telegrams of the synthetic captures
+TELEGRAMS = 150
+
+# Options of the synthesizer for the synthetic captures
+CAPTURES = {
+    'clean': dict(gap_bits=(50, 300)),
+    'jitter': dict(gap_bits=(50, 300), jitter_us=4.0),
+    'spikes': dict(gap_bits=(50, 300), jitter_us=2.0, spike_rate=100.0),
+}
+
+
+@pytest.fixture(scope='module', params=sorted(CAPTURES))
+def capture(request, tmp_path_factory):
+    """The blocks of samples of a synthetic capture and the records of the offline engine."""
+    np = pytest.importorskip('numpy')
+    from knxoffline.engine import Engine
+    from knxoffline.synth import Synthesizer, random_telegrams
+
+    synthesizer = Synthesizer(SAMPLERATE, seed=3, **CAPTURES[request.param])
+    blocks = list(synthesizer.blocks(random_telegrams(TELEGRAMS, seed=3), chunk_telegrams=32))
+    samples = np.concatenate(blocks)
+    records = list(Engine(samples, SAMPLERATE).decode())
+    return request.param, blocks, samples, records, tmp_path_factory.mktemp(request.param)
@@ -0,0 +1,141 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# The datapoint values of the knx_dpt decoder (common/knxhelper/dpt.py) and of
+# the codec of the test-case-generator (STG/Datapoint_Codec.py) are checked
+# with the same table of raw and physical values.
+
+import json
+import math
+import pickle
+
+import pytest
+
+from common.knxhelper import dpt
+
+np = pytest.importorskip('numpy')
+
+from STG.Datapoint import Datapoint, Float, Signed_Integer, Unsigned_Integer  # noqa: E402
+from STG.Datapoint_Codec import Datapoint_Codec  # noqa: E402
+
+# id: (format class, width, coefficient, min, max)
+FORMATS = {
+    'DPST-5-1': (Unsigned_Integer, 8, '0.4', '0', '100'),
+    'DPST-5-10': (Unsigned_Integer, 8, '', '', ''),
+    'DPST-7-1': (Unsigned_Integer, 16, '', '', ''),
+    'DPST-8-10': (Signed_Integer, 16, '0.01', '', ''),
+    'DPST-9-1': (Float, 16, '', '-273', '670760'),
+    'DPST-12-1': (Unsigned_Integer, 32, '', '', ''),
+    'DPST-13-1': (Signed_Integer, 32, '', '', ''),
+    'DPST-14-68': (Float, 32, '', '', ''),
+}
+
+# (datapoint, raw value, physical value), None is invalid data
+VALUES = [
+    ('DPST-5-1', 0, 0),
+    ('DPST-5-1', 255, 100),
+    ('DPST-5-1', 128, 128 * 100 / 255.0),
+    ('DPST-5-10', 200, 200),
+    ('DPST-7-1', 0xffff, 65535),
+    ('DPST-8-10', 0xffff, -0.01),
+    ('DPST-8-10', 0x7fff, 327.67),
+    ('DPST-8-10', 0x8000, -327.68),
+    ('DPST-9-1', 0x0000, 0.0),
+    ('DPST-9-1', 0x0c33, 21.5),
+    ('DPST-9-1', 0x8a24, -30.0),
+    ('DPST-9-1', 0x07ff, 20.47),
+    ('DPST-9-1', 0x87ff, -0.01),
+    ('DPST-9-1', 0x7ffe, 670433.28),
+    ('DPST-9-1', 0xf800, -671088.64),
+    ('DPST-9-1', 0x7fff, None),
+    ('DPST-12-1', 0xffffffff, 4294967295),
+    ('DPST-13-1', 0xffffffff, -1),
+    ('DPST-13-1', 0x80000000, -2147483648),
+    ('DPST-14-68', 0x41ac0000, 21.5),
+    ('DPST-14-68', 0xc1f00000, -30.0),
+]
+
+_datapoints = {}
+
+
+def datapoint(id):
+    """The STG.Datapoint with the format of FORMATS."""
+    if id not in _datapoints:
+        cls, width, coefficient, min_value, max_value = FORMATS[id]
+        dp = Datapoint.Table.get(id) or Datapoint(id, id, width, id)
+        dp.formats = [cls(id + '_F-1', 0, name=id, size=str(width), unit='', coeffecient=coefficient,
+                          min_value=min_value, max_value=max_value, register=False)]
+        _datapoints[id] = dp
+    return _datapoints[id]
+
+
+@pytest.mark.parametrize('id, raw, value', VALUES)
+def test_knx_dpt_format(id, raw, value):
+    (kind, shift, width, coefficient, unit, extra), = dpt._datapoint_info(datapoint(id))[3]
+    text = dpt._format_field(raw, kind, shift, width, coefficient, unit, extra)
+    assert text == ('invalid' if value is None else '{0:g}'.format(value))
+
+
+@pytest.mark.parametrize('id, raw, value', VALUES)
+def test_codec(id, raw, value):
+    codec = Datapoint_Codec.Get(datapoint(id))
+    physical = codec.from_raw(raw)
+    vector = codec.decode(np.array([raw], np.uint64))[0]
+    if value is None:
+        assert math.isnan(physical) and math.isnan(vector)
+        value = float('nan')
+    else:
+        assert physical == pytest.approx(value) and vector == pytest.approx(value)
+    assert codec.to_raw(value) == raw
+    assert codec.encode([value]).tolist() == [raw]
+
+
+def test_cache_is_json(tmp_path, monkeypatch):
+    info = dpt._datapoint_info(datapoint('DPST-9-1'))
+    enum = ('DPST-20-102', 'HVAC mode', 8, (('enum', 0, 8, 1, None, {0: 'Auto', 1: 'Comfort'}), ))
+    bit = ('DPST-1-1', 'Switch', 1, (('bit', 0, 1, 1, None, ('Off', 'On')), ))
+    monkeypatch.setattr(dpt, '_build_data', lambda knxproj: (
+        {0x0a03: ('Temperature', info[0]), 0x0a04: ('Mode', enum[0]), 0x0a05: ('Light', bit[0])},
+        {info[0]: info, enum[0]: enum, bit[0]: bit}))
+    knxproj = tmp_path / 'project.knxproj'
+    knxproj.write_bytes(b'')
+    cache = str(tmp_path / 'cache')
+    index = dpt.load_index(str(knxproj), cache)
+    assert isinstance(index[0x0a03][1], dpt.DatapointInfo)
+    with open(cache) as f:
+        json.load(f)
+
+    monkeypatch.setattr(dpt, '_build_data', None)
+    cached = dpt.load_index(str(knxproj), cache)
+    assert sorted(cached) == sorted(index)
+    for ga, (name, info) in index.items():
+        assert cached[ga][0] == name
+        assert cached[ga][1].formats == info.formats
+        assert (cached[ga][1].id, cached[ga][1].name, cached[ga][1].size) == (info.id, info.name, info.size)
+
+
+def test_pickle_cache_is_rebuilt(tmp_path, monkeypatch):
+    knxproj = tmp_path / 'project.knxproj'
+    knxproj.write_bytes(b'')
+    cache = tmp_path / 'cache'
+    # A cache of an older version, or a file that somebody else put next to the project
+    cache.write_bytes(pickle.dumps(('key', 1)))
+    monkeypatch.setattr(dpt, '_build_data', lambda knxproj: ({}, {}))
+    assert dpt.load_index(str(knxproj), str(cache)) == {}
+    # The foreign file is replaced with the JSON cache
+    assert json.loads(cache.read_text())['addresses'] == []
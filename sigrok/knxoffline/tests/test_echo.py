@@ -0,0 +1,134 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# The comparison of the bytes sent on the TX line with their echo on the bus:
+# collisions (only additional 0 bits on the bus), echo mismatches and sent
+# bytes without echo, and the records of the TX line.
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from common.knxhelper import Byte, EchoCheck  # noqa: E402
+from knxoffline import harness  # noqa: E402
+from knxoffline.synth import random_telegrams, synthesize  # noqa: E402
+
+SAMPLERATE = 1000000
+
+TOLERANCE = 50
+HORIZON = 1500
+
+
+def byte(ss, value):
+    return Byte(ss, ss + 1100, value, 'data', True)
+
+
+def echo_check():
+    problems = []
+    check = EchoCheck(TOLERANCE, HORIZON, lambda kind, tx, rx: problems.append((kind, tx, rx)))
+    return check, problems
+
+
+@pytest.mark.parametrize('tx_first', (True, False))
+@pytest.mark.parametrize('tx_value, rx_value, kind', [
+    (0x81, 0x81, None),
+    (0x81, 0x80, 'collision'),
+    (0xff, 0x00, 'collision'),
+    (0x81, 0x83, 'mismatch'),
+    (0x00, 0x01, 'mismatch'),
+])
+def test_compare(tx_value, rx_value, kind, tx_first):
+    check, problems = echo_check()
+    tx, rx = byte(1000, tx_value), byte(1000 + TOLERANCE, rx_value)
+    if tx_first:
+        check.tx(tx)
+        check.rx(rx)
+    else:
+        check.rx(rx)
+        check.tx(tx)
+    assert problems == ([] if kind is None else [(kind, tx, rx)])
+
+
+def test_no_echo():
+    check, problems = echo_check()
+    tx = byte(1000, 0xbc)
+    check.tx(tx)
+    # Too far apart to be the echo, but not yet beyond the horizon
+    check.rx(byte(1000 + TOLERANCE + 1, 0xbc))
+    check.rx(byte(1000 + HORIZON, 0x11))
+    assert problems == []
+    check.rx(byte(1000 + HORIZON + 1, 0x11))
+    assert problems == [('no-echo', tx, None)]
+    # Bytes on the bus without a sent byte are no problem
+    check.rx(byte(10 * HORIZON, 0x11))
+    check.rx(byte(20 * HORIZON, 0x11))
+    assert len(problems) == 1
+
+
+def decode(rx, tx):
+    """The annotations and the Python output of the knx decoder for the RX and TX lines."""
+    decoder_class = harness.load_decoder('knx')
+    annotations = []
+    output = []
+
+    def put(ss, es, output_id, data):
+        if output_id == harness.OUTPUT_ANN:
+            annotations.append((data[0], data[1][0]))
+        elif output_id == harness.OUTPUT_PYTHON:
+            output.append(data)
+
+    harness.Session(decoder_class, [rx, tx], SAMPLERATE, put=put).run()
+    return annotations, output
+
+
+def echo_annotations(annotations):
+    decoder_class = harness.load_decoder('knx')
+    rows = (decoder_class.rowid_echo_mismatch, decoder_class.rowid_collision)
+    return [text for row, text in annotations if row in rows]
+
+
+def test_identical_lines():
+    samples = synthesize(list(random_telegrams(10, seed=7)), SAMPLERATE)
+    annotations, output = decode(samples, samples)
+    assert echo_annotations(annotations) == []
+    rx = [(kind, record) for kind, record in output if not kind.startswith('TX-')]
+    tx = [(kind[3:], record) for kind, record in output if kind.startswith('TX-')]
+    assert [kind for kind, _ in rx] == ['TELEGRAM', 'ACK'] * 10
+    assert tx == rx
+
+
+@pytest.mark.parametrize('rx_value, message', [
+    (0x80, 'Collision: sent 81, bus 80'),
+    (0x83, 'Echo mismatch: sent 81, bus 83'),
+])
+def test_decoder_echo_errors(rx_value, message):
+    rx = synthesize([bytes((rx_value, ))], SAMPLERATE, ack=None)
+    tx = synthesize([bytes((0x81, ))], SAMPLERATE, ack=None)
+    annotations, output = decode(rx, tx)
+    assert echo_annotations(annotations) == [message]
+
+
+def test_decoder_no_echo():
+    telegrams = list(random_telegrams(2, seed=7))
+    tx = synthesize(telegrams, SAMPLERATE, ack=None)
+    # The first telegram is missing on the bus
+    rx = tx.copy()
+    rx[:len(synthesize(telegrams[:1], SAMPLERATE, ack=None))] = 1
+    annotations, output = decode(rx, tx)
+    assert echo_annotations(annotations) == ['No echo of {0:02x}'.format(b) for b in telegrams[0]]
+    assert sorted(kind for kind, _ in output) == ['TELEGRAM', 'TX-TELEGRAM', 'TX-TELEGRAM']
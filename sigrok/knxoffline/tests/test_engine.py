@@ -0,0 +1,104 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# Known answers of the offline engine for captures that are rendered bit by
+# bit in the test: 9600 bit/s, a 35 usec low pulse for a 0 bit, even parity.
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from knxoffline.engine import Byte, Engine, Telegram, decode_file  # noqa: E402
+
+SAMPLERATE = 1000000
+
+BIT_SAMPLES = SAMPLERATE / 9600.0
+PULSE_SAMPLES = 35
+
+TELEGRAM = bytes.fromhex('bc110509010081de')
+
+
+def render(frames, pause_bits=50):
+    """
+    The bus level (1 = idle) of the frames, each followed by a pause.
+
+    Every byte takes 13 bit times: the start bit, 8 data bits (LSB first),
+    the parity bit and 3 bit times until the next start bit.
+    """
+    zero_bits = []
+    bit = 10
+    for frame in frames:
+        for value in frame:
+            bits = [0] + [(value >> i) & 1 for i in range(8)]
+            bits.append(sum(bits) % 2)
+            zero_bits.extend(bit + i for i, b in enumerate(bits) if b == 0)
+            bit += 13
+        bit += pause_bits
+    samples = np.ones(int(bit * BIT_SAMPLES), np.uint8)
+    for i in zero_bits:
+        start = int(round(i * BIT_SAMPLES))
+        samples[start:start + PULSE_SAMPLES] = 0
+    return samples
+
+
+def kinds(records):
+    return [r.kind if isinstance(r, Byte) else 'telegram' for r in records]
+
+
+def test_telegram_and_ack():
+    records = list(Engine(render([TELEGRAM, b'\xcc']), SAMPLERATE).decode())
+    assert kinds(records) == ['data'] * 7 + ['checksum', 'telegram', 'ack']
+    assert bytes(r.value for r in records if isinstance(r, Byte)) == TELEGRAM + b'\xcc'
+    telegram = records[8]
+    assert isinstance(telegram, Telegram)
+    assert (telegram.ss, telegram.data, telegram.checksum_ok, telegram.parity_ok) \
+        == (records[0].ss, TELEGRAM, True, True)
+    assert telegram.es == records[7].es
+    assert all(r.parity_ok for r in records)
+
+
+@pytest.mark.parametrize('value, kind', [(0xcc, 'ack'), (0x0c, 'nak'), (0xc0, 'busy'), (0x00, 'busy-nak'),
+                                         (0x42, 'random')])
+def test_single_byte_frames(value, kind):
+    records = list(Engine(render([bytes((value, ))]), SAMPLERATE).decode())
+    assert [(r.value, r.kind) for r in records] == [(value, kind)]
+
+
+def test_checksum_error():
+    data = TELEGRAM[:-1] + b'\x00'
+    records = list(Engine(render([data]), SAMPLERATE).decode())
+    assert kinds(records) == ['data'] * 7 + ['bad-checksum', 'telegram']
+    assert not records[-1].checksum_ok
+    assert records[-1].parity_ok
+
+
+def test_channel_and_inverted_signal(tmp_path):
+    expected = list(Engine(render([TELEGRAM, b'\xcc']), SAMPLERATE).decode())
+    # The inverted bus line on channel 10 of a capture with 2 bytes per sample
+    samples = np.zeros((len(render([TELEGRAM, b'\xcc'])), 2), np.uint8)
+    samples[:, 1] = (1 - render([TELEGRAM, b'\xcc'])) << 2
+    assert list(Engine(samples, SAMPLERATE, channel=10, inverted_signal=True).decode()) == expected
+    file_name = str(tmp_path / 'capture.bin')
+    samples.tofile(file_name)
+    assert list(decode_file(file_name, SAMPLERATE, unitsize=2, channel=10, inverted_signal=True)) == expected
+
+
+def test_empty_dump(tmp_path):
+    file_name = tmp_path / 'capture.bin'
+    file_name.write_bytes(b'')
+    assert list(decode_file(str(file_name), SAMPLERATE, unitsize=2)) == []
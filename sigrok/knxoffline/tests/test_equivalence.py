@@ -0,0 +1,50 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# The knx and eib protocol decoders produce the same Byte and Telegram
+# records as the offline engine for the same synthetic captures, also with
+# bit jitter and spikes on the line.
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from knxoffline import harness  # noqa: E402
+
+SAMPLERATE = 1000000
+
+
+def decoder_records(name, samples):
+    """The records that the state machine of a protocol decoder passes to put_record()."""
+    decoder_class = harness.load_decoder(name)
+    records = []
+
+    class Decoder(decoder_class):
+        def put_record(self, record):
+            records.append(record)
+            decoder_class.put_record(self, record)
+
+    channels = [samples] + [None] * (len(decoder_class.channels) + len(decoder_class.optional_channels) - 1)
+    harness.Session(Decoder, channels, SAMPLERATE).run()
+    return records
+
+
+@pytest.mark.parametrize('decoder', ('knx', 'eib'))
+def test_protocol_decoder(capture, decoder):
+    name, blocks, samples, records, tmp_path = capture
+    assert decoder_records(decoder, samples) == records
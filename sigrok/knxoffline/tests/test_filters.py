@@ -0,0 +1,104 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# The telegram filter of the knx decoder (options source, destination and
+# service) and the selection of the records of a frame.
+
+import functools
+import operator
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from common.knxhelper import Byte, RecordFilter, Telegram, TelegramFilter  # noqa: E402
+from common.knxhelper.filters import parse_address  # noqa: E402
+from knxoffline import harness  # noqa: E402
+from knxoffline.synth import synthesize  # noqa: E402
+
+SAMPLERATE = 1000000
+
+
+def telegram(src, dst, tpci_apci, group=True):
+    """The bytes of a standard frame with the addresses and the TPCI/APCI bytes."""
+    data = bytes((0xbc, src >> 8, src & 255, dst >> 8, dst & 255, (0x80 if group else 0) | (len(tpci_apci) - 1)))
+    data += bytes(tpci_apci)
+    return data + bytes((~functools.reduce(operator.xor, data) & 255, ))
+
+
+# 1.1.5 -> 1/2/3 Value_Write, 1.1.6 -> 1/2/4 Value_Read, 1.1.5 -> 1.1.20 T_Connect
+WRITE = telegram(0x1105, 0x1203, (0x00, 0x81))
+READ = telegram(0x1106, 0x1204, (0x00, 0x00))
+CONNECT = telegram(0x1105, 0x1114, (0x80, ), group=False)
+
+
+def test_parse_address():
+    assert parse_address(' 1.1.5', '.') == 0x1105
+    assert parse_address('15/15/255', '/') == 0xffff
+    for text in ('1/2', '1/2/3/4', '16/0/0', '1/2/256', '1/x/3', '1.2.3'):
+        with pytest.raises(ValueError):
+            parse_address(text, '/')
+
+
+@pytest.mark.parametrize('options, selected', [
+    ({}, (WRITE, READ, CONNECT)),
+    ({'sources': '1.1.5'}, (WRITE, CONNECT)),
+    ({'sources': '1.1.6-1.1.10'}, (READ, )),
+    ({'destinations': '1/2/3'}, (WRITE, )),
+    ({'destinations': '1/2/0-1/2/255'}, (WRITE, READ)),
+    ({'destinations': '1.1.20'}, (CONNECT, )),
+    ({'destinations': '1/2/4, 1.1.20'}, (READ, CONNECT)),
+    ({'services': 'value_write'}, (WRITE, )),
+    ({'services': 'Value_Read,T_Connect'}, (READ, CONNECT)),
+    ({'sources': '1.1.5', 'services': 'Value_Read'}, ()),
+])
+def test_telegram_filter(options, selected):
+    telegram_filter = TelegramFilter(**options)
+    assert tuple(t for t in (WRITE, READ, CONNECT) if telegram_filter.match(t)) == selected
+
+
+def test_unknown_service():
+    with pytest.raises(ValueError):
+        TelegramFilter(services='Value_Write,Coffee_Make')
+
+
+def test_record_filter():
+    def frame(data, ss):
+        return [Byte(ss + i, ss + i + 1, b, 'data', True) for i, b in enumerate(data)] \
+            + [Telegram(ss, ss + len(data), data, True, True), Byte(ss + 50, ss + 51, 0xcc, 'ack', True)]
+
+    records = frame(WRITE, 0) + frame(READ, 100) + frame(WRITE, 200)
+    output = []
+    record_filter = RecordFilter(TelegramFilter(destinations='1/2/3'), output.append)
+    for record in records:
+        record_filter.record(record)
+    assert output == records[:len(WRITE) + 2] + records[-len(WRITE) - 2:]
+
+
+def test_decoder_options():
+    samples = synthesize([WRITE, READ, CONNECT] * 5, SAMPLERATE)
+    decoder_class = harness.load_decoder('knx')
+    channels = [samples] + [None] * (len(decoder_class.channels) + len(decoder_class.optional_channels) - 1)
+    output = []
+
+    def put(ss, es, output_id, data):
+        if output_id == harness.OUTPUT_PYTHON:
+            output.append((data[0], data[1].data if data[0] == 'TELEGRAM' else data[1].value))
+
+    harness.Session(decoder_class, channels, SAMPLERATE, options={'destination': '1/2/4,1.1.20'}, put=put).run()
+    assert output == [('TELEGRAM', READ), ('ACK', 0xcc), ('TELEGRAM', CONNECT), ('ACK', 0xcc)] * 5
@@ -0,0 +1,77 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# The binary frame stream of the knx decoder ('frames') can be read back by
+# read_frames() and holds the same telegrams and ACKs as the Python output.
+
+import io
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from common.knxhelper import Byte, Telegram  # noqa: E402
+from common.knxhelper.framestream import (FLAG_ACK, FLAG_CHECKSUM_OK, FLAG_PARITY_OK, FLAG_TX,  # noqa: E402
+                                          FRAME_HEADER, StreamFrame, pack_ack, pack_telegram, read_frames)
+from knxoffline import harness  # noqa: E402
+from knxoffline.synth import random_telegrams, synthesize  # noqa: E402
+
+SAMPLERATE = 1000000
+
+TELEGRAM = Telegram(100, 2000, bytes.fromhex('bc110509010081d2'), True, True)
+ACK = Byte(2500, 2600, 0xcc, 'ack', True)
+
+
+def test_pack_and_read():
+    stream = pack_telegram(TELEGRAM) + pack_ack(ACK, FLAG_TX) \
+        + pack_telegram(TELEGRAM._replace(checksum_ok=False, parity_ok=False))
+    assert list(read_frames(io.BytesIO(stream))) == [
+        StreamFrame(100, 2000, FLAG_CHECKSUM_OK | FLAG_PARITY_OK, TELEGRAM.data),
+        StreamFrame(2500, 2600, FLAG_ACK | FLAG_CHECKSUM_OK | FLAG_PARITY_OK | FLAG_TX, b'\xcc'),
+        StreamFrame(100, 2000, 0, TELEGRAM.data),
+    ]
+
+
+@pytest.mark.parametrize('cut', [1, FRAME_HEADER.size, FRAME_HEADER.size + 3])
+def test_truncated_stream(cut):
+    stream = pack_telegram(TELEGRAM) + pack_telegram(TELEGRAM)
+    assert len(list(read_frames(io.BytesIO(stream[:-cut])))) == 1
+
+
+def test_decoder_frames():
+    samples = synthesize(list(random_telegrams(40, seed=5)), SAMPLERATE, gap_bits=(50, 300))
+    decoder_class = harness.load_decoder('knx')
+    channels = [samples] + [None] * (len(decoder_class.channels) + len(decoder_class.optional_channels) - 1)
+    stream = io.BytesIO()
+    expected = []
+
+    def put(ss, es, output_id, data):
+        if output_id == harness.OUTPUT_BINARY:
+            stream.write(data[1])
+        elif output_id == harness.OUTPUT_PYTHON and data[0] == 'TELEGRAM':
+            expected.append((ss, es, data[1].data))
+        elif output_id == harness.OUTPUT_PYTHON and data[0] == 'ACK':
+            expected.append((ss, es, bytes((data[1].value, ))))
+
+    harness.Session(decoder_class, channels, SAMPLERATE, put=put).run()
+    stream.seek(0)
+    frames = list(read_frames(stream))
+    assert len(frames) == 80
+    assert [(f.ss, f.es, f.data) for f in frames] == expected
+    assert all(f.flags & FLAG_CHECKSUM_OK and f.flags & FLAG_PARITY_OK for f in frames)
+    assert [bool(f.flags & FLAG_ACK) for f in frames] == [False, True] * 40
@@ -0,0 +1,83 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# The metrics periods of the knx decoder cover the whole capture, also the
+# quiet parts of the bus and the last, partial period.
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from common.knxhelper import BitTimings, BusMetrics, Metrics  # noqa: E402
+from knxoffline import harness  # noqa: E402
+from knxoffline.synth import random_telegrams, synthesize  # noqa: E402
+
+SAMPLERATE = 1000000
+
+
+def decode_metrics(samples, samplerate=SAMPLERATE):
+    """The Metrics records of the knx decoder for the samples on the RX channel."""
+    decoder_class = harness.load_decoder('knx')
+    channels = [samples] + [None] * (len(decoder_class.channels) + len(decoder_class.optional_channels) - 1)
+    records = []
+
+    def put(ss, es, output_id, data):
+        if isinstance(data, list) and data and data[0] == 'METRICS':
+            records.append(data[1])
+
+    harness.Session(decoder_class, channels, samplerate, options={'metrics': 'yes'}, put=put).run()
+    return records
+
+
+def test_empty_periods_and_flush():
+    records = []
+    metrics = BusMetrics(BitTimings(SAMPLERATE), SAMPLERATE, records.append)
+    metrics.advance(SAMPLERATE - 1)
+    assert records == []
+    metrics.flush(2 * SAMPLERATE + SAMPLERATE // 2)
+    assert [(r.ss, r.es) for r in records] == [(0, SAMPLERATE), (SAMPLERATE, 2 * SAMPLERATE),
+                                                (2 * SAMPLERATE, 2 * SAMPLERATE + SAMPLERATE // 2)]
+    assert all(isinstance(r, Metrics) and r.load == 0 and r.telegrams == 0 for r in records)
+    # Nothing left to output
+    metrics.flush(2 * SAMPLERATE + SAMPLERATE // 2)
+    assert len(records) == 3
+
+
+def test_quiet_bus():
+    records = decode_metrics(np.ones(3 * SAMPLERATE + 1234, np.uint8))
+    assert [(r.ss, r.es) for r in records] == [(0, SAMPLERATE), (SAMPLERATE, 2 * SAMPLERATE),
+                                                (2 * SAMPLERATE, 3 * SAMPLERATE),
+                                                (3 * SAMPLERATE, 3 * SAMPLERATE + 1234)]
+    assert all(r.load == 0 and r.telegrams == 0 for r in records)
+
+
+def test_periods_cover_capture():
+    telegrams = list(random_telegrams(20, seed=1))
+    busy = synthesize(telegrams, SAMPLERATE, seed=1, gap_bits=50)
+    quiet = np.ones(int(2.5 * SAMPLERATE), np.uint8)
+    samples = np.concatenate((busy, quiet, busy, quiet))
+    records = decode_metrics(samples)
+
+    # Consecutive periods of one second from the first to the last sample, the last one is partial
+    assert records[0].ss == 0
+    assert records[-1].es == len(samples)
+    assert all(a.es == b.ss for a, b in zip(records, records[1:]))
+    assert all(r.es - r.ss == SAMPLERATE for r in records[:-1])
+    assert 0 < records[-1].es - records[-1].ss < SAMPLERATE
+    assert sum(r.telegrams for r in records) == 2 * len(telegrams)
+    assert sum(1 for r in records if r.telegrams == 0 and r.load == 0) >= 3
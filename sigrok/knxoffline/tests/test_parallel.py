@@ -0,0 +1,63 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+
+# The parallel engine produces the same Byte and Telegram records as the
+# offline engine with a single process, also when a telegram starts exactly
+# at the boundary of the slices that are searched for idle gaps.
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from knxoffline.engine import Engine  # noqa: E402
+from knxoffline.parallel import decode_parallel  # noqa: E402
+from knxoffline.synth import random_telegrams, synthesize, write_raw  # noqa: E402
+
+SAMPLERATE = 1000000
+
+
+def test_decode_parallel(capture):
+    name, blocks, samples, records, tmp_path = capture
+    file_name = str(tmp_path / 'capture.bin')
+    write_raw(file_name, blocks)
+    assert list(decode_parallel(file_name, SAMPLERATE, processes=2)) == records
+
+
+@pytest.mark.parametrize('processes', (2, 3))
+def test_edge_at_slice_boundary(tmp_path, processes):
+    samples = synthesize(random_telegrams(20, seed=5), SAMPLERATE, seed=5, gap_bits=(50, 300))
+    engine = Engine(samples, SAMPLERATE)
+    edges = engine.edges
+    # The start bits of the frames after an idle gap
+    starts = edges[1:][np.diff(edges) > engine.timings.tel_wait_samples_min]
+    # Pad the capture so that the second slice begins exactly at the start bit of a frame
+    edge = int(starts[np.searchsorted(starts, -(-len(samples) // processes))])
+    samples = np.concatenate((samples, np.ones(processes * edge - len(samples), np.uint8)))
+    assert -(-len(samples) // processes) == edge
+
+    file_name = str(tmp_path / 'capture.bin')
+    write_raw(file_name, [samples])
+    records = list(Engine(samples, SAMPLERATE).decode())
+    assert list(decode_parallel(file_name, SAMPLERATE, processes=processes)) == records
+
+
+def test_empty_dump(tmp_path):
+    file_name = tmp_path / 'capture.bin'
+    file_name.write_bytes(b'')
+    assert list(decode_parallel(str(file_name), SAMPLERATE, processes=2)) == []
@@ -0,0 +1,64 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+
+# The .sr stream decoder produces the same Byte and Telegram records as the
+# offline engine, also when the blocks of samples end in the middle of a byte.
+
+import zipfile
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from knxoffline.srzip import SrSession, StreamDecoder, decode_sr  # noqa: E402
+from knxoffline.synth import write_sr  # noqa: E402
+
+SAMPLERATE = 1000000
+
+
+def test_decode_sr(capture):
+    name, blocks, samples, records, tmp_path = capture
+    file_name = str(tmp_path / 'capture.sr')
+    write_sr(file_name, SAMPLERATE, blocks)
+    assert list(decode_sr(file_name)) == records
+
+
+@pytest.mark.parametrize('block_samples', (997, 65537))
+def test_small_blocks(capture, block_samples):
+    name, blocks, samples, records, tmp_path = capture
+    # Blocks of a prime number of samples end anywhere in the bytes and telegrams
+    decoder = StreamDecoder(SAMPLERATE)
+    result = []
+    for first in range(0, len(samples), block_samples):
+        result.extend(decoder.feed(samples[first:first + block_samples, None]))
+    assert result == records
+
+
+def test_session(tmp_path):
+    file_name = str(tmp_path / 'capture.sr')
+    blocks = [np.array([1, 0, 1], np.uint8), np.array([1, 1], np.uint8)]
+    write_sr(file_name, 2000000, blocks, channel_name='RX')
+    session = SrSession(file_name)
+    assert (session.samplerate, session.unitsize, session.channel()) == (2000000, 1, 0)
+    assert session.channel('RX') == 0
+    with pytest.raises(KeyError):
+        session.channel('TX')
+    assert np.concatenate(list(session.blocks(block_samples=2))).ravel().tolist() == [1, 0, 1, 1, 1]
+    with zipfile.ZipFile(file_name) as sr:
+        assert sorted(sr.namelist()) == ['logic-1-1', 'logic-1-2', 'metadata', 'version']
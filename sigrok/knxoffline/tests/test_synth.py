@@ -0,0 +1,75 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+
+# The offline engine decodes the synthetic captures to the rendered
+# telegrams and ACKs, also with bit jitter and spikes on the line, and a
+# capture does not depend on how the telegrams are split into chunks.
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from common.knxhelper import Byte, Telegram  # noqa: E402
+from knxoffline.engine import Engine  # noqa: E402
+from knxoffline.synth import Synthesizer, random_telegrams, synthesize, write_raw  # noqa: E402
+
+SAMPLERATE = 1000000
+
+# Number of telegrams of the captures (conftest.py)
+TELEGRAMS = 150
+
+TELEGRAM = bytes.fromhex('bc110509010081de')
+
+
+def test_capture(capture):
+    name, blocks, samples, records, tmp_path = capture
+    telegrams = [r for r in records if isinstance(r, Telegram)]
+    good = [t for t in telegrams if t.checksum_ok and t.parity_ok]
+    if name == 'spikes':
+        assert len(good) > TELEGRAMS // 2
+    else:
+        assert len(good) == len(telegrams) == TELEGRAMS
+
+
+@pytest.mark.parametrize('inverted_signal', (False, True))
+def test_telegram_and_ack(inverted_signal):
+    samples = synthesize([TELEGRAM], SAMPLERATE, inverted_signal=inverted_signal)
+    records = list(Engine(samples, SAMPLERATE, inverted_signal=inverted_signal).decode())
+    assert bytes(r.value for r in records if isinstance(r, Byte)) == TELEGRAM + b'\xcc'
+    assert [r.data for r in records if isinstance(r, Telegram)] == [TELEGRAM]
+    assert samples[0] == (0 if inverted_signal else 1)
+
+
+def test_chunks(tmp_path):
+    telegrams = list(random_telegrams(100, seed=2))
+    samples = synthesize(telegrams, SAMPLERATE, seed=2, gap_bits=50)
+    blocks = list(Synthesizer(SAMPLERATE, seed=2, gap_bits=50).blocks(telegrams, chunk_telegrams=7))
+    assert len(blocks) == 15
+    assert np.array_equal(np.concatenate(blocks), samples)
+    file_name = tmp_path / 'capture.bin'
+    write_raw(str(file_name), blocks)
+    assert file_name.read_bytes() == samples.tobytes()
+
+
+def test_random_telegrams():
+    telegrams = list(random_telegrams(50, seed=4))
+    assert telegrams == list(random_telegrams(50, seed=4))
+    assert len(telegrams) == 50
+    # Every telegram ends with its checksum (odd parity of all bytes)
+    assert all(np.bitwise_xor.reduce(np.frombuffer(t, np.uint8)) == 0xff for t in telegrams)
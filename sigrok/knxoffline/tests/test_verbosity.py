@@ -0,0 +1,83 @@
+#
+# Copyright (C) 2013-2015 Stefan Taferner <stefan.taferner@gmx.at>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301 USA
+#
+
+# The verbosity option of the knx decoder only reduces the annotations, the
+# Python output stays the same.
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from knxoffline import harness  # noqa: E402
+from knxoffline.synth import random_telegrams, synthesize  # noqa: E402
+
+SAMPLERATE = 1000000
+
+TELEGRAMS = 20
+
+
+def decode(samples, verbosity):
+    """The annotations (row, text) and the Python output of the knx decoder."""
+    decoder_class = harness.load_decoder('knx')
+    channels = [samples] + [None] * (len(decoder_class.channels) + len(decoder_class.optional_channels) - 1)
+    annotations = []
+    output = []
+
+    def put(ss, es, output_id, data):
+        if output_id == harness.OUTPUT_ANN:
+            annotations.append((data[0], data[1][0]))
+        elif output_id == harness.OUTPUT_PYTHON:
+            output.append(data)
+
+    harness.Session(decoder_class, channels, SAMPLERATE, options={'verbosity': verbosity}, put=put).run()
+    return annotations, output
+
+
+@pytest.fixture(scope='module')
+def telegrams():
+    return list(random_telegrams(TELEGRAMS, seed=11))
+
+
+def test_clean_bus(telegrams):
+    samples = synthesize(telegrams, SAMPLERATE)
+    full, output = decode(samples, 'full')
+    telegram_only, telegram_only_output = decode(samples, 'telegram-only')
+    errors_only, errors_only_output = decode(samples, 'errors-only')
+    # The bytes of the telegrams and ACKs and the labels of the frames
+    assert len(full) > sum(len(t) for t in telegrams) + TELEGRAMS
+    # One annotation per telegram and per ACK
+    assert [text for row, text in telegram_only[1::2]] == ['ACK'] * TELEGRAMS
+    assert len(telegram_only) == 2 * TELEGRAMS
+    assert set(telegram_only) < set(full)
+    assert errors_only == []
+    assert [kind for kind, _ in output] == ['TELEGRAM', 'ACK'] * TELEGRAMS
+    assert telegram_only_output == errors_only_output == output
+
+
+def test_errors(telegrams):
+    # The checksum of the second telegram is wrong
+    frames = list(telegrams)
+    frames[1] = frames[1][:-1] + bytes((frames[1][-1] ^ 0xff, ))
+    samples = synthesize(frames, SAMPLERATE)
+    full, output = decode(samples, 'full')
+    telegram_only, telegram_only_output = decode(samples, 'telegram-only')
+    errors_only, errors_only_output = decode(samples, 'errors-only')
+    assert [text for row, text in errors_only] == ['Checksum Err']
+    assert set(errors_only) < set(full)
+    assert not set(errors_only) & set(telegram_only)
+    assert telegram_only_output == errors_only_output == output
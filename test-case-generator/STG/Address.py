@@ -83,8 +83,9 @@ class _Address_ :
 class Group_Address (_Address_) :
     """Group address"""
 
-    sep    = "/"
-    sizes  = (5, 3, 8)
+    sep       = "/"
+    sizes     = (5, 3, 8)
+    datapoint = None ### datapoint type assigned in the project, if any
 
 # end class Group_Address
 
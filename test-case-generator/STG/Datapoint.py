@@ -110,6 +110,12 @@ class _Number_ (_Format_) :
         self.mask        = (2 ** self.size) - 1
     # end def __init__
 
+    @property
+    def scale (self) :
+        """Factor for the physical value of a raw value."""
+        return self.coeffecient
+    # end def scale
+
     def __str__ (self) :
         parts = []
         mask  = self.mask << self.bit_start
@@ -141,6 +147,19 @@ class Unsigned_Integer (_Number_) :
         return str ((2 ** self.size) - 1)
     # end def _default_max_value
 
+    @property
+    def scale (self) :
+        """Factor for the physical value of a raw value.
+
+           The coefficient of the master is rounded (e.g. 0.4 for DPT 5.001),
+           the range of a scaled value gives the exact factor (100 / 255).
+        """
+        result = self.coeffecient
+        if result != 1 and self.min_value == 0 and self.max_value :
+            result = self.max_value / self.mask
+        return result
+    # end def scale
+
 # end class Unsigned_Integer
 
 class Signed_Integer (_Number_) :
@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2015-2021 Martin Glueck All rights reserved
+# Neugasse 2, A--2244 Spannberg, Austria. martin@mangari.org
+# #*** <License> ************************************************************#
+# This module is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this module. If not, see <http://www.gnu.org/licenses/>.
+# #*** </License> ***********************************************************#
+#
+#++
+# Name
+#    STG.Datapoint_Codec
+#
+# Purpose
+#    Conversion between raw and physical values of datapoints
+#
+#--
+
+from   STG.Datapoint        import Bit, Enumeration, Float, String
+from   STG.Datapoint        import Signed_Integer, Unsigned_Integer
+import numpy                as     np
+import struct
+
+class Datapoint_Codec :
+    """Conversion between the raw values and the physical values of a
+       datapoint with one format (e.g. DPT 1, 5, 7, 9, 12, 13, 14, 16).
+
+       `decode` and `encode` convert numpy arrays at once, `from_raw` and
+       `to_raw` convert a single value (a `Value_Field` uses `to_raw` if the
+       telegram has a `codec`), `from_string` parses a physical value. A raw
+       value is the unsigned integer of the `size` bits of the datapoint;
+       `decode` also accepts the payloads as uint8 array of shape
+       `(n, nbytes)`, which is the only raw form of strings.
+    """
+
+    Table = dict ()
+
+    def __init__ (self, datapoint, format) :
+        self.datapoint = datapoint
+        self.format    = format
+        self.size      = datapoint.size
+        self.nbytes    = (self.size + 7) // 8
+        self.mask      = (1 << self.size) - 1
+    # end def __init__
+
+    @classmethod
+    def Get (cls, datapoint) :
+        """The (cached) codec for `datapoint`."""
+        result = cls.Table.get (datapoint.id)
+        if result is None :
+            formats = [f for f in datapoint.formats if f is not None]
+            if len (formats) != 1 :
+                raise ValueError \
+                    ( "Datapoint %s has %d formats, only one is supported"
+                    % (datapoint.id, len (formats))
+                    )
+            format = formats [0]
+            for fcls, size, codec in Codecs :
+                if isinstance (format, fcls) and size in (None, datapoint.size) :
+                    break
+            else :
+                raise ValueError \
+                    ( "No codec for %s of datapoint %s"
+                    % (format.__class__.__name__, datapoint.id)
+                    )
+            result = cls.Table [datapoint.id] = codec (datapoint, format)
+        return result
+    # end def Get
+
+    def raw (self, payload) :
+        """The raw values of `payload` as uint64 array."""
+        payload = np.asarray (payload)
+        if payload.ndim == 2 :
+            result = np.zeros (len (payload), np.uint64)
+            for i in range (payload.shape [1]) :
+                result <<= np.uint64 (8)
+                result  |= payload [:, i].astype (np.uint64)
+            return result
+        return payload.astype (np.uint64)
+    # end def raw
+
+    def from_string (self, value) :
+        """The physical value of the string `value`, e.g. `"21.5"`."""
+        try :
+            return int (value)
+        except ValueError :
+            return float (value)
+    # end def from_string
+
+    def payload (self, raw) :
+        """The `(n, nbytes)` uint8 array of the raw values `raw`."""
+        raw    = np.asarray (raw, np.uint64)
+        result = np.empty ((len (raw), self.nbytes), np.uint8)
+        for i in range (self.nbytes) :
+            shift         = np.uint64 (8 * (self.nbytes - 1 - i))
+            result [:, i] = (raw >> shift) & np.uint64 (0xFF)
+        return result
+    # end def payload
+
+# end class Datapoint_Codec
+
+class Bit_Codec (Datapoint_Codec) :
+    """A boolean (DPT 1)"""
+
+    def decode (self, raw) :
+        return (self.raw (raw) & np.uint64 (1)).astype (bool)
+    # end def decode
+
+    def encode (self, values) :
+        return np.asarray (values).astype (bool).astype (np.uint64)
+    # end def encode
+
+    def from_raw (self, raw) :
+        return bool (raw & 1)
+    # end def from_raw
+
+    def to_raw (self, value) :
+        return int (bool (value))
+    # end def to_raw
+
+    def from_string (self, value) :
+        """`0`, `1`, `false`, `true` or the texts of the format"""
+        text = value.strip ().lower ()
+        if text in ("0", "false", (self.format.off or "0").lower ()) :
+            return False
+        if text in ("1", "true", (self.format.on or "1").lower ()) :
+            return True
+        raise ValueError \
+            ("Invalid value %r for %s" % (value, self.datapoint.id))
+    # end def from_string
+
+# end class Bit_Codec
+
+class Unsigned_Codec (Datapoint_Codec) :
+    """An unsigned integer, scaled by the coefficient (DPT 5, 7, 12) or
+       an enumeration.
+    """
+
+    def __init__ (self, datapoint, format) :
+        super ().__init__ (datapoint, format)
+        self.scale = getattr (format, "scale", 1)
+    # end def __init__
+
+    def decode (self, raw) :
+        raw = (self.raw (raw) & np.uint64 (self.mask)).astype (np.int64)
+        if self.scale == 1 :
+            return raw
+        return raw * self.scale
+    # end def decode
+
+    def encode (self, values) :
+        values = np.rint (np.asarray (values, np.float64) / self.scale)
+        return np.clip (values, 0, self.mask).astype (np.uint64)
+    # end def encode
+
+    def from_raw (self, raw) :
+        raw = raw & self.mask
+        if self.scale == 1 :
+            return raw
+        return raw * self.scale
+    # end def from_raw
+
+    def to_raw (self, value) :
+        return max (0, min (self.mask, round (value / self.scale)))
+    # end def to_raw
+
+# end class Unsigned_Codec
+
+class Signed_Codec (Datapoint_Codec) :
+    """A two's complement integer, scaled by the coefficient (DPT 6, 8, 13)"""
+
+    def __init__ (self, datapoint, format) :
+        super ().__init__ (datapoint, format)
+        self.scale = format.scale
+        self.sign  = 1 << (self.size - 1)
+    # end def __init__
+
+    def decode (self, raw) :
+        raw = (self.raw (raw) & np.uint64 (self.mask)).astype (np.int64)
+        if self.size < 64 :
+            raw -= (raw & self.sign) << 1
+        if self.scale == 1 :
+            return raw
+        return raw * self.scale
+    # end def decode
+
+    def encode (self, values) :
+        values = np.rint (np.asarray (values, np.float64) / self.scale)
+        values = np.clip (values, -self.sign, self.sign - 1).astype (np.int64)
+        return values.astype (np.uint64) & np.uint64 (self.mask)
+    # end def encode
+
+    def from_raw (self, raw) :
+        raw = raw & self.mask
+        raw = raw - ((raw & self.sign) << 1)
+        if self.scale == 1 :
+            return raw
+        return raw * self.scale
+    # end def from_raw
+
+    def to_raw (self, value) :
+        value = round (value / self.scale)
+        return max (-self.sign, min (self.sign - 1, value)) & self.mask
+    # end def to_raw
+
+# end class Signed_Codec
+
+class KNX_Float_Codec (Datapoint_Codec) :
+    """The 2 byte float of DPT 9: `0.01 * M * 2 ** E` with a 12 bit two's
+       complement mantissa `M` (sign in bit 15) and a 4 bit exponent `E`.
+       The raw value 0x7FFF is invalid data (NaN).
+    """
+
+    Invalid = 0x7FFF
+
+    def decode (self, raw) :
+        raw    = self.raw (raw).astype (np.int64)
+        m      = (raw & 0x7FF) - (raw & 0x8000 != 0) * 0x800
+        result = (m << ((raw >> 11) & 0xF)) * 0.01
+        result [raw == self.Invalid] = np.nan
+        return result
+    # end def decode
+
+    def encode (self, values) :
+        values = np.asarray (values, np.float64) * 100
+        e      = np.zeros (values.shape, np.int64)
+        m      = np.rint (values)
+        for _ in range (15) :
+            ### the smallest exponent for which the mantissa fits
+            big = (m < -0x800) | (m > 0x7FF)
+            if not big.any () :
+                break
+            e += big
+            m  = np.where (big, np.rint (np.ldexp (values, -e)), m)
+        nan    = np.isnan (m)
+        m      = np.clip (np.where (nan, 0, m), -0x800, 0x7FF).astype (np.int64)
+        result = ((m < 0) << 15) | (e << 11) | (m & 0x7FF)
+        result [result == self.Invalid] = self.Invalid - 1
+        result [nan] = self.Invalid
+        return result.astype (np.uint64)
+    # end def encode
+
+    def from_raw (self, raw) :
+        if raw == self.Invalid :
+            return float ("nan")
+        m = raw & 0x7FF
+        if raw & 0x8000 :
+            m -= 0x800
+        return (m << ((raw >> 11) & 0xF)) * 0.01
+    # end def from_raw
+
+    def to_raw (self, value) :
+        if value != value :
+            return self.Invalid
+        value = value * 100
+        m     = round (value)
+        e     = 0
+        while not -0x800 <= m <= 0x7FF and e < 15 :
+            e += 1
+            m  = round (value / (1 << e))
+        m     = max (-0x800, min (0x7FF, m))
+        raw   = ((m < 0) << 15) | (e << 11) | (m & 0x7FF)
+        if raw == self.Invalid :
+            ### the largest value is encoded as 0x7FFE
+            raw -= 1
+        return raw
+    # end def to_raw
+
+# end class KNX_Float_Codec
+
+class IEEE_Float_Codec (Datapoint_Codec) :
+    """The 4 byte IEEE 754 float of DPT 14"""
+
+    float_struct = struct.Struct (">f")
+    int_struct   = struct.Struct (">I")
+
+    def decode (self, raw) :
+        raw = self.raw (raw).astype (np.uint32)
+        with np.errstate (invalid = "ignore") :
+            ### signaling NaNs
+            return raw.view (np.float32).astype (np.float64)
+    # end def decode
+
+    def encode (self, values) :
+        values = np.asarray (values, np.float32)
+        return values.view (np.uint32).astype (np.uint64)
+    # end def encode
+
+    def from_raw (self, raw) :
+        return self.float_struct.unpack (self.int_struct.pack (raw)) [0]
+    # end def from_raw
+
+    def to_raw (self, value) :
+        return self.int_struct.unpack (self.float_struct.pack (value)) [0]
+    # end def to_raw
+
+# end class IEEE_Float_Codec
+
+class String_Codec (Datapoint_Codec) :
+    """A string with a fixed number of characters padded with 0 (DPT 16)"""
+
+    def __init__ (self, datapoint, format) :
+        super ().__init__ (datapoint, format)
+        self.encoding = format.encoding or "iso-8859-1"
+        self.code     = "S%d" % (self.nbytes, )
+    # end def __init__
+
+    def raw (self, payload) :
+        return np.ascontiguousarray (payload, np.uint8)
+    # end def raw
+
+    def payload (self, raw) :
+        return self.raw (raw)
+    # end def payload
+
+    def decode (self, raw) :
+        ### the trailing zeros are stripped by the bytes dtype
+        raw = self.raw (raw).view (self.code) [:, 0]
+        return np.char.decode (raw, self.encoding)
+    # end def decode
+
+    def encode (self, values) :
+        values = np.char.encode (np.asarray (values, str), self.encoding)
+        values = np.asarray (values, self.code)
+        return values.view (np.uint8).reshape (len (values), self.nbytes)
+    # end def encode
+
+    def from_raw (self, raw) :
+        return bytes (raw).rstrip (b"\0").decode (self.encoding)
+    # end def from_raw
+
+    def to_raw (self, value) :
+        return value.encode (self.encoding) [:self.nbytes].ljust \
+            (self.nbytes, b"\0")
+    # end def to_raw
+
+    def from_string (self, value) :
+        return value
+    # end def from_string
+
+# end class String_Codec
+
+### the codec for a format (and the size of the datapoint, None: any size)
+Codecs = \
+    ( (Bit,              None, Bit_Codec)
+    , (Float,              16, KNX_Float_Codec)
+    , (Float,              32, IEEE_Float_Codec)
+    , (Signed_Integer,   None, Signed_Codec)
+    , (Unsigned_Integer, None, Unsigned_Codec)
+    , (Enumeration,      None, Unsigned_Codec)
+    , (String,           None, String_Codec)
+    )
+
+### __END__ STG.Datapoint_Codec
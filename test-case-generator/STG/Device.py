@@ -31,6 +31,8 @@ from    STG.Parameter           import Parameter_Ref
 from    STG._Program_Object_    import When
 from    STG.Address             import Individual_Address
 from    STG.EEPROM              import EEPROM
+from    STG.Download_Planner    import Download_Planner
+from    STG.Differential_Download import Differential_Download
 from    STG.EEPROM_Table        import Address_Table, Association_Table, Com_Object_Table
 from    STG.Telegram            import Send_Value, Get_Value
 from    STG.Com_Object          import Com_Object
@@ -244,6 +246,24 @@ class Device_Instance :
         return result, eeprom.base
     # end def eeprom
 
+    def download_planner (self, defaults = None, ** kw) :
+        """Planner for the memory writes of the EEPROM image.
+
+           `defaults` is the current content of the device memory (see
+           `Download_Planner`).
+        """
+        image, address = self.eeprom ()
+        return Download_Planner (image, address, defaults, ** kw)
+    # end def download_planner
+
+    def differential_download (self, ** kw) :
+        """Download of the EEPROM image based on the memory read back
+           from the device.
+        """
+        image, address = self.eeprom ()
+        return Differential_Download (image, address, ** kw)
+    # end def differential_download
+
     @Once_Property
     def program (self) :
         return self.device.program
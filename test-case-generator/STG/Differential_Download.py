@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2015-2021 Martin Glueck All rights reserved
+# Neugasse 2, A--2244 Spannberg, Austria. martin@mangari.org
+# #*** <License> ************************************************************#
+# This module is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this module. If not, see <http://www.gnu.org/licenses/>.
+# #*** </License> ***********************************************************#
+#
+#++
+# Name
+#    STG.Differential_Download
+#
+# Purpose
+#    Rewrite only the changed bytes of the memory of a device
+#
+#--
+
+from    STG.Download_Planner    import Download_Planner
+from    STG.Telegram            import Memory_Read_Request, Memory_Read_Response
+
+class Differential_Download (Download_Planner) :
+    """Download of an EEPROM image based on the memory read back from
+       the device.
+
+       The current memory is read with the telegrams of `read_plan`, the
+       responses of the device are passed to `read_back`. The `write_plan`
+       then only writes the ranges which differ from the current memory;
+       bytes which have not been read back are always written.
+    """
+
+    def __init__ (self, image, address, ** kw) :
+        super ().__init__ (image, address, None, ** kw)
+        self.current = bytearray (len (self.image))
+        self.known   = bytearray (len (self.image))
+    # end def __init__
+
+    def read_plan (self, src, dst, pno = 0, ** kw) :
+        """The memory read requests for the memory of the image."""
+        result = []
+        size   = len (self.image)
+        for pno, offset in enumerate (range (0, size, self.max_chunk), pno) :
+            result.append \
+                ( Memory_Read_Request
+                    ( src     = src
+                    , dst     = dst
+                    , pno     = pno & 0x0F
+                    , count   = min (self.max_chunk, size - offset)
+                    , address = self.address + offset
+                    , ** kw
+                    )
+                )
+        return result
+    # end def read_plan
+
+    def read_back (self, responses) :
+        """Add the memory of the `Memory_Read_Response` telegrams in
+           `responses` (other telegrams are ignored), the telegrams can be
+           `Lazy_Telegram` instances as well.
+        """
+        size = len (self.image)
+        for t in responses :
+            tcls = getattr (t, "telegram_class", t.__class__)
+            if not issubclass (tcls, Memory_Read_Response) :
+                continue
+            offset = t.address - self.address
+            start  = max (offset, 0)
+            end    = min (offset + len (t.mem), size)
+            if start < end :
+                self.current [start : end] = t.mem [start - offset : end - offset]
+                self.known   [start : end] = b"\x01" * (end - start)
+        ### a byte which has not been read back never matches the image
+        self.defaults = bytes \
+            ( c if k else b ^ 0xFF
+              for (b, c, k) in zip (self.image, self.current, self.known)
+            )
+    # end def read_back
+
+    def write_plan (self, src, dst, pno = 0, ** kw) :
+        """The memory writes for the bytes which differ from the memory
+           read back.
+        """
+        return self.telegrams (src, dst, connect = False, pno = pno, ** kw)
+    # end def write_plan
+
+# end class Differential_Download
+### __END__ STG.Differential_Download
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2015-2021 Martin Glueck All rights reserved
+# Neugasse 2, A--2244 Spannberg, Austria. martin@mangari.org
+# #*** <License> ************************************************************#
+# This module is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this module. If not, see <http://www.gnu.org/licenses/>.
+# #*** </License> ***********************************************************#
+#
+#++
+# Name
+#    STG.Download_Planner
+#
+# Purpose
+#    Plan the memory write telegrams for the download of an EEPROM image
+#
+#--
+
+from    STG.Telegram        import Connect, Disconnect, Memory_Write
+
+class Download_Planner :
+    """Split an EEPROM image into a minimal number of memory writes.
+
+       Only the bytes which differ from `defaults` (the current content of
+       the device memory: bytes of the same size as the image, a fill
+       value or None if the content is unknown) are written. A memory write
+       covers up to `max_chunk` bytes (given by `max_apdu`, the maximum
+       APDU length of a frame), the bytes between two dirty ranges are
+       written too if this saves a telegram and if there are at most
+       `merge_gap` of them (None: no limit).
+    """
+
+    Max_APDU = 15   ### standard frame
+
+    def __init__ ( self, image, address, defaults = None
+                 , max_apdu  = Max_APDU
+                 , merge_gap = None
+                 ) :
+        self.image     = bytes (image)
+        self.address   = address
+        self.merge_gap = merge_gap
+        if isinstance (defaults, int) :
+            defaults   = bytes ((defaults, )) * len (self.image)
+        elif defaults is not None :
+            defaults   = bytes (defaults)
+            if len (defaults) != len (self.image) :
+                raise ValueError \
+                    ( "Size of defaults (%d) does not match the image (%d)"
+                    % (len (defaults), len (self.image))
+                    )
+        self.defaults  = defaults
+        ### the APCI and the memory address take 3 bytes of the APDU
+        self.max_chunk = min \
+            (max_apdu - 3, Memory_Write.fields ["count"].mask)
+    # end def __init__
+
+    def dirty_ranges (self) :
+        """The `(start, end)` offsets of the runs which differ from the
+           defaults.
+        """
+        image    = self.image
+        defaults = self.defaults
+        if defaults is None :
+            return [(0, len (image))] if image else []
+        result   = []
+        start    = None
+        for i, (b, d) in enumerate (zip (image, defaults)) :
+            if b != d :
+                if start is None :
+                    start = i
+            elif start is not None :
+                result.append ((start, i))
+                start = None
+        if start is not None :
+            result.append ((start, len (image)))
+        return result
+    # end def dirty_ranges
+
+    def chunks (self) :
+        """The `(offset, size)` of the memory writes.
+
+           Each chunk starts at the first dirty byte not covered yet and
+           ends with the last dirty byte in reach of `max_chunk` (and of
+           `merge_gap`), which gives the minimal number of chunks.
+        """
+        result = []
+        limit  = -1     ### end of the reach of the current chunk
+        gap    = self.merge_gap
+        for start, end in self.dirty_ranges () :
+            if gap is not None and result :
+                offset, size = result [-1]
+                if start - (offset + size) > gap :
+                    limit = -1  ### the gap is not written -> new chunk
+            while start < end :
+                if start < limit :
+                    offset, _ = result [-1]
+                    stop      = min (end, limit)
+                    result [-1] = (offset, stop - offset)
+                else :
+                    limit     = start + self.max_chunk
+                    stop      = min (end, limit)
+                    result.append ((start, stop - start))
+                start = stop
+        return result
+    # end def chunks
+
+    def telegrams (self, src, dst, connect = True, pno = 0, ** kw) :
+        """The telegrams of the download from `src` to the device `dst`.
+
+           With `connect` the memory writes are sent in a connection,
+           `pno` is the sequence number of the first memory write,
+           additional `kw` are passed to all telegrams (e.g. `priority`).
+        """
+        result = []
+        if connect :
+            result.append (Connect (src = src, dst = dst, ** kw))
+        for pno, (offset, size) in enumerate (self.chunks (), pno) :
+            result.append \
+                ( Memory_Write
+                    ( src     = src
+                    , dst     = dst
+                    , pno     = pno & 0x0F
+                    , count   = size
+                    , address = self.address + offset
+                    , mem     = self.image [offset : offset + size]
+                    , ** kw
+                    )
+                )
+        if connect :
+            result.append (Disconnect (src = src, dst = dst, ** kw))
+        return result
+    # end def telegrams
+
+# end class Download_Planner
+### __END__ STG.Download_Planner
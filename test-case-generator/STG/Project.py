@@ -26,6 +26,7 @@
 
 from   STG._Object_     import _STG_Object_
 from   STG.Address      import Individual_Address, Group_Address
+from   STG.Datapoint    import Datapoint
 
 class Project (_STG_Object_) :
     """A EIB project"""
@@ -53,11 +54,14 @@ class Project (_STG_Object_) :
     def _setup_group_addresses (self) :
         self.group_addresses = dict ()
         for ga in self.xpath (self.prj_xml, "//E:GroupAddress") :
-            ga = Group_Address \
+            dpt = ga.get ("DatapointType")
+            ga  = Group_Address \
                 ( int (ga.get ("Address"))
                 , ga.get ("Name")
                 , ga.get ("Id")
                 )
+            if dpt :
+                ga.datapoint = Datapoint.Table.get (dpt.split (" ") [-1])
             self.group_addresses [ga.id]    = ga
             #self.group_addresses [ga.value] = ga
             #self.group_addresses [str (ga)] = ga
@@ -23,6 +23,7 @@
 # Purpose
 #    De/Encoding of a EIB telegram
 #--
+import   functools
 import   struct
 
 Undefined = object ()
@@ -44,6 +45,12 @@ class _Field_ :
         assert not kw, kw
     # end def __init__
 
+    def as_bytes (self, result, value, telegram) :
+        buffer = bytearray (result)
+        self.encode (buffer, value, telegram)
+        return bytes (buffer)
+    # end def as_bytes
+
 # end class _Field_
 
 class Int_Field (_Field_) :
@@ -59,21 +66,22 @@ class Int_Field (_Field_) :
             self.code = "%sH" % (byte_order, )
         else :
             self.code = "%sI" % (byte_order, )
-        self.size     = struct.calcsize (self.code)
+        self.struct   = struct.Struct (self.code)
+        self.size     = self.struct.size
+        ### shifts of the bytes of the big endian value
+        self.shifts   = tuple \
+            ((self.offset + o, 8 * (self.size - 1 - o)) for o in range (self.size))
     # end def __init__
 
-    def as_bytes (self, result, value, telegram) :
-        off = self.offset
-        raw = struct.pack (self.code, (value & self.mask) << self.shift)
-        new = []
-        for o in range (self.size) :
-            new.append (bytes ([int (result [off + o]) | int (raw [o])]))
-        return result [:off] + b"".join (new) + result [off + self.size:]
-    # end def as_bytes
+    def encode (self, buffer, value, telegram) :
+        value = (value & self.mask) << self.shift
+        for off, shift in self.shifts :
+            buffer [off] |= (value >> shift) & 0xFF
+    # end def encode
 
     def from_bytes (self, bytes, kw) :
-        raw = bytes [self.offset : self.offset + self.size]
-        return (struct.unpack (self.code, raw) [0] >> self.shift) & self.mask
+        value = self.struct.unpack_from (bytes, self.offset) [0]
+        return (value >> self.shift) & self.mask
     # end def from_bytes
 
     def as_string (self, telegram) :
@@ -81,9 +89,25 @@ class Int_Field (_Field_) :
     # end def as_string
 
     def from_string (self, telegram, value) :
-        return eval (value)
+        return self.Parse_Literal (value)
     # end def from_string
 
+    @staticmethod
+    @functools.lru_cache (maxsize = 4096)
+    def Parse_Literal (value) :
+        """The integer value of the string `value`: a number in the notation
+           of a Python integer literal (e.g. `12`, `0x0C`, `0b1100`) or a
+           physical (`1.1.254`) or group (`1/2/3`) address.
+        """
+        text = value.strip ()
+        try :
+            if "." in text or "/" in text :
+                return _Address_.Value.Parse (text)
+            return int (text, 0)
+        except ValueError :
+            raise ValueError ("Invalid literal %r" % (value, ))
+    # end def Parse_Literal
+
 # end class Int_Field
 
 class Value_Field (Int_Field) :
@@ -97,50 +121,66 @@ class Value_Field (Int_Field) :
         , 32 : "I"
         , 64 : "Q"
         }
-
-    def as_bytes (self, result, value, telegram) :
+    structs = dict ((l, struct.Struct (c)) for (l, c) in struct_code.items ())
+
+    def encode (self, buffer, value, telegram) :
+        codec = telegram.codec
+        if codec is not None :
+            ### `value` is the physical value of the datapoint, the raw
+            ### value is sent in big endian byte order
+            value = codec.to_raw (value)
+            if telegram.length >= 7 and not isinstance (value, bytes) :
+                value = value.to_bytes ((telegram.length + 7) // 8, "big")
         if telegram.length < 7 :
             ### if only 6 bits of data needs to be sent they fit into the
             ### 7th byte of the telegram
-            return super ().as_bytes (result, value, telegram)
+            return super ().encode (buffer, value, telegram)
         # more than 6 bits of data -> pack them at the end of the telegram
         # starting with byte 8
         off = self.offset + 1
-        if isinstance (value, bytes) :
-            new = value
-        else :
-            ssize = telegram.length #telegram.length + 7) // 8
-            new   = struct.pack (self.struct_code [ssize], value)
-        size = (telegram.length + 7) // 8
-        return result [:off] + new + result [off + size:]
-    # end def as_bytes
+        if not isinstance (value, bytes) :
+            value = self.structs [telegram.length].pack (value)
+        buffer [off : off + (telegram.length + 7) // 8] = value
+    # end def encode
+
+    def from_string (self, telegram, value) :
+        codec = telegram.codec
+        if codec is not None :
+            return codec.from_string (value)
+        return super ().from_string (telegram, value)
+    # end def from_string
 
 # end class Value_Field
 
 class Memory_Count_Field (Int_Field) :
     """The number of bytes for a memory transfer"""
 
-    def as_bytes (self, result, value, telegram) :
+    def encode (self, buffer, value, telegram) :
         if value is None :
             value = len (telegram.mem)
-        return super (Memory_Count_Field, self).as_bytes \
-            (result, value, telegram)
-    # end def as_bytes
+        if not 0 <= value <= self.mask :
+            raise ValueError \
+                ( "Memory transfer of %d bytes, at most %d are possible"
+                % (value, self.mask)
+                )
+        super ().encode (buffer, value, telegram)
+    # end def encode
 
 # end class Memory_Count_Field
 
 class Memory_Value_Field (Int_Field) :
     """Special handling of values for memory transfers"""
 
-    def as_bytes (self, result, value, telegram) :
+    def encode (self, buffer, value, telegram) :
         off = self.offset
         if telegram.count is None :
             telegram.count = len (value)
-        return result [:off] + value + result [off + telegram.count:]
-    # end def as_bytes
+        buffer [off : off + telegram.count] = value
+    # end def encode
 
     def from_bytes (self, bytes, kw) :
-        return bytes [self.offset : self.offset + kw ["count"]]
+        ### `b"" +` copies the data, also for a slice of a memoryview
+        return b"" + bytes [self.offset : self.offset + kw ["count"]]
     # end def from_bytes
 
 # end class Memory_Value_Field
@@ -150,7 +190,7 @@ class Mapping_Field (Int_Field) :
 
     def __init__ (self, * args, ** kw) :
         self.mapping = kw.pop ("mapping")
-        self.gnippam = dict ((v, str (k)) for (k, v) in self.mapping.items ())
+        self.gnippam = dict ((v, k) for (k, v) in self.mapping.items ())
         super ().__init__ (* args, ** kw)
     # end def __init__
 
@@ -159,8 +199,10 @@ class Mapping_Field (Int_Field) :
     # end def as_string
 
     def from_string (self, telegram, value) :
-        return super ().from_string \
-            (telegram, self.gnippam.get (value, value))
+        try :
+            return self.gnippam [value]
+        except KeyError :
+            return super ().from_string (telegram, value)
     # end def from_string
 
 # end class Mapping_Field
@@ -174,10 +216,13 @@ class _Address_ (_Field_) :
                     , ("line",    0x0F00,  8)
                     , ("address", 0x00FF,  0)
                     )
-        group     = ( ("main",    0x7800, 11)
+        group     = ( ("main",    0xF800, 11)
                     , ("middle",  0x0700,  8)
                     , ("sub",     0x00FF,  0)
                     )
+        group_2   = ( ("main",    0xF800, 11)
+                    , ("sub",     0x07FF,  0)
+                    )
         seperator = "./"
 
         def __init__ (self, value, group) :
@@ -201,37 +246,54 @@ class _Address_ (_Field_) :
 
         @classmethod
         def From_String (cls, value) :
-            if "." in value :
-                sep  = "."
-                spec = cls.physical
+            return cls (cls.Parse (value), "/" in value)
+        # end def From_String
+
+        @classmethod
+        @functools.lru_cache (maxsize = 4096)
+        def Parse (cls, value) :
+            """The integer value of the physical (`1.1.254`) or group
+               (`1/2/3` or `1/515`) address `value`.
+            """
+            if "/" in value :
+                sep   = "/"
+                specs = {3 : cls.group, 2 : cls.group_2}
             else :
-                sep  = "/"
-                spec = cls.group
-            parts    = value.split (sep)
-            result   = 0
+                sep   = "."
+                specs = {3 : cls.physical}
+            parts     = value.split (sep)
+            spec      = specs.get (len (parts))
+            if spec is None or not all (p.strip ().isdigit () for p in parts) :
+                raise ValueError ("Invalid address %r" % (value, ))
+            result    = 0
             for v, (n, m, s) in zip (parts, spec) :
-                result |= int (v) << s
-            return cls (result, sep == "/")
-        # end def From_String
+                v = int (v)
+                if not 0 <= v <= m >> s :
+                    raise ValueError \
+                        ( "Invalid %s %d of address %r (0..%d)"
+                        % (n, v, value, m >> s)
+                        )
+                result |= v << s
+            return result
+        # end def Parse
 
     # end class Value
 
+    struct = struct.Struct ("!H")
+
     def __init__ (self, name, offset) :
         super ().__init__ (name, offset, 0, 0xFFFF, important = True)
     # end def __init__
 
-    def as_bytes (self, result, value, telegram) :
+    def encode (self, buffer, value, telegram) :
         off   = self.offset
-        value = int (value)
-        raw   = struct.pack ("!H", (value & self.mask) << self.shift)
-        new   = []
-        for o in range (2) :
-            new.append (bytes ([int (result [off + o]) | int (raw [o])]))
-        return result [:off] + b"".join (new) + result [off + 2:]
-    # end def as_bytes
+        value = (int (value) & self.mask) << self.shift
+        buffer [off]     |= value >> 8
+        buffer [off + 1] |= value & 0xFF
+    # end def encode
 
     def from_bytes (self, bytes, kw) :
-        value = struct.unpack (b"!H", bytes [self.offset:self.offset + 2]) [0]
+        value = self.struct.unpack_from (bytes, self.offset) [0]
         return self.Value (value, self.kind (bytes))
     # end def from_bytes
 
@@ -276,11 +338,18 @@ class Boolean_Field (Mapping_Field) :
 class M_Sub_Type (type) :
     """Meta class for sub type classes."""
 
+    ### the bits of the frame used for the dispatch table of `Find_Class`:
+    ### the frame type of the control field, the TPCI and the APCI byte
+    Dispatch_Masks = {0 : 0xC0, 6 : 0xFF, 7 : 0xFF}
+
     def __init__ (cls, name, bases, dct) :
         super (M_Sub_Type, cls).__init__ (name, bases, dct)
         Fields = list (getattr (cls, "Fields", ()))
         if not name.startswith ("_") :
             cls.__bases__ [0].Sub_Types [cls.Sub_Type_Id] = cls
+            for b in cls.__mro__ [1:] :
+                if "_dispatch" in b.__dict__ :
+                    b._dispatch = None
             off, shift, mask  = bases [0].Match
             cls.Sub_Type_Base = bases [0]
             if mask > 0xFF :
@@ -295,14 +364,100 @@ class M_Sub_Type (type) :
         for n, f in cls.fields.items () :
             if n not in cls.Defaults :
                 cls.Defaults [n] = f.default
+        cls._Compile ()
     # end def __init__
 
+    def _Compile (cls) :
+        """Precompute the field order and the encode/decode plan.
+
+           Each step of a plan is `(name, offset, mask, shift, function)`;
+           single byte integer fields are handled inline by `bytes` and
+           `From_Raw` (function is None), all other fields call their
+           `encode` resp. `from_bytes` method.
+        """
+        cls._sorted_fields = tuple \
+            ( sorted ( cls.fields.values ()
+                     , key = lambda f : (f.offset, -f.shift)
+                     )
+            )
+        encode = []
+        decode = []
+        for f in cls._sorted_fields :
+            simple = getattr (f, "size", 0) == 1
+            encode.append \
+                ( ( f.name, f.offset, f.mask, f.shift
+                  , None if simple and type (f).encode is Int_Field.encode
+                    else f.encode
+                  )
+                )
+            decode.append \
+                ( ( f.name, f.offset, f.mask, f.shift
+                  , None if simple and type (f).from_bytes is Int_Field.from_bytes
+                    else f.from_bytes
+                  )
+                )
+        cls._encode_plan = tuple (encode)
+        cls._decode_plan = tuple (decode)
+        cls._decoders    = dict ((step [0], step) for step in decode)
+        cls._length      = cls.fields.get ("length")
+    # end def _Compile
+
+    def _Dispatch_Table (cls) :
+        """Table of the sub classes indexed by the `Dispatch_Masks` bits.
+
+           An entry is the most specific class which can be determined by
+           these bits; `Find_Class` continues the search from there if the
+           class has sub types which depend on other bits of the frame or if
+           the sub type is unknown (which raises the KeyError).
+        """
+        table = [cls] * (1 << 18)
+        def _fill (c, candidates) :
+            for v0 in candidates [0] :
+                for v6 in candidates [6] :
+                    key = (v0 << 10) | (v6 << 8)
+                    for v7 in candidates [7] :
+                        table [key | v7] = c
+        def _walk (c, candidates) :
+            _fill (c, candidates)
+            if "Sub_Types" not in c.__dict__ :
+                return
+            off, shift, mask = c.Match
+            bits             = cls.Dispatch_Masks.get (off, 0)
+            if mask > 0xFF or (mask << shift) & ~bits :
+                return
+            for type_id, sub in c.Sub_Types.items () :
+                values = [ v for v in candidates [off]
+                           if (v >> shift) & mask == type_id
+                         ]
+                sub_candidates       = dict (candidates)
+                sub_candidates [off] = values
+                _walk (sub, sub_candidates)
+        _walk \
+            ( cls
+            , dict ( (off, [v for v in range (256) if not v & ~mask])
+                   for (off, mask) in cls.Dispatch_Masks.items ()
+                   )
+            )
+        cls._dispatch = table
+        return table
+    # end def _Dispatch_Table
+
+    @property
+    def Dispatch_Table (cls) :
+        """The dispatch table indexed by
+           `(b [0] & 0xC0) << 10 | b [6] << 8 | b [7]` of a frame `b`.
+        """
+        return cls.__dict__.get ("_dispatch") or cls._Dispatch_Table ()
+    # end def Dispatch_Table
+
     def Find_Class (cls, bytes) :
         result = cls
-        #import pdb; pdb.set_trace ()
+        if "Sub_Types" in cls.__dict__ and len (bytes) > 7 :
+            result = cls.Dispatch_Table \
+                [((bytes [0] & 0xC0) << 10) | (bytes [6] << 8) | bytes [7]]
         while "Sub_Types" in result.__dict__ :
             off, shift, mask = result.Match
-            if mask < 0xFF :
+            if mask <= 0xFF :
                 type_id      = (bytes [off] >> shift) & mask
             else :
                 type_id      = ((bytes [off] << 8) + bytes [off + 1]) & mask
@@ -311,19 +466,61 @@ class M_Sub_Type (type) :
         return result
     # end def Find_Class
 
-    def From_Raw (cls, bytes) :
+    def _Standard_Frame (cls, bytes) :
+        """The class and the frame in the layout of a standard frame."""
         tcls = cls.Find_Class (bytes)
-        kw   = dict ()
-        for f in tcls.sorted_fields :
-            kw [f.name] = f.from_bytes (bytes, kw)
+        if tcls is Extended_Data_Request :
+            bytes = tcls.Standard_Layout (bytes)
+            tcls  = Data_Request.Find_Class (bytes)
+        return tcls, bytes
+    # end def _Standard_Frame
+
+    def From_Raw (cls, bytes) :
+        tcls, bytes = cls._Standard_Frame (bytes)
+        kw          = dict ()
+        for name, off, mask, shift, decode in tcls._decode_plan :
+            if decode is None :
+                kw [name] = (bytes [off] >> shift) & mask
+            else :
+                kw [name] = decode (bytes, kw)
         return tcls (** kw)
     # end def From_Raw
 
+    def From_Raw_Lazy (cls, bytes) :
+        tcls, bytes = cls._Standard_Frame (bytes)
+        return Lazy_Telegram (tcls, memoryview (bytes))
+    # end def From_Raw_Lazy
+
+    def From_Raw_Many (cls, buffer, lazy = False) :
+        """Generate the telegrams of the frames concatenated in `buffer`.
+
+           Each frame is a standard or extended frame including the
+           checksum, its size is taken from the length field. The frames
+           are decoded from slices of a memoryview of `buffer`, they are
+           not copied. With `lazy` the result are `Lazy_Telegram` instances.
+        """
+        view = memoryview (buffer)
+        end  = len (view)
+        pos  = 0
+        while pos < end :
+            if end - pos < 8 :
+                raise ValueError ("Truncated frame at offset %d" % (pos, ))
+            if view [pos] & 0xC0 :
+                size = 8 + (view [pos + 5] & 0x0F)
+            else :
+                size = 9 + view [pos + 6]
+            if pos + size > end :
+                raise ValueError ("Truncated frame at offset %d" % (pos, ))
+            if lazy :
+                yield cls.From_Raw_Lazy (view [pos : pos + size])
+            else :
+                yield cls.From_Raw (view [pos : pos + size])
+            pos += size
+    # end def From_Raw_Many
+
     @property
     def sorted_fields (cls) :
-        return sorted ( cls.fields.values ()
-                      , key = lambda f : (f.offset, -f.shift)
-                      )
+        return cls._sorted_fields
     # end def sorted_fields
 
 # end class M_Sub_Type
@@ -335,8 +532,15 @@ class _Telegram_ (metaclass = M_Sub_Type) :
     Sub_Types = {}
     Defaults  = {}
     payload_length = 0
+    codec     = None    ### `Datapoint_Codec` for the value of a `Value_Field`
 
     def __init__ (self, ** kw) :
+        codec = kw.pop ("codec", None)
+        if codec is not None :
+            ### the length of the value defaults to the size of the datapoint
+            self.codec = codec
+            if "length" in self.fields :
+                kw.setdefault ("length", codec.size)
         for n, f in self.fields.items () :
             v = kw.pop (n, self.Defaults [f.name])
             if isinstance (v, str) :
@@ -362,18 +566,28 @@ class _Telegram_ (metaclass = M_Sub_Type) :
 
     @property
     def bytes (self) :
-        #import pdb; pdb.set_trace ()
-        result      = bytes ([0x00] * 23)
-        for f in self.__class__.sorted_fields :
-            result = f.as_bytes (result, getattr (self, f.name), self)
-            #print ("   ", f.name, getattr (self, f.name), ", ".join ("0x%02X" % b for b in result [:6]))
-        size = 7 + self.payload_length
-        ###print (size)
-        result = self.fields ["length"].as_bytes (result, size - 7, self)
+        ### all fields are written into one buffer in the order of the
+        ### encode plan of the class
+        result = bytearray (23)
+        for name, off, mask, shift, encode in self.__class__._encode_plan :
+            if encode is None :
+                result [off] |= (getattr (self, name) & mask) << shift
+            else :
+                encode (result, getattr (self, name), self)
+        length = self.payload_length
+        if length > 0x0F or not result [0] & 0xC0 :
+            result = Extended_Data_Request.Extended_Layout (result, length)
+        else :
+            ### the `length` attribute of a `Value_Field` is the number of
+            ### bits of the value, not the length field
+            result [5] &= 0xF0
+            self.__class__._length.encode (result, length, self)
+            del result [7 + length:]
         csum = 0xFF
-        for b in result [:size] :
+        for b in result :
             csum ^= b
-        return result [:size] + bytes ((csum, ))
+        result.append (csum)
+        return bytes (result)
     # end def bytes
 
     def __call__ (self, value) :
@@ -392,6 +606,85 @@ class _Telegram_ (metaclass = M_Sub_Type) :
 
 # end class _Telegram_
 
+class Lazy_Telegram :
+    """A received telegram which decodes its fields on first access.
+
+       Only the raw frame (usually a slice of a memoryview of a larger
+       buffer) and the telegram class are stored; a field is decoded with
+       the decode plan of the telegram class when it is accessed.
+    """
+
+    __slots__ = ("raw", "telegram_class", "_values")
+
+    def __init__ (self, telegram_class, raw) :
+        self.telegram_class = telegram_class
+        self.raw            = raw
+        self._values        = None
+    # end def __init__
+
+    def __getattr__ (self, name) :
+        ### `copy` and `pickle` look up special methods and the slots on
+        ### an instance whose slots are not set yet
+        if name.startswith ("__") or name in Lazy_Telegram.__slots__ :
+            raise AttributeError (name)
+        values = self._values
+        if values is None :
+            values = self._values = {}
+        elif name in values :
+            return values [name]
+        try :
+            _, off, mask, shift, decode = self.telegram_class._decoders [name]
+        except KeyError :
+            raise AttributeError (name)
+        if decode is None :
+            value = (self.raw [off] >> shift) & mask
+        else :
+            value = decode (self.raw, self)
+        values [name] = value
+        return value
+    # end def __getattr__
+
+    def __getitem__ (self, name) :
+        ### the fields by name, for the `kw` argument of `from_bytes`
+        return getattr (self, name)
+    # end def __getitem__
+
+    @property
+    def fields (self) :
+        return self.telegram_class.fields
+    # end def fields
+
+    @property
+    def attributes (self) :
+        result = {}
+        for f in self.telegram_class.sorted_fields :
+            result [f.name] = getattr (self, f.name)
+        return result
+    # end def attributes
+
+    @property
+    def bytes (self) :
+        if self.raw [0] & 0xC0 :
+            return bytes (self.raw)
+        ### `raw` of an extended frame is in the layout of a standard frame
+        return self.telegram ().bytes
+    # end def bytes
+
+    def telegram (self) :
+        """The completely decoded telegram."""
+        return self.telegram_class (** self.attributes)
+    # end def telegram
+
+    def __str__ (self) :
+        result = []
+        for f in self.telegram_class.sorted_fields :
+            if f.important :
+                result.append ("%s=%s" % (f.name, f.as_string (self)))
+        return "%s (%s)" % (self.telegram_class.__name__, ",".join (result))
+    # end def __str__
+
+# end class Lazy_Telegram
+
 class Data_Request (_Telegram_) :
     """A normal data request telegram"""
 
@@ -425,8 +718,54 @@ class Data_Request (_Telegram_) :
 # end class Data_Request
 
 class Extended_Data_Request (_Telegram_) :
-    """An extended data request"""
+    """An extended data request
+
+       The extended control field at offset 1 holds the group address flag,
+       the routing counter and the extended frame format, the length field
+       at offset 6 has 8 bits, so the APDU can have up to `Max_Length` + 1
+       bytes. The services of `Data_Request` are used for extended frames
+       as well: a received frame is converted into the layout of a standard
+       frame, the frame type bits of its control field stay 0b00.
+
+       A telegram is sent as extended frame if it does not fit into a
+       standard frame or if its frame type bits (`reserved_1` and
+       `data_request`) are 0b00, as for a telegram received in an extended
+       frame.
+    """
+
     Sub_Type_Id   = 0b00
+    Max_Length    = 254
+
+    @staticmethod
+    def Standard_Layout (frame) :
+        """The extended `frame` in the layout of a standard frame."""
+        length  = frame [6]
+        result  = bytearray (frame [0 : 1])
+        result += frame [2 : 6]
+        result.append ((frame [1] & 0xF0) | (length & 0x0F))
+        result += frame [7 : 8 + length]
+        return result
+    # end def Standard_Layout
+
+    @classmethod
+    def Extended_Layout (cls, buffer, length) :
+        """The extended frame (without checksum) for the standard layout
+           `buffer` with `length` bytes after the TPCI.
+        """
+        if length > cls.Max_Length :
+            raise ValueError \
+                ( "Payload of %d bytes does not fit into an extended frame"
+                % (length, )
+                )
+        if len (buffer) < 7 + length :
+            buffer.extend (bytes (7 + length - len (buffer)))
+        result  = bytearray ((buffer [0] & 0x3F, buffer [5] & 0xF0))
+        result += buffer [1 : 5]
+        result.append (length)
+        result += buffer [6 : 7 + length]
+        return result
+    # end def Extended_Layout
+
 # end class Extended_Data_Request
 
 class Poll_Data_Request (_Telegram_) :
@@ -626,8 +965,8 @@ class Numbered_Data_Packet_b11 (Numbered_Data_Packet_Base) :
 class Memory_Read_Request (Numbered_Data_Packet_b10_Base) :
     Sub_Type_Id = 0b00
     Fields      = \
-        ( Int_Field ("count",   7, 0, 0xF,    important = True)
-        , Int_Field ("address", 8, 0, 0xFFFF, important = True)
+        ( Memory_Count_Field ("count",   7, 0, 0x3F,   important = True)
+        , Int_Field          ("address", 8, 0, 0xFFFF, important = True)
         )
     payload_length = 3
 
@@ -636,7 +975,7 @@ class Memory_Read_Request (Numbered_Data_Packet_b10_Base) :
 class Memory_Read_Response (Numbered_Data_Packet_b10_Base):
     Sub_Type_Id = 0b01
     Fields      = \
-        ( Memory_Count_Field ("count",    7, 0, 0xF,    important = True)
+        ( Memory_Count_Field ("count",    7, 0, 0x3F,   important = True)
         , Int_Field          ("address",  8, 0, 0xFFFF, important = True)
         , Memory_Value_Field ("mem",     10, 0, 0)
         )
@@ -653,7 +992,7 @@ class Memory_Read_Response (Numbered_Data_Packet_b10_Base):
 class Memory_Read_Value (Numbered_Data_Packet_b10_Base) :
     Sub_Type_Id = 0b10
     Fields      = \
-        ( Memory_Count_Field ("count",    7, 0, 0xF,    important = True)
+        ( Memory_Count_Field ("count",    7, 0, 0x3F,   important = True)
         , Int_Field          ("address",  8, 0, 0xFFFF, important = True)
         , Memory_Value_Field ("mem",     10, 0, 0)
         )
@@ -666,6 +1005,9 @@ class Memory_Read_Value (Numbered_Data_Packet_b10_Base) :
 
 # end class Memory_Read_Value
 
+### APCI 0x280 (sub type 0b10) is the memory write service
+Memory_Write = Memory_Read_Value
+
 class ADC_Value_Request (Numbered_Data_Packet_b01) :
     Sub_Type_Id = 0b10
     Fields      = ( Int_Field ("channel", 7, 0, 0x3F, 0, important = True)
@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2015-2021 Martin Glueck All rights reserved
+# Neugasse 2, A--2244 Spannberg, Austria. martin@mangari.org
+# #*** <License> ************************************************************#
+# This module is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this module. If not, see <http://www.gnu.org/licenses/>.
+# #*** </License> ***********************************************************#
+#
+#++
+# Name
+#    STG.Telegram_Store
+#
+# Purpose
+#    Columnar store for the telegrams of large bus logs
+#--
+from    STG.Telegram        import _Telegram_, _Address_, Data_Request
+import  numpy               as     np
+
+class Telegram_Store :
+    """Received telegrams as columns of a numpy structured array.
+
+       The frames itself are stored one after the other in a shared payload
+       buffer, the `offset` column is the start of the frame in the buffer.
+       `kind` is the index of the name of the telegram class (as found by
+       `_Telegram_.Find_Class`) in `kinds`.
+    """
+
+    dtype     = np.dtype \
+        ( [ ("time",     "<f8")
+          , ("src",      "<u2")
+          , ("dst",      "<u2")
+          , ("group",    "u1")
+          , ("priority", "u1")
+          , ("tpci",     "u1")
+          , ("apci",     "<u2")
+          , ("length",   "u1")
+          , ("kind",     "u1")
+          , ("offset",   "<u8")
+          ]
+        )
+    No_APCI   = 0xFFFF      ### apci of frames without an APCI (length 0)
+    Columns   = \
+        ( ("src",      "src")
+        , ("dst",      "dst")
+        , ("group",    "group_address")
+        , ("priority", "priority")
+        , ("length",   "length")
+        )
+    ### cache of `_Kind_Table`: (dispatch table, kind table, kinds)
+    _kind_table = None
+
+    def __init__ (self, records, payload, kinds) :
+        self.records = records
+        self.payload = payload
+        self.kinds   = tuple (kinds)
+    # end def __init__
+
+    @classmethod
+    def From_Frames (cls, frames) :
+        """Create a store from an iterable of `(time, frame)` pairs.
+
+           `frame` is the raw standard frame including the checksum, e.g.
+           the frames of `knxhelper.read_frames` with the time `ss / rate`.
+           Records with less than 8 bytes (acknowledge frames) and frames
+           whose size does not match their length field are skipped, an
+           extended frame raises a `ValueError`.
+        """
+        payload = bytearray ()
+        offsets = []
+        times   = []
+        for time, frame in frames :
+            offsets.append (len (payload))
+            times.append   (time)
+            payload       += frame
+        payload = np.frombuffer (bytes (payload), np.uint8)
+        offsets = np.array (offsets, np.uint64)
+        return cls._From_Columns (payload, offsets, np.array (times, "<f8"))
+    # end def From_Frames
+
+    @classmethod
+    def _From_Columns (cls, payload, offsets, times) :
+        """The frames start at `offsets` and follow each other in `payload`."""
+        sizes              = np.diff \
+            (offsets.astype (np.int64), append = len (payload))
+        valid              = sizes >= 8
+        starts             = offsets [valid].astype (np.intp)
+        extended           = (payload [starts] & 0xC0) == 0
+        if extended.any () :
+            raise ValueError \
+                ( "Frame %d is an extended frame, only standard frames "
+                  "can be stored"
+                % (np.flatnonzero (valid) [extended.argmax ()], )
+                )
+        valid [valid]      = \
+            sizes [valid] == 8 + (payload [starts + 5] & 0x0F)
+        offsets            = offsets [valid]
+        times              = times   [valid]
+        records            = np.zeros (len (offsets), cls.dtype)
+        records ["time"]   = times
+        records ["offset"] = offsets
+        offsets            = offsets.astype (np.intp)
+        for column, name in cls.Columns :
+            records [column] = cls._field \
+                (payload, offsets, Data_Request.fields [name])
+        b6                 = payload [offsets + 6].astype (np.uint32)
+        b7                 = payload [offsets + 7].astype (np.uint32)
+        records ["tpci"]   = b6
+        records ["apci"]   = np.where \
+            ( records ["length"] > 0
+            , ((b6 & 0x03) << 8) | b7
+            , cls.No_APCI
+            )
+        table, kinds       = cls._Kind_Table ()
+        b0                 = payload [offsets].astype (np.uint32)
+        records ["kind"]   = table [((b0 & 0xC0) << 10) | (b6 << 8) | b7]
+        return cls (records, payload, kinds)
+    # end def _From_Columns
+
+    @classmethod
+    def _Kind_Table (cls) :
+        """The `kind` of each entry of `_Telegram_.Dispatch_Table` as uint8
+           array and the names of the telegram classes.
+
+           The result is cached until the dispatch table is rebuilt after a
+           new sub type was registered.
+        """
+        dispatch = _Telegram_.Dispatch_Table
+        cached   = cls._kind_table
+        if cached is None or cached [0] is not dispatch :
+            kinds = []
+            index = {}
+            for c in dispatch :
+                if c not in index :
+                    index [c] = len (kinds)
+                    kinds.append (c.__name__)
+            table  = np.array ([index [c] for c in dispatch], np.uint8)
+            cached = Telegram_Store._kind_table = \
+                (dispatch, table, tuple (kinds))
+        return cached [1:]
+    # end def _Kind_Table
+
+    @staticmethod
+    def _field (payload, offsets, field) :
+        """Vectorized decoding of the `_Field_` `field` of all frames."""
+        result = np.zeros (len (offsets), np.uint32)
+        for o in range (field.struct.size) :
+            result = (result << 8) | payload [offsets + (field.offset + o)]
+        return (result >> field.shift) & field.mask
+    # end def _field
+
+    @staticmethod
+    def Address_Pattern (pattern) :
+        """Mask, value and group flag of an address pattern.
+
+           The parts of the pattern are numbers or `*`, e.g. `1/2/*` or
+           `1.1.*`; missing parts at the end of a physical address match
+           any value. A group address pattern needs all three parts:
+           `_Address_.Value.Parse` reads `1/2` as main group 1, sub group 2
+           (two level), a pattern `1/2` would match `1/2/*` (three level).
+           A part which is out of the range of its field raises a
+           `ValueError`.
+        """
+        if "/" in pattern :
+            sep, spec, group = "/", _Address_.Value.group,    1
+        else :
+            sep, spec, group = ".", _Address_.Value.physical, 0
+        parts = [p.strip () for p in pattern.split (sep)]
+        if len (parts) > len (spec) or (group and len (parts) < len (spec)) :
+            raise ValueError ("Invalid address pattern %r" % (pattern, ))
+        mask  = value = 0
+        for part, (n, m, s) in zip (parts, spec) :
+            if part == "*" :
+                continue
+            if not part.isdigit () :
+                raise ValueError ("Invalid address pattern %r" % (pattern, ))
+            v = int (part)
+            if v > m >> s :
+                raise ValueError \
+                    ( "Invalid %s %d of address pattern %r (0..%d)"
+                    % (n, v, pattern, m >> s)
+                    )
+            mask  |= m
+            value |= v << s
+        return mask, value, group
+    # end def Address_Pattern
+
+    def mask (self, src = None, dst = None, service = None, start = None, end = None) :
+        """Boolean array of the telegrams which match all given criteria.
+
+           `src` and `dst` are addresses (int) or address patterns, `service`
+           is a telegram class, its name or a list of them, the time of the
+           telegrams must be in `[start, end)`.
+        """
+        r      = self.records
+        result = np.ones (len (r), bool)
+        if start is not None :
+            result &= r ["time"] >= start
+        if end is not None :
+            result &= r ["time"] < end
+        for column, address in (("src", src), ("dst", dst)) :
+            if isinstance (address, str) :
+                mask, value, group = self.Address_Pattern (address)
+                result &= (r [column] & mask) == value
+                if column == "dst" :
+                    result &= r ["group"] == group
+            elif address is not None :
+                result &= r [column] == int (address)
+        if service is not None :
+            if isinstance (service, (str, type)) :
+                service = (service, )
+            names   = set \
+                (getattr (s, "__name__", s) for s in service)
+            kinds   = [i for (i, n) in enumerate (self.kinds) if n in names]
+            result &= np.isin (r ["kind"], kinds)
+        return result
+    # end def mask
+
+    def select (self, ** criteria) :
+        """A store of the telegrams which match `criteria` (see `mask`).
+
+           The new store shares the payload buffer with this one.
+        """
+        return self.__class__ \
+            (self.records [self.mask (** criteria)], self.payload, self.kinds)
+    # end def select
+
+    def count_by (self, * columns) :
+        """Number of telegrams for each value of `columns`.
+
+           For more than one column the keys are tuples, the `kind` column
+           is counted by the name of the telegram class.
+        """
+        if not len (self.records) :
+            return {}
+        ### the values of each column are replaced by their index in the
+        ### sorted unique values and combined into one key per telegram
+        uniques = []
+        inverse = []
+        for c in columns :
+            values, index = np.unique (self.records [c], return_inverse = True)
+            if c == "kind" :
+                values = [self.kinds [v] for v in values.tolist ()]
+            else :
+                values = values.tolist ()
+            uniques.append (values)
+            inverse.append (index)
+        dims         = [len (u) for u in uniques]
+        keys, counts = np.unique \
+            (np.ravel_multi_index (inverse, dims), return_counts = True)
+        indices      = [i.tolist () for i in np.unravel_index (keys, dims)]
+        result       = {}
+        for key, count in zip (zip (* indices), counts.tolist ()) :
+            key = tuple (u [i] for (u, i) in zip (uniques, key))
+            result [key if len (columns) > 1 else key [0]] = count
+        return result
+    # end def count_by
+
+    def frame (self, i) :
+        """The raw frame of telegram `i` (a memoryview of the payload)."""
+        r   = self.records [i]
+        off = int (r ["offset"])
+        return memoryview (self.payload) [off : off + 8 + int (r ["length"])]
+    # end def frame
+
+    def telegram (self, i) :
+        """A `Lazy_Telegram` for telegram `i`."""
+        return _Telegram_.From_Raw_Lazy (self.frame (i))
+    # end def telegram
+
+    def __len__ (self) :
+        return len (self.records)
+    # end def __len__
+
+    def save (self, file_name) :
+        """Save the store into `file_name.records.npy`, `.payload` and
+           `.kinds`.
+        """
+        records     = np.lib.format.open_memmap \
+            ( file_name + ".records.npy", mode = "w+"
+            , dtype = self.dtype, shape = self.records.shape
+            )
+        records [:] = self.records
+        records.flush ()
+        payload     = np.memmap \
+            ( file_name + ".payload", mode = "w+", dtype = np.uint8
+            , shape = (max (len (self.payload), 1), )
+            )
+        payload [:len (self.payload)] = self.payload
+        payload.flush ()
+        with open (file_name + ".kinds", "w") as f :
+            f.write ("\n".join (self.kinds))
+    # end def save
+
+    @classmethod
+    def Load (cls, file_name) :
+        """Load a saved store; the records and the payload are memory mapped."""
+        records = np.load (file_name + ".records.npy", mmap_mode = "r")
+        payload = np.memmap (file_name + ".payload", mode = "r", dtype = np.uint8)
+        with open (file_name + ".kinds") as f :
+            kinds = f.read ().split ("\n")
+        return cls (records, payload, kinds)
+    # end def Load
+
+# end class Telegram_Store
+### __END__ Telegram_Store
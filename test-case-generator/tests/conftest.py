@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2015-2021 Martin Glueck All rights reserved
+# Neugasse 2, A--2244 Spannberg, Austria. martin@mangari.org
+# #*** <License> ************************************************************#
+# This module is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this module. If not, see <http://www.gnu.org/licenses/>.
+# #*** </License> ***********************************************************#
+#
+#++
+# Name
+#    tests.conftest
+#
+# Purpose
+#    Make the `STG` package importable for the tests, run them with
+#    `python3 -m pytest tests` in the test-case-generator directory
+#
+#--
+
+import os
+import sys
+
+_stg_dir = os.path.dirname (os.path.dirname (os.path.abspath (__file__)))
+if _stg_dir not in sys.path :
+    sys.path.insert (0, _stg_dir)
+
+### __END__ tests.conftest
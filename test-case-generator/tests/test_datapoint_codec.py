@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2015-2021 Martin Glueck All rights reserved
+# Neugasse 2, A--2244 Spannberg, Austria. martin@mangari.org
+# #*** <License> ************************************************************#
+# This module is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this module. If not, see <http://www.gnu.org/licenses/>.
+# #*** </License> ***********************************************************#
+#
+#++
+# Name
+#    tests.test_datapoint_codec
+#
+# Purpose
+#    Tests of the telegrams with a STG.Datapoint_Codec, the raw and
+#    physical values of the codecs are checked by
+#    sigrok/knxoffline/tests/test_dpt.py
+#
+#--
+
+import pytest
+
+pytest.importorskip ("numpy")
+
+from   STG.Datapoint        import Datapoint, Bit, Float, String
+from   STG.Datapoint        import Unsigned_Integer
+from   STG.Datapoint_Codec  import Datapoint_Codec
+from   STG.Telegram         import Send_Value
+
+def _codec (id, size, format) :
+    datapoint = Datapoint.Table.get (id) or Datapoint (id, id, size, id)
+    datapoint.formats = [format]
+    Datapoint_Codec.Table.pop (id, None)
+    return Datapoint_Codec.Get (datapoint)
+# end def _codec
+
+def _number (cls, size, coefficient = "", min_value = "", max_value = "") :
+    return cls \
+        ( "F-%d" % (size, ), 0, name = "x", size = str (size), unit = ""
+        , coeffecient = coefficient, min_value = min_value
+        , max_value = max_value, register = False
+        )
+# end def _number
+
+CODECS = dict \
+    ( dpt_1  = lambda : _codec
+        ("DPST-1-1",    1, Bit ("B-1", 0, "Off", "On", register = False))
+    , dpt_5  = lambda : _codec
+        ("DPST-5-1",    8, _number (Unsigned_Integer, 8, "0.4", "0", "100"))
+    , dpt_9  = lambda : _codec
+        ("DPST-9-1",   16, _number (Float, 16, "", "-273", "670760"))
+    , dpt_14 = lambda : _codec
+        ("DPST-14-68", 32, _number (Float, 32))
+    , dpt_16 = lambda : _codec
+        ("DPST-16-0", 112, String ("S-1", 0, 112, None, register = False))
+    )
+
+### codec, physical value, APCI and payload of the telegram
+PAYLOADS = \
+    ( ("dpt_1",  True,        "0081")
+    , ("dpt_1",  "On",        "0081")
+    , ("dpt_1",  "off",       "0080")
+    , ("dpt_5",  100,         "0080ff")
+    , ("dpt_5",  "50",        "008080")
+    , ("dpt_9",  21.5,        "00800c33")
+    , ("dpt_9",  "21.5",      "00800c33")
+    , ("dpt_9",  -30,         "00808a24")
+    , ("dpt_9",  "nan",       "00807fff")
+    , ("dpt_14", 21.5,        "008041ac0000")
+    , ("dpt_14", "-30",       "0080c1f00000")
+    , ("dpt_16", "KNX is OK", "00804b4e58206973204f4b0000000000")
+    )
+
+@pytest.mark.parametrize ("codec, value, payload", PAYLOADS)
+def test_payload (codec, value, payload) :
+    codec = CODECS [codec] ()
+    t     = Send_Value (src = "1.1.1", dst = "1/2/3", codec = codec, value = value)
+    frame = t.bytes
+    assert frame [6 : -1].hex () == payload
+    assert frame [5] & 0x0F == len (payload) // 2 - 1
+# end def test_payload
+
+def test_set_string_value () :
+    t = Send_Value \
+        (src = "1.1.1", dst = "1/2/3", codec = CODECS ["dpt_9"] (), value = 0)
+    t.set (value = "21.5")
+    assert t.value == 21.5
+    assert t.bytes [8 : -1] == bytes ((0x0C, 0x33))
+# end def test_set_string_value
+
+def test_invalid_string_value () :
+    with pytest.raises (ValueError) :
+        Send_Value (src = "1.1.1", dst = "1/2/3", codec = CODECS ["dpt_1"] (), value = "maybe")
+    with pytest.raises (ValueError) :
+        Send_Value (src = "1.1.1", dst = "1/2/3", codec = CODECS ["dpt_9"] (), value = "1.2.3")
+# end def test_invalid_string_value
+
+def test_without_codec () :
+    ### a string is a literal of the raw value
+    t = Send_Value (src = "1.1.1", dst = "1/2/3", value = "0x21")
+    assert t.value == 0x21
+    assert t.codec is None
+# end def test_without_codec
+
+### __END__ tests.test_datapoint_codec
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2015-2021 Martin Glueck All rights reserved
+# Neugasse 2, A--2244 Spannberg, Austria. martin@mangari.org
+# #*** <License> ************************************************************#
+# This module is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this module. If not, see <http://www.gnu.org/licenses/>.
+# #*** </License> ***********************************************************#
+#
+#++
+# Name
+#    tests.test_differential_download
+#
+# Purpose
+#    Tests of STG.Differential_Download with a simulated device memory
+#
+#--
+
+import pytest
+
+from   STG.Differential_Download import Differential_Download
+from   STG.Telegram              import _Telegram_, Memory_Read_Response
+from   STG.Telegram              import Memory_Write, Send_Value
+
+ADDRESS = 0x4000
+
+def _device_responses (memory, requests, lazy) :
+    """The responses of a device with `memory` at `ADDRESS`."""
+    result = [Send_Value (src = "1.1.5", dst = "1/2/3", value = 1)]
+    for r in requests :
+        offset = r.address - ADDRESS
+        t      = Memory_Read_Response \
+            ( src     = r.dst
+            , dst     = r.src
+            , pno     = r.pno
+            , address = r.address
+            , mem     = bytes (memory [offset : offset + r.count])
+            )
+        if lazy :
+            t = _Telegram_.From_Raw_Lazy (t.bytes)
+        result.append (t)
+    return result
+# end def _device_responses
+
+def _write (memory, telegrams) :
+    for t in telegrams :
+        assert isinstance (t, Memory_Write)
+        offset = t.address - ADDRESS
+        memory [offset : offset + t.count] = t.mem
+# end def _write
+
+@pytest.mark.parametrize ("lazy", (False, True))
+def test_only_changed_bytes_are_written (lazy) :
+    memory        = bytearray (range (40))
+    image         = bytearray (memory)
+    image [3]     = 0xAA
+    image [30:33] = b"\xBB\xCC\xDD"
+    dl            = Differential_Download (image, ADDRESS)
+    requests      = dl.read_plan ("0.0.1", "1.1.5")
+    assert sum (r.count for r in requests) == len (image)
+    dl.read_back (_device_responses (memory, requests, lazy))
+    writes        = dl.write_plan ("0.0.1", "1.1.5")
+    assert sum (w.count for w in writes) == 4
+    _write (memory, writes)
+    assert memory == image
+# end def test_only_changed_bytes_are_written
+
+def test_unread_bytes_are_written () :
+    memory   = bytearray (range (40))
+    dl       = Differential_Download (memory, ADDRESS)
+    requests = dl.read_plan ("0.0.1", "1.1.5")
+    ### the response to the last request is lost
+    dl.read_back (_device_responses (memory, requests [:-1], True))
+    writes   = dl.write_plan ("0.0.1", "1.1.5")
+    assert sum (w.count for w in writes) == requests [-1].count
+    assert writes [0].address == requests [-1].address
+# end def test_unread_bytes_are_written
+
+### __END__ tests.test_differential_download
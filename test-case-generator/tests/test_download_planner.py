@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2015-2021 Martin Glueck All rights reserved
+# Neugasse 2, A--2244 Spannberg, Austria. martin@mangari.org
+# #*** <License> ************************************************************#
+# This module is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this module. If not, see <http://www.gnu.org/licenses/>.
+# #*** </License> ***********************************************************#
+#
+#++
+# Name
+#    tests.test_download_planner
+#
+# Purpose
+#    Tests of STG.Download_Planner
+#
+#--
+
+import pytest
+
+from   STG.Download_Planner import Download_Planner
+from   STG.Telegram         import _Telegram_, Connect, Disconnect
+from   STG.Telegram         import Memory_Write
+
+ADDRESS = 0x4000
+
+def _download (memory, telegrams) :
+    for t in telegrams :
+        t = _Telegram_.From_Raw (t.bytes)
+        if isinstance (t, Memory_Write) :
+            offset = t.address - ADDRESS
+            memory [offset : offset + t.count] = t.mem
+    return memory
+# end def _download
+
+def test_unknown_defaults () :
+    image     = bytes (range (30))
+    planner   = Download_Planner (image, ADDRESS)
+    assert planner.chunks () == [(0, 12), (12, 12), (24, 6)]
+    telegrams = planner.telegrams ("0.0.1", "1.1.5", pno = 15)
+    assert isinstance (telegrams [0],  Connect)
+    assert isinstance (telegrams [-1], Disconnect)
+    assert [t.pno for t in telegrams [1:-1]] == [15, 0, 1]
+    assert _download (bytearray (30), telegrams) == image
+# end def test_unknown_defaults
+
+def test_dirty_ranges () :
+    defaults        = bytearray (40)
+    image           = bytearray (defaults)
+    image [2]       = 1
+    image [5:7]     = b"\1\1"
+    image [30:40]   = b"\2" * 10
+    planner         = Download_Planner (image, ADDRESS, defaults = 0)
+    assert planner.dirty_ranges () == [(2, 3), (5, 7), (30, 40)]
+    ### the gap 3..5 is written, 7..30 is too far
+    assert planner.chunks () == [(2, 5), (30, 10)]
+    assert _download (defaults, planner.telegrams ("0.0.1", "1.1.5")) \
+        == image
+# end def test_dirty_ranges
+
+def test_merge_gap () :
+    image   = b"\1\0\0\0\1\0\1"
+    planner = Download_Planner (image, ADDRESS, defaults = 0, merge_gap = 2)
+    assert planner.chunks () == [(0, 1), (4, 3)]
+    planner = Download_Planner (image, ADDRESS, defaults = 0)
+    assert planner.chunks () == [(0, 7)]
+# end def test_merge_gap
+
+def test_max_apdu () :
+    image   = bytes (range (1, 101))
+    planner = Download_Planner (image, ADDRESS, max_apdu = 254)
+    assert planner.chunks () == [(0, 63), (63, 37)]
+    assert _download (bytearray (100), planner.telegrams ("0.0.1", "1.1.5")) \
+        == image
+# end def test_max_apdu
+
+def test_unchanged_image () :
+    planner = Download_Planner (bytes (10), ADDRESS, defaults = bytes (10))
+    assert planner.chunks () == []
+    assert planner.telegrams ("0.0.1", "1.1.5", connect = False) == []
+# end def test_unchanged_image
+
+def test_defaults_size () :
+    with pytest.raises (ValueError, match = "Size of defaults") :
+        Download_Planner (bytes (10), ADDRESS, defaults = bytes (9))
+# end def test_defaults_size
+
+### __END__ tests.test_download_planner
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2015-2021 Martin Glueck All rights reserved
+# Neugasse 2, A--2244 Spannberg, Austria. martin@mangari.org
+# #*** <License> ************************************************************#
+# This module is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this module. If not, see <http://www.gnu.org/licenses/>.
+# #*** </License> ***********************************************************#
+#
+#++
+# Name
+#    tests.test_frame_scanner
+#
+# Purpose
+#    Tests of STG.Frame_Scanner
+#
+#--
+
+import numpy  as np
+import pytest
+
+from   STG.Frame_Scanner    import Frame_Scanner
+from   STG.Telegram         import ACK, Connect, Send_Value
+from   STG.Telegram         import Memory_Read_Response
+
+Frames = \
+    [ Send_Value (src = "1.1.1", dst = "1/2/3", value = 1).bytes
+    , Connect    (src = "0.0.1", dst = "1.1.5").bytes
+    , Memory_Read_Response
+        ( src = "1.1.5", dst = "0.0.1", pno = 1, address = 0x100
+        , mem = bytes (range (12))
+        ).bytes
+    , ACK        (src = "0.0.1", dst = "1.1.5", pno = 1).bytes
+    ]
+
+def _stream (frames) :
+    """The frames, each followed by an acknowledge and some garbage."""
+    result = bytearray (b"\0\0")
+    for i, f in enumerate (frames) :
+        result += f + b"\xCC" + b"\0" * i
+    return bytes (result)
+# end def _stream
+
+def test_scan () :
+    stream               = _stream (Frames)
+    starts, ends, done   = Frame_Scanner.scan (np.frombuffer (stream, np.uint8))
+    assert [stream [s : e] for s, e in zip (starts, ends)] == Frames
+    assert done == len (stream)
+# end def test_scan
+
+def test_corrupted_frame () :
+    frames        = list (Frames)
+    frames [1]    = bytearray (frames [1])
+    frames [1][3] ^= 0x10
+    stream        = _stream (frames)
+    result        = list (Frame_Scanner ().frames ([stream]))
+    assert result == [Frames [0]] + Frames [2:]
+# end def test_corrupted_frame
+
+@pytest.mark.parametrize ("size", (1, 3, 7, 23, 1000))
+def test_chunks (size) :
+    stream  = _stream (Frames * 3)
+    chunks  = [stream [i : i + size] for i in range (0, len (stream), size)]
+    assert list (Frame_Scanner ().frames (chunks)) == Frames * 3
+    scanner = Frame_Scanner ()
+    starts  = []
+    for i, chunk in enumerate (chunks) :
+        s, e = scanner.feed (chunk, final = i == len (chunks) - 1)
+        starts.extend (s.tolist ())
+    assert [stream [s] for s in starts] == [f [0] for f in Frames * 3]
+# end def test_chunks
+
+def test_prefix_xor () :
+    a      = np.random.default_rng (1).integers (0, 256, 1001).astype (np.uint8)
+    prefix = Frame_Scanner.prefix_xor (a)
+    assert prefix [0] == 0
+    assert (prefix [1:] == np.bitwise_xor.accumulate (a)).all ()
+# end def test_prefix_xor
+
+### __END__ tests.test_frame_scanner
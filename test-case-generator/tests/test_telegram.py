@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2015-2021 Martin Glueck All rights reserved
+# Neugasse 2, A--2244 Spannberg, Austria. martin@mangari.org
+# #*** <License> ************************************************************#
+# This module is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this module. If not, see <http://www.gnu.org/licenses/>.
+# #*** </License> ***********************************************************#
+#
+#++
+# Name
+#    tests.test_telegram
+#
+# Purpose
+#    Tests of STG.Telegram
+#
+#--
+
+import pytest
+
+from   STG.Telegram         import _Telegram_, _Address_, Int_Field
+from   STG.Telegram         import Extended_Data_Request, Send_Value
+from   STG.Telegram         import Memory_Read_Request, Memory_Read_Response
+from   STG.Telegram         import Memory_Write
+
+def test_memory_write_extended_frame () :
+    mem   = bytes (range (63))
+    t     = Memory_Write (src = "0.0.1", dst = "1.1.5", address = 0x100, mem = mem)
+    frame = t.bytes
+    assert len (frame) == 8 + 3 + len (mem) + 1
+    assert _Telegram_.Find_Class (frame) is Extended_Data_Request
+    r     = _Telegram_.From_Raw (frame)
+    assert isinstance (r, Memory_Write)
+    assert (r.count, r.address, r.mem) == (63, 0x100, mem)
+# end def test_memory_write_extended_frame
+
+@pytest.mark.parametrize \
+    ( "telegram"
+    , ( lambda : Memory_Write
+          (src = "0.0.1", dst = "1.1.5", address = 0x100, mem = bytes (64))
+      , lambda : Memory_Read_Response
+          (src = "1.1.5", dst = "0.0.1", address = 0x100, mem = bytes (100))
+      , lambda : Memory_Read_Request
+          (src = "0.0.1", dst = "1.1.5", address = 0x100, count = 64)
+      )
+    )
+def test_memory_count_overflow (telegram) :
+    with pytest.raises (ValueError, match = "64 bytes|100 bytes") :
+        telegram ().bytes
+# end def test_memory_count_overflow
+
+@pytest.mark.parametrize \
+    ( "text, value, group"
+    , ( ("1.1.1",     0x1101, False)
+      , ("15.15.255", 0xFFFF, False)
+      , ("0/0/1",     0x0001, True)
+      , ("1/2/3",     0x0A03, True)
+      , ("31/7/255",  0xFFFF, True)
+      , ("1/515",     0x0A03, True)
+      , ("31/2047",   0xFFFF, True)
+      )
+    )
+def test_address (text, value, group) :
+    v = _Address_.Value.From_String (text)
+    assert int (v) == value
+    assert (v.seperator == "/") == group
+    assert Int_Field.Parse_Literal (text) == value
+# end def test_address
+
+@pytest.mark.parametrize \
+    ( "text"
+    , ( "1.2", "1.1.1.1", "16.0.0", "1.16.0", "1.1.256", "1.1.300"
+      , "1/2/3/4", "32/0/0", "1/8/0", "1/2/256", "32/0", "1/2048"
+      , "1.1.x", "1/-1/0", "", "1/"
+      )
+    )
+def test_invalid_address (text) :
+    with pytest.raises (ValueError) :
+        _Address_.Value.From_String (text)
+    with pytest.raises (ValueError) :
+        Int_Field.Parse_Literal (text)
+# end def test_invalid_address
+
+def test_address_values_are_not_shared () :
+    t1 = Send_Value (src = "1.1.1", dst = "1/2/3", value = 1)
+    t2 = Send_Value (src = "1.1.1", dst = "1/2/3", value = 1)
+    assert t1.dst is not t2.dst
+    assert str (t1.dst) == str (t2.dst) == "1/2/3"
+    assert t1.bytes == t2.bytes
+# end def test_address_values_are_not_shared
+
+### __END__ tests.test_telegram
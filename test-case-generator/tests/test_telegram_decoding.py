@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2015-2021 Martin Glueck All rights reserved
+# Neugasse 2, A--2244 Spannberg, Austria. martin@mangari.org
+# #*** <License> ************************************************************#
+# This module is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this module. If not, see <http://www.gnu.org/licenses/>.
+# #*** </License> ***********************************************************#
+#
+#++
+# Name
+#    tests.test_telegram_decoding
+#
+# Purpose
+#    Tests of the decoding of received frames by STG.Telegram
+#
+#--
+
+import copy
+import pytest
+
+from   STG.Telegram         import _Telegram_, Data_Request, Lazy_Telegram
+from   STG.Telegram         import ACK, Connect, Disconnect, Send_Value
+from   STG.Telegram         import Memory_Read_Request, Memory_Read_Response
+from   STG.Telegram         import Memory_Write
+
+Telegrams = \
+    ( Send_Value (src = "1.1.1", dst = "1/2/3", value = 1)
+    , Send_Value (src = "15.15.255", dst = "31/7/255", value = 0)
+    , Connect    (src = "0.0.1", dst = "1.1.5")
+    , Disconnect (src = "0.0.1", dst = "1.1.5")
+    , ACK        (src = "0.0.1", dst = "1.1.5", pno = 3)
+    , Memory_Read_Request
+        (src = "0.0.1", dst = "1.1.5", pno = 1, address = 0x100, count = 4)
+    , Memory_Read_Response
+        (src = "1.1.5", dst = "0.0.1", pno = 1, address = 0x100, mem = b"abcd")
+    , Memory_Write
+        (src = "0.0.1", dst = "1.1.5", pno = 2, address = 0x4000, mem = b"\1\2")
+    , Memory_Write
+        (src = "0.0.1", dst = "1.1.5", address = 0x100, mem = bytes (range (40)))
+    )
+
+def _walk (cls, frame) :
+    ### `Find_Class` without the dispatch table
+    while "Sub_Types" in cls.__dict__ :
+        off, shift, mask = cls.Match
+        if mask <= 0xFF :
+            type_id = (frame [off] >> shift) & mask
+        else :
+            type_id = (((frame [off] << 8) + frame [off + 1]) & mask) >> shift
+        cls = cls.Sub_Types [type_id]
+    return cls
+# end def _walk
+
+def _values (telegram) :
+    return dict ((k, str (v)) for k, v in telegram.attributes.items ())
+# end def _values
+
+@pytest.mark.parametrize ("telegram", Telegrams)
+def test_from_raw (telegram) :
+    frame  = telegram.bytes
+    result = _Telegram_.From_Raw (frame)
+    assert result.__class__ is telegram.__class__
+    assert result.bytes == frame
+    assert str (result) == str (telegram)
+# end def test_from_raw
+
+@pytest.mark.parametrize ("telegram", Telegrams)
+def test_dispatch_table (telegram) :
+    frame = telegram.bytes
+    assert _Telegram_.Find_Class (frame) is _walk (_Telegram_, frame)
+    if frame [0] & 0xC0 :
+        ### a standard frame
+        assert Data_Request.Find_Class (frame) is _walk (Data_Request, frame)
+# end def test_dispatch_table
+
+def test_from_raw_many () :
+    buffer = b"".join (t.bytes for t in Telegrams)
+    result = list (_Telegram_.From_Raw_Many (buffer))
+    assert [r.bytes for r in result] == [t.bytes for t in Telegrams]
+    assert [str (r) for r in result] == [str (t) for t in Telegrams]
+    assert list (_Telegram_.From_Raw_Many (b"")) == []
+# end def test_from_raw_many
+
+@pytest.mark.parametrize ("cut", (1, 5, len (Telegrams [-1].bytes) - 4))
+def test_from_raw_many_truncated (cut) :
+    buffer = b"".join (t.bytes for t in Telegrams) [:-cut]
+    with pytest.raises (ValueError, match = "Truncated frame") :
+        list (_Telegram_.From_Raw_Many (buffer))
+# end def test_from_raw_many_truncated
+
+@pytest.mark.parametrize ("telegram", Telegrams)
+def test_lazy (telegram) :
+    frame  = telegram.bytes
+    eager  = _Telegram_.From_Raw (frame)
+    lazy   = _Telegram_.From_Raw_Lazy (frame)
+    assert isinstance (lazy, Lazy_Telegram)
+    assert lazy.telegram_class is telegram.__class__
+    assert lazy._values is None
+    assert str (lazy.src) == str (telegram.src)
+    assert list (lazy._values) == ["src"]
+    assert _values (lazy) == _values (eager)
+    assert str (lazy) == str (eager)
+    assert lazy.bytes == frame
+    assert lazy.telegram ().bytes == frame
+    with pytest.raises (AttributeError) :
+        lazy.no_such_field
+# end def test_lazy
+
+def test_lazy_many () :
+    buffer = bytearray (b"".join (t.bytes for t in Telegrams))
+    lazy   = list (_Telegram_.From_Raw_Many (buffer, lazy = True))
+    eager  = list (_Telegram_.From_Raw_Many (buffer))
+    assert [l.telegram_class for l in lazy] == [e.__class__ for e in eager]
+    assert [_values (l) for l in lazy] == [_values (e) for e in eager]
+    ### the standard frames are views of the buffer, not copies
+    assert isinstance (lazy [0].raw, memoryview)
+    assert lazy [0].raw.obj is buffer
+# end def test_lazy_many
+
+@pytest.mark.parametrize ("telegram", Telegrams)
+def test_lazy_copy (telegram) :
+    frame  = telegram.bytes
+    lazy   = _Telegram_.From_Raw_Lazy (memoryview (frame))
+    clone  = copy.copy (lazy)
+    assert clone is not lazy
+    assert clone.telegram_class is lazy.telegram_class
+    assert _values (clone) == _values (lazy)
+    assert clone.bytes == frame
+    lazy   = _Telegram_.From_Raw_Lazy (frame)
+    lazy.src
+    assert _values (copy.copy (lazy)) == _values (lazy)
+    with pytest.raises (AttributeError) :
+        Lazy_Telegram.__new__ (Lazy_Telegram)._values
+# end def test_lazy_copy
+
+### __END__ tests.test_telegram_decoding
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2015-2021 Martin Glueck All rights reserved
+# Neugasse 2, A--2244 Spannberg, Austria. martin@mangari.org
+# #*** <License> ************************************************************#
+# This module is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this module. If not, see <http://www.gnu.org/licenses/>.
+# #*** </License> ***********************************************************#
+#
+#++
+# Name
+#    tests.test_telegram_store
+#
+# Purpose
+#    Tests of STG.Telegram_Store
+#
+#--
+
+import pytest
+
+np = pytest.importorskip ("numpy")
+
+from   STG.Telegram         import _Telegram_, Send_Value, Memory_Read_Request
+from   STG.Telegram_Store   import Telegram_Store
+
+ACK = bytes ((0xCC, ))
+
+def _frames () :
+    return \
+        [ Send_Value (src = "1.1.1", dst = "1/2/3", value = 1).bytes
+        , Memory_Read_Request
+            (src = "1.1.1", dst = "1.1.2", count = 4, address = 0x100).bytes
+        , Send_Value
+            (src = "1.1.5", dst = "2/0/1", length = 16, value = 0x0C33).bytes
+        ]
+# end def _frames
+
+def test_acks_are_skipped () :
+    frames  = _frames ()
+    records = [ACK]
+    for f in frames :
+        records.extend ((bytes (f), ACK))
+    store   = Telegram_Store.From_Frames \
+        ((0.1 * i, r) for (i, r) in enumerate (records))
+    assert len (store) == len (frames)
+    assert store.records ["time"].tolist () == pytest.approx ([0.1, 0.3, 0.5])
+    assert [bytes (store.frame (i)) for i in range (len (store))] \
+        == [bytes (f) for f in frames]
+    assert store.count_by ("kind") == \
+        {"Send_Value" : 2, "Memory_Read_Request" : 1}
+    assert str (store.telegram (2).dst) == "2/0/1"
+# end def test_acks_are_skipped
+
+def test_damaged_frames_are_skipped () :
+    good, short, long = (bytes (f) for f in _frames ())
+    store = Telegram_Store.From_Frames \
+        (enumerate ((good, short [:-1], long + b"\0", ACK)))
+    assert len (store) == 1
+    assert bytes (store.frame (0)) == good
+# end def test_damaged_frames_are_skipped
+
+def test_extended_frames_are_rejected () :
+    extended      = bytearray (_frames () [0])
+    ### the frame type bits of an extended frame are 0
+    extended [0] &= 0x3F
+    frames        = [ACK, bytes (_frames () [0]), bytes (extended)]
+    with pytest.raises (ValueError, match = "Frame 2 is an extended frame") :
+        Telegram_Store.From_Frames (enumerate (frames))
+# end def test_extended_frames_are_rejected
+
+def test_empty () :
+    assert len (Telegram_Store.From_Frames (())) == 0
+    assert len (Telegram_Store.From_Frames ([(0, ACK)])) == 0
+# end def test_empty
+
+def test_kind_table_is_cached (monkeypatch) :
+    table, kinds = Telegram_Store._Kind_Table ()
+    assert Telegram_Store._Kind_Table () [0] is table
+    assert _store ().kinds is kinds
+    ### a new sub type clears the dispatch table, which rebuilds the kinds
+    monkeypatch.setattr (_Telegram_, "_dispatch", None)
+    new_table, new_kinds = Telegram_Store._Kind_Table ()
+    assert new_table is not table
+    assert new_table.tolist () == table.tolist () and new_kinds == kinds
+# end def test_kind_table_is_cached
+
+def _store () :
+    return Telegram_Store.From_Frames \
+        ((0.1 * i, bytes (f)) for (i, f) in enumerate (_frames ()))
+# end def _store
+
+@pytest.mark.parametrize \
+    ( "criteria, selected"
+    , ( (dict (dst = "1/2/3"),             [0])
+      , (dict (dst = "1/2/*"),             [0])
+      , (dict (dst = "*/*/*"),             [0, 2])
+      , (dict (dst = "*/0/1"),             [2])
+      , (dict (dst = "2/*/*"),             [2])
+      , (dict (dst = "1.1.*"),             [1])
+      , (dict (src = "1.1"),               [0, 1, 2])
+      , (dict (src = "1.1.5"),             [2])
+      , (dict (src = "*.*.1", dst = "1/*/*"), [0])
+      , (dict (dst = "1/2/4"),             [])
+      )
+    )
+def test_address_patterns (criteria, selected) :
+    store = _store ()
+    assert np.flatnonzero (store.mask (** criteria)).tolist () == selected
+# end def test_address_patterns
+
+@pytest.mark.parametrize \
+    ( "pattern"
+    , ( "1/2/300", "1/9/3", "32/0/0", "1.1.300", "16.*.*", "1.16"
+      , "1/2/3/4", "1.1.1.1", "1/x/3", "1/-1", "1/2/", ""
+      ### two level group addresses are not supported as patterns
+      , "1/2", "2/*", "1/515"
+      )
+    )
+def test_invalid_address_patterns (pattern) :
+    with pytest.raises (ValueError, match = "Invalid") :
+        Telegram_Store.Address_Pattern (pattern)
+    with pytest.raises (ValueError) :
+        _store ().mask (dst = pattern)
+# end def test_invalid_address_patterns
+
+@pytest.mark.parametrize ("count", (0, 3))
+def test_save_and_load (tmp_path, count) :
+    store     = Telegram_Store.From_Frames \
+        ((0.1 * i, bytes (f)) for (i, f) in enumerate (_frames () [:count]))
+    file_name = str (tmp_path / "log")
+    store.save (file_name)
+    loaded    = Telegram_Store.Load (file_name)
+    assert isinstance (loaded.payload, np.memmap)
+    assert isinstance (loaded.records, np.memmap)
+    assert len (loaded) == count
+    assert loaded.kinds == store.kinds
+    assert loaded.records.tolist () == store.records.tolist ()
+    assert [bytes (loaded.frame (i)) for i in range (count)] \
+        == [bytes (f) for f in _frames () [:count]]
+    assert loaded.count_by ("kind") == store.count_by ("kind")
+    assert np.flatnonzero (loaded.mask (dst = "1/2/3")).tolist () \
+        == np.flatnonzero (store.mask (dst = "1/2/3")).tolist ()
+# end def test_save_and_load
+
+### __END__ tests.test_telegram_store